@@ -6,15 +6,177 @@ load_dotenv()
 class Config:
     # Clerk Configuration
     CLERK_SECRET_KEY = os.getenv('CLERK_SECRET_KEY')
+    CLERK_API_URL = os.getenv('CLERK_API_URL', 'https://api.clerk.com/v1')
+    CLERK_TIMEOUT = float(os.getenv('CLERK_TIMEOUT', 5))
+    # Session token verification; keys default to the Backend API JWKS endpoint
+    CLERK_JWKS_URL = os.getenv('CLERK_JWKS_URL', f"{CLERK_API_URL}/jwks")
+    CLERK_JWKS_CACHE_SECONDS = float(os.getenv('CLERK_JWKS_CACHE_SECONDS', 3600))
+    # An unknown key id refetches the JWKS at most this often
+    CLERK_JWKS_MIN_REFRESH_SECONDS = 30
+    # Optional `iss` and `azp` checks, e.g. https://clerk.example.com and http://localhost:5173
+    CLERK_ISSUER = os.getenv('CLERK_ISSUER')
+    CLERK_AUTHORIZED_PARTIES = [p for p in os.getenv('CLERK_AUTHORIZED_PARTIES', '').split(',') if p]
+    AUTH_CLOCK_SKEW_SECONDS = 5
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+    AUTH_TOKEN_CACHE_SECONDS = float(os.getenv('AUTH_TOKEN_CACHE_SECONDS', 60))
+    # Resolved roles are cached per process (utils/authz.py)
+    ROLE_CACHE_SIZE = 10000
+    ROLE_CACHE_SECONDS = float(os.getenv('ROLE_CACHE_SECONDS', 300))
+    AUTH_LOG_LEVEL = os.getenv('AUTH_LOG_LEVEL', 'DEBUG').upper()
+    AUTH_LOG_SAMPLE_RATE = float(os.getenv('AUTH_LOG_SAMPLE_RATE', 0.01))
+
+    # Signing secret (whsec_...) of the Clerk webhook that keeps cached users current
+    CLERK_WEBHOOK_SECRET = os.getenv('CLERK_WEBHOOK_SECRET')
+
+    # Clerk users and user listings are cached in each process, and served
+    # stale for up to USER_DIRECTORY_STALE_SECONDS while they refresh
+    USER_DIRECTORY_CACHE_SECONDS = float(os.getenv('USER_DIRECTORY_CACHE_SECONDS', 300))
+    USER_QUERY_CACHE_SECONDS = float(os.getenv('USER_QUERY_CACHE_SECONDS', 60))
+    USER_DIRECTORY_STALE_SECONDS = float(os.getenv('USER_DIRECTORY_STALE_SECONDS', 3600))
+    USER_CACHE_SIZE = 10000
+    USER_QUERY_CACHE_SIZE = 500
+    # The local user index pulls changes from Clerk at most this often per process
+    USER_INDEX_SYNC_SECONDS = float(os.getenv('USER_INDEX_SYNC_SECONDS', 300))
+    USER_PAGE_MAX = 100
     
     # Flask Configuration
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'beehive-secret-key')
     UPLOAD_FOLDER = 'static/uploads'
     PDF_THUMBNAIL_FOLDER = 'static/uploads/thumbnails/'
+    ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'heif', 'pdf'}
+
+    # Resumable Upload Configuration
+    # Part files of unfinished uploads; kept outside static/ so they are never served
+    UPLOAD_SESSION_FOLDER = os.getenv('UPLOAD_SESSION_FOLDER', 'instance/upload_sessions')
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))
+    UPLOAD_MIN_CHUNK_SIZE = 256 * 1024
+    UPLOAD_MAX_CHUNK_SIZE = 32 * 1024 * 1024
+    UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 512 * 1024 * 1024))
+    UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', 24))
+
+    # Image Derivative Configuration
+    DERIVATIVE_CACHE_FOLDER = os.getenv('DERIVATIVE_CACHE_FOLDER', 'cache/derivatives')
+    # Enforced per process: with several workers the folder can grow to about workers x this
+    DERIVATIVE_CACHE_MAX_BYTES = int(os.getenv('DERIVATIVE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+    DERIVATIVE_WIDTHS = (160, 320, 640, 960, 1280, 1920)
+    DERIVATIVE_QUALITY = int(os.getenv('DERIVATIVE_QUALITY', 80))
+
+    # Voice Note Configuration
+    AUDIO_EXTENSIONS = {'wav', 'webm', 'ogg', 'mp3', 'm4a', 'mp4', 'aac', 'opus'}
+    FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+    AUDIO_TRANSCODE_EXTENSION = 'm4a'
+    AUDIO_TRANSCODE_BITRATE = os.getenv('AUDIO_TRANSCODE_BITRATE', '64k')
+    AUDIO_WAVEFORM_PEAKS = int(os.getenv('AUDIO_WAVEFORM_PEAKS', 200))
+
+    # Media Serving Configuration
+    MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+    # Offload file transfer to the reverse proxy, e.g. '/_internal/' for an nginx
+    # `internal` location aliased to the application root
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX')
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+
+    # Upload listings are paginated; clients follow `next_cursor`
+    UPLOAD_PAGE_SIZE = int(os.getenv('UPLOAD_PAGE_SIZE', 50))
+    UPLOAD_PAGE_MAX = 200
+
+    # Chat history is served in pages; polls send `since` to fetch only new messages
+    CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', 50))
+    CHAT_PAGE_MAX = 200
+    # Polls re-read messages this recent, in case an older one was still being written
+    CHAT_SETTLE_SECONDS = float(os.getenv('CHAT_SETTLE_SECONDS', 2))
+
+    # Dashboard counters are cached briefly in each process
+    STATS_CACHE_SECONDS = float(os.getenv('STATS_CACHE_SECONDS', 10))
+
+    # Admin notifications are claimed in bounded batches
+    NOTIFICATION_CLAIM_BATCH = int(os.getenv('NOTIFICATION_CLAIM_BATCH', 50))
+    NOTIFICATION_PAGE_SIZE = 50
+    NOTIFICATION_PAGE_MAX = 200
+    # Documents fetched per round trip when a list is streamed (?stream=json|ndjson)
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+    # Production server (gunicorn.conf.py): worker processes x threads each
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', min(2 * (os.cpu_count() or 1) + 1, 8)))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 8))
+    # Event streams open per worker; each holds a thread for up to EVENTS_STREAM_SECONDS
+    EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', max(1, WEB_THREADS // 2)))
+    # A worker whose main loop stops responding for this long is killed and replaced. Under gthread
+    # this is a heartbeat, not a request deadline: a slow request on one thread does not trip it
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 60))
+    # On SIGTERM, in-flight requests get this long to finish
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+    WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 5))
+    # Workers are recycled after this many requests (0 disables), staggered by the jitter
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+    WEB_MAX_REQUESTS_JITTER = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 200))
+    # How long /readyz waits for MongoDB
+    HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv('HEALTH_CHECK_TIMEOUT_SECONDS', 2))
+
+    # Server-sent events: 'memory' for a single process, 'mongo' to share events across processes and nodes.
+    # gunicorn refuses 'memory' with several workers, so that is only the default for one
+    EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'mongo' if WEB_WORKERS > 1 else 'memory')
+    EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', 1000))
+    EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', 1))
+    EVENTS_SETTLE_SECONDS = float(os.getenv('EVENTS_SETTLE_SECONDS', 1))
+    EVENTS_RETENTION_HOURS = int(os.getenv('EVENTS_RETENTION_HOURS', 24))
+    EVENTS_HEARTBEAT_SECONDS = 15
+    # Streams end after this long and the client reconnects with Last-Event-ID
+    EVENTS_STREAM_SECONDS = int(os.getenv('EVENTS_STREAM_SECONDS', 300))
+
+    # Database Configuration
+    RUN_MIGRATIONS_ON_STARTUP = os.getenv('RUN_MIGRATIONS_ON_STARTUP', 'true').lower() == 'true'
+
+    # Background Job Configuration
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+    # Renewed every third of this while the job runs; a job whose worker died is picked up once it lapses
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', 5))
+    # GET /api/jobs `wait`: the longest a request may hold a web thread, and how many may wait at once
+    # per worker. Clients that need to wait longer follow the `jobs` events instead
+    JOB_STATUS_MAX_WAIT_SECONDS = float(os.getenv('JOB_STATUS_MAX_WAIT_SECONDS', 5))
+    JOB_STATUS_MAX_WAITERS = int(os.getenv('JOB_STATUS_MAX_WAITERS', 2))
     
+    # Outbound HTTP (utils/http_client.py): (connect, read) timeouts per host
+    HTTP_DEFAULT_TIMEOUT = (3.05, 10)
+    HTTP_TIMEOUTS = {
+        'api.clerk.com': (3.05, CLERK_TIMEOUT),
+        'oauth2.googleapis.com': (3.05, 10),
+        'www.googleapis.com': (3.05, 10),
+    }
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+    HTTP_BACKOFF_SECONDS = 0.2
+    HTTP_MAX_BACKOFF_SECONDS = 5
+    # Consecutive failures that open a host's circuit, and how long it stays open
+    HTTP_BREAKER_FAILURES = int(os.getenv('HTTP_BREAKER_FAILURES', 5))
+    HTTP_BREAKER_RESET_SECONDS = float(os.getenv('HTTP_BREAKER_RESET_SECONDS', 30))
+
+    # Response compression (utils/compression.py): bodies smaller than this are sent as they are
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/css',
+                          'application/javascript', 'text/javascript', 'image/svg+xml'}
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 5
+
     # Database Configuration
-    MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+    MONGODB_URI = os.getenv('MONGODB_CONNECTION_STRING') or os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     DATABASE_NAME = os.getenv('DATABASE_NAME', 'beehive')
+    # Connection pool and timeouts, per process
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+    # e.g. 'majority' or '1'; unset uses the server default
+    MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN')
+    MONGO_APP_NAME = 'beehive'
     
     # CORS Configuration
     CORS_ORIGINS = [
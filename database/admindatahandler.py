@@ -4,6 +4,7 @@ import re
 from flask import session
 
 from database import databaseConfig
+from utils.authz import invalidate_role, resolve_role
 
 beehive_admin_collection = databaseConfig.get_beehive_admin_collection()
 
@@ -17,6 +18,7 @@ def create_admin(name: str, email: str, google_id: str, accountcreatedtime: date
         "role" : "admin"
     }
     admin_inserted_id = beehive_admin_collection.insert_one(admin_data).inserted_id
+    invalidate_role('google', google_id)
 
 def check_admin_available(google_id: str):
     query = {
@@ -27,23 +29,14 @@ def check_admin_available(google_id: str):
     return count == 0
 
 def is_admin():
-    # Check admin based on google_id (for Google sign-in)
-    if 'google_id' in session:
-        query = {
-            "google_id": session['google_id']
-        }
-        admin = beehive_admin_collection.find_one(query)
-        if admin and admin.get("role") == "admin":
-            return True
-    
+    # Check admin based on google_id (for Google sign-in); cached per principal
+    if 'google_id' in session and resolve_role('google', session['google_id']) == 'admin':
+        return True
+
     # Check admin based on email (for regular login)
-    if 'email' in session:
-        email = session['email']
-        # Import the ALLOWED_EMAILS list if not available in this scope
-        from oauth.config import ALLOWED_EMAILS
-        if email in ALLOWED_EMAILS:
-            return True
-        
+    if 'email' in session and resolve_role('email', session['email']) == 'admin':
+        return True
+
     return False
 
 def update_admin_profile_photo(google_id, filename):
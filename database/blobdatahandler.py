@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+from database import databaseConfig
+
+beehive_blob_collection = databaseConfig.get_beehive_blob_collection()
+
+
+# Add references to a blob, creating its record on first use.
+# Returns the record as it was before the increment (None for a new blob).
+def add_blob_reference(digest, path, size, count=1):
+    return beehive_blob_collection.find_one_and_update(
+        {'_id': digest},
+        {
+            '$inc': {'refs': count},
+            '$setOnInsert': {'path': path, 'size': size, 'created_at': datetime.now()}
+        },
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+
+# Drop one reference and return the updated record
+def release_blob_reference(digest):
+    return beehive_blob_collection.find_one_and_update(
+        {'_id': digest, 'refs': {'$gt': 0}},
+        {'$inc': {'refs': -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+# Delete the blob record only if nothing references it any more
+def delete_unreferenced_blob(digest):
+    result = beehive_blob_collection.delete_one({'_id': digest, 'refs': {'$lte': 0}})
+    return result.deleted_count == 1
+
+def get_blob(digest):
+    return beehive_blob_collection.find_one({'_id': digest})
+
+# Remember metadata derived from a blob's content, e.g. voice note waveforms
+def set_blob_metadata(digest, key, value):
+    beehive_blob_collection.update_one({'_id': digest}, {'$set': {key: value}})
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from config import Config
+from database import databaseConfig
+from utils.pagination import after_cursor, encode_cursor
+from utils.pubsub import chat_channel, publish
+
+beehive_message_collection = databaseConfig.get_beehive_message_collection()
+
+# Sorts before every real id, for a cursor that is only a point in time
+NO_MESSAGE_ID = ObjectId('0' * 24)
+
+
+# Save a chat message and return it with its id
+def save_chat_message(from_id, from_role, to_id, to_role, content, timestamp):
+    message = {
+        'from_id': from_id,
+        'from_role': from_role,
+        'to_id': to_id,
+        'to_role': to_role,
+        'content': content,
+        'timestamp': timestamp
+    }
+    message['_id'] = beehive_message_collection.insert_one(message).inserted_id
+    # Conversations are keyed by their non-admin participant
+    user_id = to_id if from_role == 'admin' else from_id
+    publish(chat_channel(user_id), 'chat_message', message)
+    return message
+
+def _conversation(user_id, cursor=None, descending=False):
+    # The cursor bound goes inside each branch so both use their (participant, timestamp, _id) index
+    branches = [
+        {'from_id': user_id, 'to_role': 'admin'},
+        {'to_id': user_id, 'from_role': 'admin'}
+    ]
+    if cursor:
+        for branch in branches:
+            branch.update(after_cursor('timestamp', cursor, descending))
+    return {'$or': branches}
+
+def _cursor(message):
+    return encode_cursor(message['timestamp'], message['_id'])
+
+def _poll_cursor(messages, since):
+    """Where the next poll starts: never past messages that may still be committing.
+
+    Timestamps are taken by the app before the insert, so a message can commit
+    after a newer one has been read. The cursor stops short of the last
+    CHAT_SETTLE_SECONDS; messages in that window are sent again by the next
+    poll and clients drop the ones they already have by `_id`.
+    """
+    cutoff = datetime.now() - timedelta(seconds=Config.CHAT_SETTLE_SECONDS)
+    settled = [m for m in messages if m['timestamp'] <= cutoff]
+    if len(settled) == len(messages):
+        return _cursor(messages[-1]) if messages else since
+    return _cursor(settled[-1]) if settled else encode_cursor(cutoff, NO_MESSAGE_ID)
+
+# Get a page of the conversation between a user and the admins, oldest first
+def get_conversation(user_id, since=None, before=None, limit=None):
+    """Return (messages, since_cursor, before_cursor).
+
+    Without a cursor this is the latest `limit` messages. `since` returns
+    only messages newer than the cursor, `before` the page preceding it.
+    `since_cursor` is what the next poll should send (see `_poll_cursor`);
+    `before_cursor` is None once the start of the conversation is reached.
+    """
+    limit = limit or Config.CHAT_PAGE_SIZE
+    if since:
+        messages = list(beehive_message_collection.find(_conversation(user_id, since))
+                        .sort([('timestamp', 1), ('_id', 1)]).limit(limit))
+        return messages, _poll_cursor(messages, since), None
+
+    messages = list(beehive_message_collection.find(_conversation(user_id, before, descending=True))
+                    .sort([('timestamp', -1), ('_id', -1)]).limit(limit + 1))
+    has_older = len(messages) > limit
+    messages = messages[:limit][::-1]
+    before_cursor = _cursor(messages[0]) if has_older else None
+    if before or not messages:
+        # Older pages don't move the poll position; an empty chat is polled from the start
+        return messages, None, before_cursor
+    return messages, _poll_cursor(messages, None), before_cursor
@@ -1,27 +1,241 @@
-from dotenv import load_dotenv, find_dotenv
+"""MongoDB client factory.
+
+No connection is made at import time. `get_client()` creates the client on
+first use, configured from `Config`, and creates a fresh one in a process
+forked after that (a prefork server's workers, for example), since a
+client's sockets and monitor threads cannot be shared across a fork.
+
+Data handlers keep module-level collection handles; they are proxies that
+resolve against the current process's client on each use.
+"""
 import os
-from pymongo import MongoClient
+import re
+import threading
+
+from dotenv import load_dotenv, find_dotenv
+from pymongo import MongoClient, ReadPreference, WriteConcern
+from pymongo.monitoring import ConnectionPoolListener
+
+from config import Config
 
 load_dotenv(find_dotenv())
 
-connectionString = os.environ.get("MONGODB_CONNECTION_STRING")
+_client = None
+_client_pid = None
+_database = None
+_client_lock = threading.Lock()
+_transactions_supported = None
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool counters for this process's client."""
+
+    FIELDS = ('connections_created', 'connections_closed', 'checked_out', 'checkouts', 'checkout_failures',
+              'pool_clears')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def _add(self, field, amount=1):
+        with self._lock:
+            self.counts[field] += amount
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add('pool_clears')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add('connections_created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add('connections_closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add('checkout_failures')
+
+    def connection_checked_out(self, event):
+        self._add('checkouts')
+        self._add('checked_out')
+
+    def connection_checked_in(self, event):
+        self._add('checked_out', -1)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts['open'] = counts['connections_created'] - counts['connections_closed']
+        counts['max_pool_size'] = Config.MONGO_MAX_POOL_SIZE
+        counts['client_created'] = _client is not None and _client_pid == os.getpid()
+        return counts
+
+
+pool_stats = PoolStats()
+
+
+def _read_preference():
+    # primaryPreferred -> PRIMARY_PREFERRED
+    name = re.sub(r'(?<!^)(?=[A-Z])', '_', Config.MONGO_READ_PREFERENCE).upper()
+    if not hasattr(ReadPreference, name):
+        raise ValueError(f"Unknown MONGO_READ_PREFERENCE: {Config.MONGO_READ_PREFERENCE}")
+    return getattr(ReadPreference, name)
 
-dbclient = MongoClient(connectionString)
+def _write_concern():
+    w = Config.MONGO_WRITE_CONCERN
+    if w is None:
+        return WriteConcern()
+    return WriteConcern(w=int(w) if w.isdigit() else w)
 
-beehive = dbclient.beehive
+# Keyword arguments for MongoClient, from Config
+def client_options():
+    return {
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'socketTimeoutMS': Config.MONGO_SOCKET_TIMEOUT_MS,
+        'appname': Config.MONGO_APP_NAME,
+        'event_listeners': [pool_stats],
+    }
+
+def get_client():
+    """This process's MongoClient, created on first use."""
+    global _client, _client_pid, _database
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                # The parent's client is left alone; closing it here would touch the parent's sockets
+                pool_stats.reset()
+                client = MongoClient(Config.MONGODB_URI, **client_options())
+                _database = client.get_database(Config.DATABASE_NAME, read_preference=_read_preference(),
+                                                write_concern=_write_concern())
+                _client, _client_pid = client, pid
+    return _client
+
+def get_database():
+    get_client()
+    return _database
+
+def close_client():
+    global _client, _client_pid, _database
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid, _database = None, None, None
+
+def _reset_after_fork():
+    global _client, _client_pid, _database, _client_lock
+    _client, _client_pid, _database = None, None, None
+    # The lock may have been held by another thread at the moment of the fork
+    _client_lock = threading.Lock()
+    pool_stats.reset()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class LazyDatabase:
+    """Stands in for the Database until it is used."""
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
+
+class LazyCollection:
+    """Stands in for a Collection until it is used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._database = None
+        self._collection = None
+
+    def __getattr__(self, attr):
+        database = get_database()
+        if database is not self._database:
+            self._collection, self._database = database[self._name], database
+        return getattr(self._collection, attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self._name!r})"
+
+
+beehive = LazyDatabase()
+
+
+# Transactions need a replica set or a sharded cluster; standalone servers reject them
+def supports_transactions():
+    global _transactions_supported
+    if _transactions_supported is None:
+        hello = get_client().admin.command('hello')
+        _transactions_supported = 'setName' in hello or hello.get('msg') == 'isdbgrid'
+    return _transactions_supported
 
 
 def get_beehive_user_collection():
-    return beehive.users
+    return LazyCollection('users')
 
 def get_beehive_image_collection():
-    return beehive.images
+    return LazyCollection('images')
 
 def get_beehive_admin_collection():
-    return beehive.admins
+    return LazyCollection('admins')
 
 def get_beehive_notification_collection():
-    return beehive.notifications
+    return LazyCollection('notifications')
+
+def get_beehive_notification_counter_collection():
+    return LazyCollection('notification_counters')
 
 def get_beehive_message_collection():
-    return beehive.messages
\ No newline at end of file
+    return LazyCollection('messages')
+
+def get_beehive_upload_session_collection():
+    return LazyCollection('upload_sessions')
+
+def get_beehive_job_collection():
+    return LazyCollection('jobs')
+
+def get_beehive_blob_collection():
+    return LazyCollection('blobs')
+
+def get_beehive_event_collection():
+    return LazyCollection('events')
+
+def get_beehive_stats_collection():
+    return LazyCollection('stats')
+
+# Local copy of Clerk users, for filtered and paginated listings
+def get_beehive_user_index_collection():
+    return LazyCollection('clerk_users')
+
+# When the user index was last built and synced, and the last sync error
+def get_beehive_user_index_state_collection():
+    return LazyCollection('clerk_users_state')
+
+# Change counters behind version-keyed ETags
+def get_beehive_version_collection():
+    return LazyCollection('versions')
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from config import Config
+from database import databaseConfig
+
+beehive_job_collection = databaseConfig.get_beehive_job_collection()
+
+
+# Persist a new job so it survives restarts until a worker picks it up
+def enqueue_job(kind, payload, image_id=None, max_attempts=None):
+    now = datetime.now()
+    job = {
+        'kind': kind,
+        'payload': payload,
+        'image_id': image_id,
+        'status': 'queued',
+        'attempts': 0,
+        'max_attempts': max_attempts or Config.JOB_MAX_ATTEMPTS,
+        'run_at': now,
+        'lease_expires_at': None,
+        'worker_id': None,
+        'last_error': None,
+        'result': None,
+        'created_at': now,
+        'updated_at': now
+    }
+    return beehive_job_collection.insert_one(job).inserted_id
+
+# Queue a job unless the same one is already waiting or running; returns the job id either way
+def enqueue_job_once(kind, payload, max_attempts=None):
+    pending = beehive_job_collection.find_one(
+        {'status': {'$in': ['queued', 'running']}, 'kind': kind, 'payload': payload}, {'_id': 1})
+    if pending:
+        return pending['_id']
+    return enqueue_job(kind, payload, max_attempts=max_attempts)
+
+# Atomically claim the next runnable job, including jobs whose worker died mid-run
+def claim_next_job(worker_id):
+    now = datetime.now()
+    return beehive_job_collection.find_one_and_update(
+        {
+            '$or': [
+                {'status': 'queued', 'run_at': {'$lte': now}},
+                {'status': 'running', 'lease_expires_at': {'$lt': now}}
+            ]
+        },
+        {
+            '$set': {
+                'status': 'running',
+                'worker_id': worker_id,
+                'lease_expires_at': now + timedelta(seconds=Config.JOB_LEASE_SECONDS),
+                'updated_at': now
+            },
+            '$inc': {'attempts': 1}
+        },
+        sort=[('run_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+# Record a result; False if the lease was lost and another worker owns the job now
+def complete_job(job, result=None):
+    outcome = beehive_job_collection.update_one(
+        {'_id': job['_id'], 'worker_id': job.get('worker_id'), 'status': 'running'},
+        {'$set': {
+            'status': 'succeeded',
+            'result': result,
+            'lease_expires_at': None,
+            'updated_at': datetime.now()
+        }}
+    )
+    return outcome.matched_count == 1
+
+# Extend the leases of jobs this worker is still running, so they are not claimed again
+def renew_job_leases(worker_id, job_ids):
+    if not job_ids:
+        return
+    now = datetime.now()
+    beehive_job_collection.update_many(
+        {'_id': {'$in': list(job_ids)}, 'worker_id': worker_id, 'status': 'running'},
+        {'$set': {'lease_expires_at': now + timedelta(seconds=Config.JOB_LEASE_SECONDS), 'updated_at': now}}
+    )
+
+# Requeue a failed job with exponential backoff, or mark it failed for good.
+# Returns whether it will be retried, or None if the lease was lost to another worker.
+def fail_job(job, error):
+    now = datetime.now()
+    retry = job['attempts'] < job['max_attempts']
+    update = {
+        'status': 'queued' if retry else 'failed',
+        'last_error': error,
+        'lease_expires_at': None,
+        'updated_at': now
+    }
+    if retry:
+        update['run_at'] = now + timedelta(seconds=Config.JOB_RETRY_DELAY * 2 ** (job['attempts'] - 1))
+    outcome = beehive_job_collection.update_one(
+        {'_id': job['_id'], 'worker_id': job.get('worker_id'), 'status': 'running'}, {'$set': update})
+    return retry if outcome.matched_count == 1 else None
+
+def get_job(job_id):
+    return beehive_job_collection.find_one({'_id': job_id})
+
+def get_jobs_for_image(image_id):
+    return list(beehive_job_collection.find({'image_id': image_id}).sort('created_at', 1))
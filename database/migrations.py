@@ -0,0 +1,269 @@
+"""Versioned schema migrations for the Beehive database.
+
+Each migration has a version number and is recorded in the `migrations`
+collection once applied, so startup only runs the new ones. Index creation
+is idempotent, which keeps a migration safe to re-run if two processes
+start at the same time.
+
+`QUERY_SHAPES` lists the filters and sorts the application issues;
+`unindexed_query_shapes` reports any without a supporting index.
+
+Usage:
+    python -m database.migrations           # apply pending migrations
+    python -m database.migrations --report  # list unindexed query shapes
+    flask migrate-db [--report]
+"""
+import argparse
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from config import Config
+from database import databaseConfig
+
+logger = logging.getLogger(__name__)
+
+_startup_lock = threading.Lock()
+_startup_done = False
+
+# `drop` maps collection names to index names made redundant by this migration;
+# `backfill`, if given, is called with the database once the indexes exist
+Migration = namedtuple('Migration', ['version', 'description', 'indexes', 'drop', 'backfill'],
+                       defaults=({}, None))
+
+# A query as the index sees it: equality fields, then sort, then range fields
+QueryShape = namedtuple('QueryShape', ['collection', 'equality', 'sort', 'range', 'used_by'])
+
+
+def _claim_legacy_notifications(db):
+    """Turn the old per-notification `seen` flags into claims, and drop the per-admin counters."""
+    operations = [
+        UpdateOne({'_id': n['_id']}, {'$set': {'claimed_by': n.get('seen_by') or 'unknown',
+                                               'claimed_at': n.get('seen_at')},
+                                      '$unset': {'seen': '', 'seen_by': '', 'seen_at': ''}})
+        for n in db.notifications.find({'claimed_by': {'$exists': False}, 'seen': True},
+                                       {'seen_by': 1, 'seen_at': 1})
+    ]
+    for start in range(0, len(operations), 1000):
+        db.notifications.bulk_write(operations[start:start + 1000], ordered=False)
+    db.notifications.update_many({'claimed_by': {'$exists': False}},
+                                 {'$set': {'claimed_by': None}, '$unset': {'seen': '', 'seen_by': '', 'seen_at': ''}})
+    # Rebuilt from the claims on first read
+    db.notification_counters.delete_many({})
+
+
+MIGRATIONS = [
+    Migration(1, 'Indexes for existing queries', {
+        'images': [
+            IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)], name='user_created'),
+            IndexModel([('created_at', DESCENDING)], name='created'),
+            IndexModel([('audio_blob_hash', ASCENDING)], name='audio_blob_hash'),
+            IndexModel([('audio_filename', ASCENDING)], name='audio_filename'),
+        ],
+        'notifications': [
+            IndexModel([('seen', ASCENDING), ('timestamp', DESCENDING)], name='seen_timestamp'),
+        ],
+        'messages': [
+            # One index per branch of the conversation $or
+            IndexModel([('from_id', ASCENDING), ('to_role', ASCENDING), ('timestamp', ASCENDING)],
+                       name='from_to_role_timestamp'),
+            IndexModel([('to_id', ASCENDING), ('from_role', ASCENDING), ('timestamp', ASCENDING)],
+                       name='to_from_role_timestamp'),
+        ],
+        'users': [
+            IndexModel([('username', ASCENDING)], name='username'),
+            IndexModel([('google_id', ASCENDING)], name='google_id'),
+        ],
+        'admins': [
+            IndexModel([('google_id', ASCENDING)], name='google_id'),
+        ],
+        'upload_sessions': [
+            # Retried inits race on this; only sessions that have a key take part
+            IndexModel([('user_id', ASCENDING), ('idempotency_key', ASCENDING)], name='user_idempotency_key',
+                       unique=True, partialFilterExpression={'idempotency_key': {'$type': 'string'}}),
+            IndexModel([('expires_at', ASCENDING)], name='expires'),
+        ],
+        'jobs': [
+            IndexModel([('status', ASCENDING), ('run_at', ASCENDING)], name='status_run_at'),
+            IndexModel([('status', ASCENDING), ('lease_expires_at', ASCENDING)], name='status_lease'),
+            IndexModel([('image_id', ASCENDING), ('created_at', ASCENDING)], name='image_created'),
+        ],
+    }),
+    Migration(2, 'Keyset pagination of a user\'s images', {
+        'images': [
+            IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                       name='user_created_id'),
+        ],
+    }, drop={'images': ['user_created']}),
+    Migration(3, 'Cursor paging of chat conversations', {
+        'messages': [
+            IndexModel([('from_id', ASCENDING), ('to_role', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)],
+                       name='from_to_role_timestamp_id'),
+            IndexModel([('to_id', ASCENDING), ('from_role', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)],
+                       name='to_from_role_timestamp_id'),
+        ],
+    }, drop={'messages': ['from_to_role_timestamp', 'to_from_role_timestamp']}),
+    Migration(4, 'Expire pushed events', {
+        'events': [
+            IndexModel([('created_at', ASCENDING)], name='created_ttl',
+                       expireAfterSeconds=Config.EVENTS_RETENTION_HOURS * 3600),
+        ],
+    }),
+    Migration(5, 'Notification history paging', {
+        'notifications': [
+            IndexModel([('timestamp', DESCENDING), ('_id', DESCENDING)], name='timestamp_id'),
+        ],
+    }, drop={'notifications': ['seen_timestamp']}),
+    Migration(6, 'Dashboard counters', {
+        'stats': [
+            IndexModel([('granularity', ASCENDING), ('dimension', ASCENDING), ('key', ASCENDING)],
+                       name='granularity_dimension_key'),
+        ],
+    }, drop={'images': ['audio_filename']}),
+    Migration(7, 'Local Clerk user index', {
+        'clerk_users': [
+            IndexModel([('role', ASCENDING), ('name_lower', ASCENDING), ('_id', ASCENDING)], name='role_name_id'),
+            IndexModel([('role', ASCENDING), ('last_active', DESCENDING), ('_id', DESCENDING)],
+                       name='role_last_active_id'),
+            IndexModel([('terms', ASCENDING)], name='terms'),
+            IndexModel([('updated_at', DESCENDING)], name='updated_at'),
+        ],
+    }),
+    Migration(8, 'Claim notifications per document', {
+        'notifications': [
+            IndexModel([('claimed_by', ASCENDING), ('_id', ASCENDING)], name='claimed_by_id'),
+        ],
+    }, backfill=_claim_legacy_notifications),
+]
+
+QUERY_SHAPES = [
+    QueryShape('images', ['user_id'], [('created_at', DESCENDING), ('_id', DESCENDING)], [], 'get_images_by_user'),
+    QueryShape('images', [], [('created_at', DESCENDING)], [], 'get_recent_uploads'),
+    QueryShape('images', ['audio_blob_hash'], [], [], 'set_voice_note_metadata'),
+    QueryShape('stats', ['granularity', 'dimension'], [], [], 'get_sentiment_totals'),
+    QueryShape('notifications', ['claimed_by'], [('_id', ASCENDING)], [], 'claim_notifications'),
+    QueryShape('notifications', [], [('timestamp', DESCENDING), ('_id', DESCENDING)], ['timestamp'],
+               'get_notification_history'),
+    QueryShape('messages', ['from_id', 'to_role'], [('timestamp', ASCENDING), ('_id', ASCENDING)], ['timestamp'],
+               'get_conversation (sent)'),
+    QueryShape('messages', ['to_id', 'from_role'], [('timestamp', ASCENDING), ('_id', ASCENDING)], ['timestamp'],
+               'get_conversation (received)'),
+    QueryShape('users', ['username'], [], [], 'get_user_by_username'),
+    QueryShape('admins', ['google_id'], [], [], 'is_admin, get_admin_by_google_id'),
+    QueryShape('upload_sessions', ['user_id', 'idempotency_key'], [], [], 'get_upload_session_by_key'),
+    QueryShape('upload_sessions', [], [], ['expires_at'], 'purge_expired_upload_sessions'),
+    QueryShape('jobs', ['status'], [('run_at', ASCENDING)], ['run_at'], 'claim_next_job (queued)'),
+    QueryShape('jobs', ['status'], [], ['lease_expires_at'], 'claim_next_job (expired lease)'),
+    QueryShape('jobs', ['status'], [], [], 'enqueue_job_once'),
+    QueryShape('jobs', ['image_id'], [('created_at', ASCENDING)], [], 'get_jobs_for_image'),
+    QueryShape('events', [], [('_id', ASCENDING)], ['_id'], 'MongoEventBus tail and replay'),
+    QueryShape('clerk_users', ['role'], [('name_lower', ASCENDING), ('_id', ASCENDING)], ['name_lower'],
+               'search_users (by name)'),
+    QueryShape('clerk_users', ['role'], [('last_active', DESCENDING), ('_id', DESCENDING)], ['last_active'],
+               'search_users (by last active)'),
+    QueryShape('clerk_users', [], [('updated_at', DESCENDING)], [], 'sync_users'),
+]
+
+
+def applied_versions(db):
+    return {m['_id'] for m in db.migrations.find({}, {'_id': 1})}
+
+# Apply every migration newer than the database, oldest first
+def run_migrations(db=None):
+    """Apply pending migrations and return the versions that were applied."""
+    db = db if db is not None else databaseConfig.beehive
+    done = applied_versions(db)
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        for collection, indexes in migration.indexes.items():
+            db[collection].create_indexes(indexes)
+        for collection, names in migration.drop.items():
+            existing = db[collection].index_information()
+            for name in names:
+                if name in existing:
+                    db[collection].drop_index(name)
+        if migration.backfill:
+            migration.backfill(db)
+        db.migrations.update_one(
+            {'_id': migration.version},
+            {'$set': {'description': migration.description, 'applied_at': datetime.now()}},
+            upsert=True
+        )
+        logger.info(f"Applied migration {migration.version}: {migration.description}")
+        applied.append(migration.version)
+    return applied
+
+# Run once per process before the first request is served
+def migrate_on_startup():
+    global _startup_done
+    if _startup_done or not Config.RUN_MIGRATIONS_ON_STARTUP:
+        return
+    with _startup_lock:
+        if _startup_done:
+            return
+        # Only attempted once; a database that is down should not stall every request
+        _startup_done = True
+        try:
+            run_migrations()
+            for shape in unindexed_query_shapes():
+                logger.warning(f"Unindexed query shape: {describe(shape)}")
+        except Exception as e:
+            logger.error(f"Database migration failed: {str(e)}")
+
+def _supports(index_fields, shape):
+    """Whether an index's key fields can serve `shape` (equality, sort, range order)."""
+    equality = set(shape.equality)
+    if set(index_fields[:len(equality)]) != equality:
+        return False
+    rest = index_fields[len(equality):]
+    sort_fields = [field for field, _ in shape.sort]
+    if rest[:len(sort_fields)] != sort_fields:
+        return False
+    rest = rest[len(sort_fields):]
+    # A range on the sort field is already bounded by the sort; any other needs the next key
+    range_fields = [field for field in shape.range if field not in sort_fields]
+    return not range_fields or (bool(rest) and rest[0] in range_fields)
+
+def unindexed_query_shapes(db=None):
+    """Return the entries of QUERY_SHAPES that no existing index supports."""
+    db = db if db is not None else databaseConfig.beehive
+    indexes = {}
+    missing = []
+    for shape in QUERY_SHAPES:
+        if shape.collection not in indexes:
+            indexes[shape.collection] = [
+                [field for field, _ in info['key']]
+                for info in db[shape.collection].index_information().values()
+            ]
+        if not any(_supports(fields, shape) for fields in indexes[shape.collection]):
+            missing.append(shape)
+    return missing
+
+def describe(shape):
+    parts = [f"{field}=" for field in shape.equality]
+    parts += [f"sort {field}" for field, _ in shape.sort]
+    parts += [f"{field} range" for field in shape.range]
+    return f"{shape.collection} ({', '.join(parts)}) used by {shape.used_by}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply Beehive database migrations.')
+    parser.add_argument('--report', action='store_true', help='only list query shapes without an index')
+    args = parser.parse_args(argv)
+
+    if not args.report:
+        applied = run_migrations()
+        print(f"Applied migrations: {applied}" if applied else 'Database is up to date.')
+    missing = unindexed_query_shapes()
+    for shape in missing:
+        print(f"Unindexed: {describe(shape)}")
+    return 1 if args.report and missing else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config import Config
+from database import databaseConfig
+from utils.pagination import after_cursor, paginate
+from utils.pubsub import ADMIN_CHANNEL, publish
+
+beehive_notification_collection = databaseConfig.get_beehive_notification_collection()
+beehive_notification_counter_collection = databaseConfig.get_beehive_notification_counter_collection()
+
+# The one counter document: notifications no admin has claimed yet
+UNCLAIMED = 'unclaimed'
+
+
+# Count newly inserted notifications and push them to connected admins
+def notifications_saved(notifications):
+    if not notifications:
+        return
+    # No upsert: until the counter exists it is rebuilt from the claims on first read
+    beehive_notification_counter_collection.update_one({'_id': UNCLAIMED}, {'$inc': {'unread': len(notifications)}})
+    for notification in notifications:
+        publish(ADMIN_CHANNEL, 'notification', notification)
+
+def _get_counter():
+    counter = beehive_notification_counter_collection.find_one({'_id': UNCLAIMED})
+    if counter:
+        return counter
+    unread = beehive_notification_collection.count_documents({'claimed_by': None})
+    return beehive_notification_counter_collection.find_one_and_update(
+        {'_id': UNCLAIMED},
+        {'$setOnInsert': {'unread': unread}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+# Badge count shared by all admins; one document read once the counter exists
+def get_unread_count():
+    return max(0, _get_counter()['unread'])
+
+# Claim the oldest unclaimed notifications for an admin, at most `limit` at a time
+def claim_notifications(admin_id, limit=None):
+    """Mark up to `limit` notifications claimed by `admin_id` and return them, newest first.
+
+    Each notification is claimed by its own `claimed_by: None` condition, so two
+    admins (or two tabs) never both claim it, and one committed late is still
+    found because nothing relies on the order of ids.
+    """
+    limit = limit or Config.NOTIFICATION_CLAIM_BATCH
+    _get_counter()
+    token = ObjectId()
+    now = datetime.now()
+    claimed = 0
+    candidates = []
+    while claimed < limit:
+        ids = [n['_id'] for n in beehive_notification_collection.find({'claimed_by': None}, {'_id': 1})
+               .sort('_id', 1).limit(limit - claimed)]
+        if not ids:
+            break
+        candidates.extend(ids)
+        # Whatever another admin claimed in between keeps its claim; the next pass looks further
+        claimed += beehive_notification_collection.update_many(
+            {'_id': {'$in': ids}, 'claimed_by': None},
+            {'$set': {'claimed_by': admin_id, 'claimed_at': now, 'claim_token': token}}
+        ).modified_count
+    if not claimed:
+        return []
+    beehive_notification_counter_collection.update_one({'_id': UNCLAIMED}, {'$inc': {'unread': -claimed}})
+    # Read back by id; the token tells which of the candidates this call won
+    return list(beehive_notification_collection.find({'_id': {'$in': candidates}, 'claim_token': token},
+                                                     {'claim_token': 0}).sort('_id', -1))
+
+# Page through all notifications, newest first
+def get_notification_history(limit=None, cursor=None):
+    """Return (notifications, next_cursor)."""
+    limit = limit or Config.NOTIFICATION_PAGE_SIZE
+    query = after_cursor('timestamp', cursor) if cursor else {}
+    notifications = beehive_notification_collection.find(query, {'claim_token': 0}) \
+        .sort([('timestamp', -1), ('_id', -1)]).limit(limit + 1)
+    return paginate(notifications, 'timestamp', limit)
+
+# Every notification, newest first, read from the cursor as it is consumed
+def iter_notification_history():
+    return beehive_notification_collection.find({}, {'claim_token': 0}) \
+        .sort([('timestamp', -1), ('_id', -1)]).batch_size(Config.STREAM_BATCH_SIZE)
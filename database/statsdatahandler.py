@@ -0,0 +1,187 @@
+"""Upload counters for the admin dashboard.
+
+Every image save, edit and delete adjusts a small set of counter documents
+in the `stats` collection instead of the dashboard counting `images`:
+
+- totals overall, per user and per sentiment;
+- daily buckets overall, per user and per sentiment;
+- hourly buckets overall, for the last-24-hours figure.
+
+Counter updates are best effort. `rebuild_stats` recomputes everything from
+`images` and is run as the `stats_reconcile` background job.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config import Config
+from database import databaseConfig
+
+logger = logging.getLogger(__name__)
+
+beehive_stats_collection = databaseConfig.get_beehive_stats_collection()
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _sentiment_key(sentiment):
+    return (sentiment or '').strip().lower()[:64] or 'none'
+
+def stat_id(granularity, dimension, key=None, period=None):
+    return f"{granularity}:{dimension}:{key or ''}:{period.isoformat() if period else ''}"
+
+def _buckets(image):
+    """(granularity, dimension, key, period) of every counter an image contributes to."""
+    user_id = image.get('user_id')
+    sentiment = _sentiment_key(image.get('sentiment'))
+    buckets = [('total', 'all', None, None), ('total', 'user', user_id, None), ('total', 'sentiment', sentiment, None)]
+    created_at = image.get('created_at')
+    # Legacy documents may not have a datetime; they still count towards totals
+    if isinstance(created_at, datetime):
+        hour = created_at.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        buckets += [('hour', 'all', None, hour), ('day', 'all', None, day),
+                    ('day', 'user', user_id, day), ('day', 'sentiment', sentiment, day)]
+    return buckets
+
+def _add(increments, image, sign):
+    voice_note = 1 if image.get('audio_filename') else 0
+    for bucket in _buckets(image):
+        increments[bucket]['images'] += sign
+        increments[bucket]['voice_notes'] += sign * voice_note
+
+def _apply(increments):
+    operations = []
+    for (granularity, dimension, key, period), counts in increments.items():
+        counts = {field: value for field, value in counts.items() if value}
+        if not counts:
+            continue
+        operations.append(UpdateOne(
+            {'_id': stat_id(granularity, dimension, key, period)},
+            {'$inc': counts, '$setOnInsert': {'granularity': granularity, 'dimension': dimension,
+                                              'key': key, 'period': period}},
+            upsert=True
+        ))
+    if operations:
+        beehive_stats_collection.bulk_write(operations, ordered=False)
+
+# Count saved (sign=1) or deleted (sign=-1) images, all in one bulk write
+def record_images(images, sign=1):
+    increments = defaultdict(Counter)
+    for image in images:
+        _add(increments, image, sign)
+    try:
+        _apply(increments)
+    except Exception as e:
+        # The reconcile job repairs any drift; never fail the write that triggered this
+        logger.error(f"Stats update error: {str(e)}")
+
+# Move an edited image between sentiment buckets
+def record_image_change(before, after):
+    if _sentiment_key(before.get('sentiment')) == _sentiment_key(after.get('sentiment')):
+        return
+    increments = defaultdict(Counter)
+    _add(increments, before, -1)
+    _add(increments, after, 1)
+    try:
+        _apply(increments)
+    except Exception as e:
+        logger.error(f"Stats update error: {str(e)}")
+
+# Recompute every counter from the images collection
+def rebuild_stats(image_collection=None):
+    """Rebuild all counters and return how many counter documents were written.
+
+    Counter documents are overwritten, and ones that no longer apply are
+    removed. Uploads made while the rebuild runs may be off by their own
+    count until the next rebuild.
+    """
+    image_collection = image_collection if image_collection is not None \
+        else databaseConfig.get_beehive_image_collection()
+    increments = defaultdict(Counter)
+    projection = {'user_id': 1, 'sentiment': 1, 'created_at': 1, 'audio_filename': 1}
+    for image in image_collection.find({}, projection).batch_size(1000):
+        _add(increments, image, 1)
+
+    generation = ObjectId()
+    operations = [
+        UpdateOne(
+            {'_id': stat_id(granularity, dimension, key, period)},
+            {'$set': {'granularity': granularity, 'dimension': dimension, 'key': key, 'period': period,
+                      'images': counts['images'], 'voice_notes': counts['voice_notes'], 'generation': generation}},
+            upsert=True
+        )
+        for (granularity, dimension, key, period), counts in increments.items()
+    ]
+    for start in range(0, len(operations), 1000):
+        beehive_stats_collection.bulk_write(operations[start:start + 1000], ordered=False)
+    beehive_stats_collection.delete_many({'generation': {'$ne': generation}})
+    clear_stats_cache()
+    return len(operations)
+
+def _cached(key, load):
+    """Memoize `load()` for Config.STATS_CACHE_SECONDS within this process."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+    value = load()
+    with _cache_lock:
+        _cache[key] = (now + Config.STATS_CACHE_SECONDS, value)
+    return value
+
+def clear_stats_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def _load_dashboard_stats():
+    total = beehive_stats_collection.find_one({'_id': stat_id('total', 'all')}) or {}
+    current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+    hours = [stat_id('hour', 'all', None, current_hour - timedelta(hours=i)) for i in range(24)]
+    last_24_hours = sum(doc.get('images', 0) for doc in beehive_stats_collection.find({'_id': {'$in': hours}}))
+    images = total.get('images', 0)
+    voice_notes = total.get('voice_notes', 0)
+    return {
+        'totalImages': images,
+        'totalVoiceNotes': voice_notes,
+        'totalMedia': images + voice_notes,
+        'uploadsLast24Hours': last_24_hours
+    }
+
+# Dashboard totals; a handful of document reads, cached briefly
+def get_dashboard_stats():
+    return _cached('dashboard', _load_dashboard_stats)
+
+# Daily upload counts for the last `days` days, oldest first, with empty days filled in
+def get_daily_stats(days, dimension='all', key=None):
+    if dimension == 'sentiment':
+        key = _sentiment_key(key)
+
+    def load():
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        periods = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+        documents = beehive_stats_collection.find({'_id': {'$in': [stat_id('day', dimension, key, p) for p in periods]}})
+        by_period = {doc['period']: doc for doc in documents}
+        return [{
+            'date': period.date().isoformat(),
+            'images': by_period.get(period, {}).get('images', 0),
+            'voice_notes': by_period.get(period, {}).get('voice_notes', 0)
+        } for period in periods]
+
+    return _cached(f"daily:{days}:{dimension}:{key}", load)
+
+# Upload totals per sentiment, largest first
+def get_sentiment_totals():
+    def load():
+        documents = beehive_stats_collection.find({'granularity': 'total', 'dimension': 'sentiment', 'images': {'$gt': 0}})
+        return sorted(({'sentiment': doc['key'], 'images': doc['images']} for doc in documents),
+                      key=lambda row: row['images'], reverse=True)
+
+    return _cached('sentiments', load)
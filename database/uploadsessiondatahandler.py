@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+from database import databaseConfig
+
+beehive_upload_session_collection = databaseConfig.get_beehive_upload_session_collection()
+
+
+# Create a resumable upload session, or return the existing one for a retried init
+def create_upload_session(user_id, username, filename, size, chunk_size, title,
+                          description, sentiment=None, sha256=None, idempotency_key=None):
+    """Insert a new upload session. Returns (session, created)."""
+    if idempotency_key:
+        existing = get_upload_session_by_key(user_id, idempotency_key)
+        if existing:
+            return existing, False
+
+    now = datetime.now()
+    upload_session = {
+        'user_id': user_id,
+        'username': username,
+        'idempotency_key': idempotency_key,
+        'filename': filename,
+        'size': size,
+        'chunk_size': chunk_size,
+        'total_chunks': max(1, -(-size // chunk_size)),
+        'sha256': sha256,
+        'title': title,
+        'description': description,
+        'sentiment': sentiment,
+        'received': {},
+        'status': 'uploading',
+        'created_at': now,
+        'expires_at': now + timedelta(hours=Config.UPLOAD_SESSION_TTL_HOURS),
+        'result': None
+    }
+    try:
+        upload_session['_id'] = beehive_upload_session_collection.insert_one(upload_session).inserted_id
+    except DuplicateKeyError:
+        # A concurrent init with the same idempotency key won the race
+        return get_upload_session_by_key(user_id, idempotency_key), False
+    return upload_session, True
+
+def get_upload_session(upload_id, user_id):
+    return beehive_upload_session_collection.find_one({'_id': upload_id, 'user_id': user_id})
+
+def get_upload_session_by_key(user_id, idempotency_key):
+    return beehive_upload_session_collection.find_one({
+        'user_id': user_id,
+        'idempotency_key': idempotency_key
+    })
+
+# Record a received chunk together with its digest
+def mark_chunk_received(upload_id, index, digest):
+    result = beehive_upload_session_collection.update_one(
+        {'_id': upload_id, 'status': 'uploading'},
+        {'$set': {f'received.{index}': digest}}
+    )
+    return result.matched_count == 1
+
+# Atomically move a session from uploading to finalizing so only one finalize runs
+def claim_upload_session_for_finalize(upload_id):
+    return beehive_upload_session_collection.find_one_and_update(
+        {'_id': upload_id, 'status': 'uploading'},
+        {'$set': {'status': 'finalizing'}},
+        return_document=ReturnDocument.AFTER
+    )
+
+def complete_upload_session(upload_id, result):
+    beehive_upload_session_collection.update_one(
+        {'_id': upload_id},
+        {'$set': {'status': 'complete', 'result': result}}
+    )
+
+# Put a session back into the uploading state after a failed finalize
+def release_upload_session(upload_id):
+    beehive_upload_session_collection.update_one(
+        {'_id': upload_id, 'status': 'finalizing'},
+        {'$set': {'status': 'uploading'}}
+    )
+
+# After a checksum mismatch, accept every chunk again; the part file is cleared alongside
+def reset_upload_session(upload_id):
+    beehive_upload_session_collection.update_one(
+        {'_id': upload_id, 'status': 'finalizing'},
+        {'$set': {'status': 'uploading', 'received': {}}}
+    )
+
+# Remove expired sessions and return their ids so the part files can be discarded
+def purge_expired_upload_sessions():
+    query = {'expires_at': {'$lt': datetime.now()}, 'status': {'$ne': 'complete'}}
+    expired_ids = [s['_id'] for s in beehive_upload_session_collection.find(query, {'_id': 1})]
+    if expired_ids:
+        beehive_upload_session_collection.delete_many({'_id': {'$in': expired_ids}})
+    return expired_ids
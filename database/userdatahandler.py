@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta
 # import re
 # import bcrypt
+from bson import ObjectId
 from flask import session
+from config import Config
 from database import databaseConfig
-import requests
-import os
+from database.notificationdatahandler import notifications_saved
+from database.statsdatahandler import get_dashboard_stats, record_image_change, record_images
+from database.versiondatahandler import IMAGES, bump_versions
+from utils.pagination import after_cursor, paginate
+from utils.user_directory import UserDirectoryError, get_users
 
+beehive_user_collection = databaseConfig.get_beehive_user_collection()
 beehive_image_collection = databaseConfig.get_beehive_image_collection()
 beehive_notification_collection = databaseConfig.get_beehive_notification_collection()
 
@@ -18,30 +24,56 @@ def get_user_by_username(username: str):
     return user
 
     
-# Save image to MongoDB  
-def save_image(id, filename, title, description, time_created,audio_filename=None,sentiment=None):
-    image = {
+# Build an image document without writing it
+def build_image(id, filename, title, description, time_created,audio_filename=None,sentiment=None,status='ready',
+                blob_hash=None, original_filename=None, audio_blob_hash=None):
+    return {
         'user_id': id,
         'filename': filename,
+        'original_filename': original_filename or filename,
+        'blob_hash': blob_hash,
         'title': title,
         'description': description,
         'created_at': time_created,
         'audio_filename': audio_filename,
-        'sentiment': sentiment
+        'audio_blob_hash': audio_blob_hash,
+        'sentiment': sentiment,
+        'status': status
     }
-    beehive_image_collection.insert_one(image)
+
+# Save image to MongoDB  
+def save_image(id, filename, title, description, time_created,audio_filename=None,sentiment=None,status='ready',
+               blob_hash=None, original_filename=None, audio_blob_hash=None):
+    image = build_image(id, filename, title, description, time_created, audio_filename, sentiment, status,
+                        blob_hash, original_filename, audio_blob_hash)
+    image_id = beehive_image_collection.insert_one(image).inserted_id
+    record_images([image])
+    bump_versions(IMAGES)
+    return image_id
+
+# Copy voice note metadata onto every image that uses the voice note
+def set_voice_note_metadata(audio_blob_hash, fields):
+    beehive_image_collection.update_many(
+        {'audio_blob_hash': audio_blob_hash},
+        {'$set': fields}
+    )
+    bump_versions(IMAGES)
+
+# Update the processing status of an image, e.g. once its thumbnail is ready
+def set_image_status(image_id, status, **fields):
+    beehive_image_collection.update_one(
+        {'_id': image_id},
+        {'$set': {'status': status, **fields}}
+    )
+    bump_versions(IMAGES)
 
 # Count all images from MongoDB
 def total_images():
-    return beehive_image_collection.count_documents({})
+    return get_dashboard_stats()['totalImages']
 
-# Count all images from MongoDB uploaded today
+# Count all images from MongoDB uploaded in the last 24 hours
 def todays_images():
-    last_24_hours = datetime.now() - timedelta(hours=24)
-    recent_images_count = beehive_image_collection.count_documents({
-    "created_at": {"$gte": last_24_hours}
-    })
-    return recent_images_count
+    return get_dashboard_stats()['uploadsLast24Hours']
 
 def getallusers():
     users = beehive_user_collection.find()
@@ -59,18 +91,45 @@ def get_currentuser_from_session():
     user = beehive_user_collection.find_one({'_id': user_id})
     return user
 
-# Get all images from MongoDB
-def get_images_by_user(user_id):
-    images = beehive_image_collection.find({'user_id': user_id})
-    return [{
-        'id': str(image['_id']), 
+# Fields the upload list views show
+IMAGE_LIST_PROJECTION = {
+    'filename': 1, 'original_filename': 1, 'title': 1, 'description': 1, 'audio_filename': 1,
+    'sentiment': 1, 'status': 1, 'audio_status': 1, 'audio_duration': 1, 'audio_peaks': 1, 'created_at': 1
+}
+
+def _serialize_image(image):
+    return {
+        'id': image['_id'],
         'filename': image['filename'], 
+        'original_filename': image.get('original_filename', image['filename']),
         'title': image['title'], 
         'description': image['description'], 
         'audio_filename': image.get('audio_filename', ""), 
         'sentiment': image.get('sentiment', ""),
+        'status': image.get('status', 'ready'),
+        'audio_status': image.get('audio_status'),
+        'audio_duration': image.get('audio_duration'),
+        'audio_peaks': image.get('audio_peaks', []),
         'created_at': image['created_at']['$date'] if isinstance(image.get('created_at'), dict) else image.get('created_at')
-    } for image in images]
+    }
+
+# Get a page of a user's images from MongoDB, newest first
+def get_images_by_user(user_id, limit=None, cursor=None):
+    """Return (images, next_cursor). `cursor` is the `next_cursor` of the previous page."""
+    limit = limit or Config.UPLOAD_PAGE_SIZE
+    query = {'user_id': user_id}
+    if cursor:
+        query.update(after_cursor('created_at', cursor))
+    images = beehive_image_collection.find(query, IMAGE_LIST_PROJECTION) \
+        .sort([('created_at', -1), ('_id', -1)]).limit(limit + 1)
+    images, next_cursor = paginate(images, 'created_at', limit)
+    return [_serialize_image(image) for image in images], next_cursor
+
+# Every image of a user, newest first, read from the cursor as it is consumed
+def iter_images_by_user(user_id):
+    images = beehive_image_collection.find({'user_id': user_id}, IMAGE_LIST_PROJECTION) \
+        .sort([('created_at', -1), ('_id', -1)]).batch_size(Config.STREAM_BATCH_SIZE)
+    return (_serialize_image(image) for image in images)
 
 # Get images by sentiments list from MongoDB ( Route to be used with the dreams prototype for analysis page)
 # def get_images_by_sentiments(username, sentiment_list, match_all):
@@ -106,14 +165,20 @@ def update_image(image_id, title, description, sentiment=None):
     if sentiment is not None:
         update_data['sentiment'] = sentiment
         
-    beehive_image_collection.update_one(
+    before = beehive_image_collection.find_one_and_update(
         {'_id': image_id}, 
         {'$set': update_data}
     )
+    if before and sentiment is not None:
+        record_image_change(before, {**before, **update_data})
+    bump_versions(IMAGES)
 
 # Delete image from MongoDB
 def delete_image(image_id):
-    beehive_image_collection.delete_one({'_id': image_id})
+    image = beehive_image_collection.find_one_and_delete({'_id': image_id})
+    if image:
+        record_images([image], sign=-1)
+        bump_versions(IMAGES)
 
 # Get image by ID from MongoDB
 def get_image_by_id(image_id):
@@ -122,27 +187,16 @@ def get_image_by_id(image_id):
 
 # Get upload statistics for admin dashboard
 def get_upload_stats():
-    """Get statistics for admin dashboard including total users, images, and voice notes."""
+    """Get statistics for admin dashboard including total images and voice notes."""
     try:
-        # Count total images
-        total_images = beehive_image_collection.count_documents({})
-        
-        # Count voice notes (images with audio_filename)
-        total_voice_notes = beehive_image_collection.count_documents({
-            "audio_filename": {"$exists": True, "$ne": None}
-        })
-        
-        return {
-            'totalImages': total_images,
-            'totalVoiceNotes': total_voice_notes,
-            'totalMedia': total_images + total_voice_notes
-        }
+        return get_dashboard_stats()
     except Exception as e:
         print(f"Error getting upload stats: {str(e)}")
         return {
             'totalImages': 0,
             'totalVoiceNotes': 0,
-            'totalMedia': 0
+            'totalMedia': 0,
+            'uploadsLast24Hours': 0
         }
 
 # Get recent uploads for admin dashboard
@@ -154,19 +208,12 @@ def get_recent_uploads(limit=10):
         if not recent_uploads:
             return []
         
-        user_ids = list({str(upload.get('user_id')) for upload in recent_uploads if upload.get('user_id')})
-
-        clerk_api_key = os.getenv('CLERK_SECRET_KEY')
-        headers = {'Authorization': f'Bearer {clerk_api_key}'}
-
-        response = requests.get(
-            'http://127.0.0.1:5000/api/admin/users',
-            headers=headers,
-            params={'query': ','.join(user_ids), 'limit': len(user_ids)}
-        )
-        users_data = response.json().get('users', []) if response.ok else []
-        # map of user_id to user info
-        user_map = {user['id']: user for user in users_data}
+        # map of user_id to user info, fetched in one batch
+        try:
+            user_map = get_users(upload.get('user_id') for upload in recent_uploads)
+        except UserDirectoryError as e:
+            print(f"Error getting upload users: {str(e)}")
+            user_map = {}
 
         # uploads list with user info
         uploads_list = []
@@ -175,7 +222,7 @@ def get_recent_uploads(limit=10):
             user = user_map.get(user_id)
             user_name = user['name'] if user else 'Unknown User'
             uploads_list.append({
-                'id': str(upload['_id']),
+                'id': upload['_id'],
                 'title': upload.get('title', ''),
                 'user': user_name,
                 'user_id': user_id,
@@ -190,18 +237,61 @@ def get_recent_uploads(limit=10):
         print(f"Error getting recent uploads: {str(e)}")
         return []
 
+# Build an admin notification document without writing it
+def build_notification(user_id, username, filename, title, time_created, sentiment):
+    return {
+        "type": "image_upload",
+        "user_id": user_id,
+        "username": username,
+        "image_filename": filename,
+        "title": title,
+        "timestamp": time_created,
+        "claimed_by": None
+    }
+
 def save_notification(user_id, username, filename, title, time_created,sentiment):
-            # Insert notification for admin
-                notification = {
-                    "type": "image_upload",
-                    "user_id": user_id,
-                    "username": username,
-                    "image_filename": filename,
-                    "title": title,
-                    "timestamp": time_created,
-                    "seen": False
-                }
-                beehive_notification_collection.insert_one(notification)    
+    # Insert notification for admin
+    notification = build_notification(user_id, username, filename, title, time_created, sentiment)
+    beehive_notification_collection.insert_one(notification)
+    notifications_saved([notification])
+
+# Save a whole upload's images and notifications in one go
+def save_upload_batch(images, notifications):
+    """Insert image and notification documents with one insert_many each.
+
+    Runs inside a transaction when the deployment supports one. Otherwise
+    every document the batch may have written is removed again on failure,
+    so a failed batch leaves nothing behind either way. Returns the image
+    ids in order.
+    """
+    # Ids are assigned up front so a partial insert can be undone by id
+    for document in images + notifications:
+        document.setdefault('_id', ObjectId())
+    image_ids = [image['_id'] for image in images]
+
+    if databaseConfig.supports_transactions():
+        def insert_all(mongo_session):
+            beehive_image_collection.insert_many(images, session=mongo_session)
+            if notifications:
+                beehive_notification_collection.insert_many(notifications, session=mongo_session)
+
+        # with_transaction retries transient errors and unknown commit results
+        with databaseConfig.get_client().start_session() as mongo_session:
+            mongo_session.with_transaction(insert_all)
+    else:
+        try:
+            beehive_image_collection.insert_many(images)
+            if notifications:
+                beehive_notification_collection.insert_many(notifications)
+        except Exception:
+            beehive_image_collection.delete_many({'_id': {'$in': image_ids}})
+            if notifications:
+                beehive_notification_collection.delete_many({'_id': {'$in': [n['_id'] for n in notifications]}})
+            raise
+    record_images(images)
+    bump_versions(IMAGES)
+    notifications_saved(notifications)
+    return image_ids
 
 def get_all_users():
     users = beehive_user_collection.find({}, {'_id': 1, 'username': 1})
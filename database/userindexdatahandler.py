@@ -0,0 +1,185 @@
+"""Local index of Clerk users.
+
+Clerk can only filter users by what its list endpoint supports, so role
+filtering used to happen after each page was fetched. `clerk_users` keeps
+a copy of every user with role, name and email indexed, and listings are
+one aggregation returning the page and the total together.
+
+The index is kept current by `sync_users` (incremental by Clerk's
+`updated_at`, or full, which also removes deleted users) and by the Clerk
+webhook, which applies single changes as they happen. Each sync records its
+outcome in `clerk_users_state`, so an index that is empty because Clerk has
+no users is told apart from one that was never built.
+"""
+import re
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config import Config
+from database import databaseConfig
+from utils.pagination import after_cursor, encode_cursor
+from utils.user_directory import fetch_clerk_users, serialize_user
+
+beehive_user_index_collection = databaseConfig.get_beehive_user_index_collection()
+beehive_user_index_state_collection = databaseConfig.get_beehive_user_index_state_collection()
+
+# The one state document
+SYNC_STATE = 'sync'
+
+# Clerk's largest list page
+SYNC_PAGE_SIZE = 500
+
+# Listing sort -> (field, descending)
+USER_SORTS = {
+    'name': ('name_lower', False),
+    'lastActive': ('last_active', True),
+}
+
+_last_sync = 0.0
+
+
+def _search_terms(user):
+    """Lowercased words of the name and email, matched by prefix."""
+    terms = set(re.split(r'[\s@.+_-]+', f"{user['name']} {user['email'] or ''}".lower()))
+    if user['email']:
+        terms.add(user['email'].lower())
+    terms.discard('')
+    return sorted(terms)
+
+def build_index_document(clerk_user):
+    user = serialize_user(clerk_user)
+    return {
+        '_id': user['id'],
+        'name': user['name'],
+        'name_lower': user['name'].lower(),
+        'email': user['email'],
+        'role': user['role'],
+        # Never-active users sort last
+        'last_active': user['lastActive'] or 0,
+        'image': user['image'],
+        'terms': _search_terms(user),
+        'updated_at': clerk_user.get('updated_at') or 0,
+        'synced_at': datetime.now()
+    }
+
+def serialize_index_user(document):
+    return {
+        'id': document['_id'],
+        'name': document['name'],
+        'email': document['email'],
+        'role': document['role'],
+        'lastActive': document['last_active'] or None,
+        'image': document['image'],
+        'clerkId': document['_id']
+    }
+
+# Insert or replace users from raw Clerk user objects
+def upsert_users(clerk_users, generation=None):
+    operations = []
+    for clerk_user in clerk_users:
+        document = build_index_document(clerk_user)
+        if generation is not None:
+            document['generation'] = generation
+        operations.append(UpdateOne({'_id': document['_id']}, {'$set': document}, upsert=True))
+    if operations:
+        beehive_user_index_collection.bulk_write(operations, ordered=False)
+    return len(operations)
+
+def delete_user(user_id):
+    beehive_user_index_collection.delete_one({'_id': user_id})
+
+# Pull users from Clerk, newest changes first
+def sync_users(full=False):
+    """Copy Clerk users into the index and return how many were written.
+
+    An incremental sync stops at the first user not updated since the newest
+    one already indexed. A full sync reads every user and removes the ones
+    Clerk no longer has. The outcome is recorded for `get_sync_state`.
+    """
+    global _last_sync
+    _last_sync = time.monotonic()
+    try:
+        written, built = _copy_users(full)
+    except Exception as e:
+        beehive_user_index_state_collection.update_one(
+            {'_id': SYNC_STATE}, {'$set': {'last_error': str(e), 'failed_at': datetime.now()}}, upsert=True)
+        raise
+    now = datetime.now()
+    done = {'synced_at': now, **({'built_at': now} if built else {})}
+    beehive_user_index_state_collection.update_one(
+        {'_id': SYNC_STATE}, {'$set': done, '$unset': {'last_error': '', 'failed_at': ''}}, upsert=True)
+    return written
+
+def _copy_users(full):
+    """Return (users written, whether every Clerk user was read)."""
+    since = None
+    if not full:
+        newest = beehive_user_index_collection.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        since = newest['updated_at'] if newest else None
+    generation = ObjectId() if full or since is None else None
+
+    written = 0
+    offset = 0
+    while True:
+        page = fetch_clerk_users({'order_by': '-updated_at', 'limit': SYNC_PAGE_SIZE, 'offset': offset})
+        # Users updated at the watermark itself are re-read, in case more share it
+        changed = [user for user in page if since is None or (user.get('updated_at') or 0) >= since]
+        written += upsert_users(changed, generation)
+        if len(changed) < len(page) or len(page) < SYNC_PAGE_SIZE:
+            break
+        offset += len(page)
+
+    if generation is not None:
+        stale = {'generation': {'$ne': generation}}
+        beehive_user_index_collection.delete_many(stale)
+    return written, generation is not None
+
+def sync_due():
+    """Whether this process last synced more than USER_INDEX_SYNC_SECONDS ago; claims the sync if so."""
+    global _last_sync
+    now = time.monotonic()
+    if now - _last_sync < Config.USER_INDEX_SYNC_SECONDS:
+        return False
+    _last_sync = now
+    return True
+
+def get_sync_state():
+    """{built_at, synced_at, last_error, failed_at}; `built_at` is set once a full sync has completed."""
+    return beehive_user_index_state_collection.find_one({'_id': SYNC_STATE}) or {}
+
+# Filtered, sorted listing with the total of all matches
+def search_users(role=None, query=None, sort='name', limit=10, offset=0, cursor=None):
+    """Return (users, total, next_cursor).
+
+    Pages are addressed by `offset`, or by `cursor` (the previous
+    `next_cursor`), which stays cheap however deep the client reads.
+    """
+    field, descending = USER_SORTS[sort]
+    match = {}
+    if role:
+        match['role'] = role
+    if query:
+        match['terms'] = {'$regex': f"^{re.escape(query.strip().lower())}"}
+    direction = -1 if descending else 1
+
+    page = [{'$limit': limit + 1}]
+    if cursor:
+        page.insert(0, {'$match': after_cursor(field, cursor, descending)})
+    elif offset:
+        page.insert(0, {'$skip': offset})
+    result = next(beehive_user_index_collection.aggregate([
+        {'$match': match},
+        {'$sort': {field: direction, '_id': direction}},
+        {'$facet': {'users': page, 'total': [{'$count': 'count'}]}}
+    ]))
+
+    documents = result['users']
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1][field], documents[-1]['_id'])
+    total = result['total'][0]['count'] if result['total'] else 0
+    return [serialize_index_user(d) for d in documents], total, next_cursor
@@ -0,0 +1,41 @@
+"""Change counters for cheap conditional GETs.
+
+Each scope ('images', 'users') has a counter in `versions` that writers of
+that data increment. A route whose response depends only on a scope can
+build its ETag from the counter, so a client holding the current ETag is
+answered `304` after one `_id` read instead of the full query.
+
+Bumps are best effort like the stats counters: a failed bump is logged and
+the write that triggered it still succeeds.
+"""
+import logging
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from database import databaseConfig
+
+logger = logging.getLogger(__name__)
+
+beehive_version_collection = databaseConfig.get_beehive_version_collection()
+
+IMAGES = 'images'
+USERS = 'users'
+
+
+# Mark scopes as changed, all in one bulk write
+def bump_versions(*scopes):
+    now = datetime.now()
+    operations = [
+        UpdateOne({'_id': scope}, {'$inc': {'v': 1}, '$set': {'updated_at': now}}, upsert=True)
+        for scope in scopes
+    ]
+    try:
+        beehive_version_collection.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Version bump error: {str(e)}")
+
+def get_versions(*scopes):
+    """Current counter of each scope, in order; 0 for a scope never bumped."""
+    documents = {d['_id']: d['v'] for d in beehive_version_collection.find({'_id': {'$in': list(scopes)}})}
+    return tuple(documents.get(scope, 0) for scope in scopes)
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useClerk } from '@clerk/clerk-react';
+import { useEventStream } from '../hooks/useEventStream';
 
 interface ChatDrawerProps {
   userId: string;
@@ -23,6 +24,11 @@ const ChatDrawer: React.FC<ChatDrawerProps> = ({ userId, userRole, targetUserId,
   const [adminTargetId, setAdminTargetId] = useState(targetUserId || '');
   const [userList, setUserList] = useState<ChatUser[]>([]);
   const [selectedUser, setSelectedUser] = useState<ChatUser | null>(null);
+  const [beforeCursor, setBeforeCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Where the next poll continues from; null until the first page has loaded
+  const sinceCursorRef = useRef<string | null>(null);
+  const scrollOnUpdateRef = useRef(true);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   // Fetch user list for admin
@@ -40,6 +46,12 @@ const ChatDrawer: React.FC<ChatDrawerProps> = ({ userId, userRole, targetUserId,
           'Authorization': `Bearer ${token}`,
         },
       });
+      if (res.status === 503) {
+        // The user index is still being built on a fresh deployment
+        const retryAfter = Number(res.headers.get('Retry-After')) || 5;
+        setTimeout(fetchUserList, retryAfter * 1000);
+        return;
+      }
       if (!res.ok) return;
       const data = await res.json();
       setUserList(data.users || []);
@@ -51,39 +63,93 @@ const ChatDrawer: React.FC<ChatDrawerProps> = ({ userId, userRole, targetUserId,
     } catch {}
   };
 
-  // Scroll to bottom on new messages
+  // Scroll to bottom on new messages, but not when older history is prepended
   useEffect(() => {
-    messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+    if (scrollOnUpdateRef.current) {
+      messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+    }
+    scrollOnUpdateRef.current = true;
   }, [messages]);
 
   // Poll for messages
   useEffect(() => {
     const id = userRole === 'admin' ? adminTargetId : userId;
     if (!userId || (userRole === 'admin' && !adminTargetId)) return;
+    // New conversation: start again from its latest page
+    sinceCursorRef.current = null;
+    setMessages([]);
+    setBeforeCursor(null);
     fetchMessages();
     if (pollInterval) clearInterval(pollInterval);
-    const interval = window.setInterval(fetchMessages, 5000);
+    // Messages are pushed over the event stream; polling only fills gaps
+    const interval = window.setInterval(fetchMessages, 30000);
     setPollInterval(interval);
     return () => clearInterval(interval);
     // eslint-disable-next-line
   }, [userId, userRole, adminTargetId]);
 
+  const conversationId = userRole === 'admin' ? adminTargetId : userId;
+  useEventStream(conversationId ? [`chat:${conversationId}`] : [], (event) => {
+    if (event.type === 'chat_message') {
+      setMessages(prev => prev.some(m => m._id === event.data._id) ? prev : [...prev, event.data]);
+    } else if (event.type === 'reset') {
+      fetchMessages();
+    }
+  });
+
+  const requestMessages = async (params: Record<string, string>) => {
+    const id = userRole === 'admin' ? adminTargetId : userId;
+    if (!id) return null;
+    const token = await clerk.session?.getToken();
+    const query = new URLSearchParams({ user_id: id, ...params });
+    const res = await fetch(`http://127.0.0.1:5000/api/chat/messages?${query}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+    if (!res.ok) return null;
+    return res.json();
+  };
+
+  // The first call loads the latest page; later polls only ask for messages after the cursor
   const fetchMessages = async () => {
     try {
-      const id = userRole === 'admin' ? adminTargetId : userId;
-      if (!id) return;
-      const token = await clerk.session?.getToken();
-      const res = await fetch(`http://127.0.0.1:5000/api/chat/messages?user_id=${id}`, {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-        },
-      });
-      if (!res.ok) return;
-      const data = await res.json();
-      setMessages(data.messages || []);
+      const since = sinceCursorRef.current;
+      const data = await requestMessages(since ? { since } : {});
+      if (!data) return;
+      const received = data.messages || [];
+      if (!since) {
+        setMessages(received);
+        setBeforeCursor(data.before_cursor);
+      } else if (received.length > 0) {
+        // Recent messages are sent again by later polls; one that committed late sorts into place
+        setMessages(prev => {
+          const known = new Set(prev.map(m => m._id));
+          const added = received.filter((m: any) => !known.has(m._id));
+          if (added.length === 0) return prev;
+          return [...prev, ...added].sort((a, b) =>
+            a.timestamp === b.timestamp ? (a._id < b._id ? -1 : 1) : (a.timestamp < b.timestamp ? -1 : 1));
+        });
+      }
+      sinceCursorRef.current = data.since_cursor;
     } catch {}
   };
 
+  const loadOlderMessages = async () => {
+    if (!beforeCursor) return;
+    setLoadingOlder(true);
+    try {
+      const data = await requestMessages({ before: beforeCursor });
+      if (!data) return;
+      scrollOnUpdateRef.current = false;
+      setMessages(prev => [...(data.messages || []), ...prev]);
+      setBeforeCursor(data.before_cursor);
+    } catch {
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const sendMessage = async () => {
     if (!input.trim()) return;
     setLoading(true);
@@ -157,6 +223,17 @@ const ChatDrawer: React.FC<ChatDrawerProps> = ({ userId, userRole, targetUserId,
             <button onClick={onClose} className="text-yellow-500 hover:text-yellow-700 text-2xl sm:text-2xl font-bold px-2 py-1 sm:px-0 sm:py-0">&times;</button>
           </div>
           <div className="flex-1 overflow-y-auto p-3 sm:p-6 space-y-2 sm:space-y-3 custom-scrollbar bg-white">
+            {beforeCursor && (
+              <div className="text-center">
+                <button
+                  onClick={loadOlderMessages}
+                  disabled={loadingOlder}
+                  className="text-xs sm:text-sm text-yellow-700 hover:text-yellow-900 disabled:opacity-50"
+                >
+                  {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+                </button>
+              </div>
+            )}
             {messages.length === 0 ? (
               <div className="text-gray-400 text-center text-sm sm:text-base">No messages yet.</div>
             ) : (
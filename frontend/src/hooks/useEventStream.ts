@@ -0,0 +1,103 @@
+import { useEffect, useRef } from 'react';
+import { useClerk } from '@clerk/clerk-react';
+
+export interface StreamEvent {
+  id: string;
+  type: string;
+  data: any;
+}
+
+const STREAM_URL = 'http://127.0.0.1:5000/api/events/stream';
+const DEFAULT_RETRY_MS = 3000;
+
+// Parse one `id:/event:/data:` block of a text/event-stream
+const parseBlock = (block: string): (StreamEvent & { retry?: number }) | null => {
+  const event: StreamEvent & { retry?: number } = { id: '', type: 'message', data: '' };
+  let hasData = false;
+  for (const line of block.split('\n')) {
+    if (!line || line.startsWith(':')) continue;
+    const colon = line.indexOf(':');
+    const field = colon === -1 ? line : line.slice(0, colon);
+    const value = colon === -1 ? '' : line.slice(colon + 1).replace(/^ /, '');
+    if (field === 'id') event.id = value;
+    else if (field === 'event') event.type = value;
+    else if (field === 'data') { event.data += value; hasData = true; }
+    else if (field === 'retry') event.retry = parseInt(value, 10);
+  }
+  if (event.retry !== undefined && !hasData) return { ...event, type: 'retry' };
+  if (!hasData) return null;
+  try {
+    event.data = JSON.parse(event.data);
+  } catch {}
+  return event;
+};
+
+/**
+ * Subscribe to server-sent events on `channels`.
+ *
+ * Uses fetch rather than EventSource so the Clerk token can be sent as a
+ * header. Reconnects with the last received id, so nothing is missed while
+ * the connection is down; a `reset` event means the server could not resume
+ * and the caller should reload its state.
+ */
+export const useEventStream = (channels: string[], onEvent: (event: StreamEvent) => void) => {
+  const clerk = useClerk();
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+  const key = channels.filter(Boolean).join(',');
+
+  useEffect(() => {
+    if (!key) return;
+    let stopped = false;
+    let lastEventId = '';
+    let retryMs = DEFAULT_RETRY_MS;
+    const controller = new AbortController();
+
+    const connect = async () => {
+      while (!stopped) {
+        try {
+          const token = await clerk.session?.getToken();
+          const headers: Record<string, string> = { 'Authorization': `Bearer ${token}` };
+          if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+          const response = await fetch(`${STREAM_URL}?channels=${encodeURIComponent(key)}`, {
+            headers,
+            signal: controller.signal,
+          });
+          if (!response.ok || !response.body) throw new Error(`HTTP error! status: ${response.status}`);
+
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          while (!stopped) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+              const event = parseBlock(buffer.slice(0, boundary));
+              buffer = buffer.slice(boundary + 2);
+              if (!event) continue;
+              if (event.type === 'retry') {
+                retryMs = event.retry || DEFAULT_RETRY_MS;
+                continue;
+              }
+              lastEventId = event.id;
+              onEventRef.current(event);
+            }
+          }
+        } catch (e) {
+          if (stopped) return;
+        }
+        // The server ends streams periodically; reconnect and resume
+        await new Promise(resolve => setTimeout(resolve, retryMs));
+      }
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      controller.abort();
+    };
+    // eslint-disable-next-line
+  }, [key]);
+};
@@ -4,6 +4,7 @@ import { SunIcon, MoonIcon, BellIcon, ChatBubbleLeftRightIcon, Bars3Icon, XMarkI
 import { useTheme } from '../context/ThemeContext';
 import { useState, useEffect, useRef } from 'react';
 import ChatDrawer from '../components/ChatDrawer';
+import { useEventStream } from '../hooks/useEventStream';
 
 const AdminLayout = () => {
   const { theme, toggleTheme } = useTheme();
@@ -32,15 +33,23 @@ const AdminLayout = () => {
   // Sidebar state
   const [sidebarOpen, setSidebarOpen] = useState(false);
 
-  // Poll for unseen notifications
+  // New notifications are pushed; a slow poll only corrects drift
   useEffect(() => {
     if (!isAdmin) return;
-    const interval = setInterval(fetchUnseenNotifications, 10000);
+    const interval = setInterval(fetchUnseenNotifications, 60000);
     fetchUnseenNotifications();
     return () => clearInterval(interval);
   }, [isAdmin]);
 
-  // Fetch unseen notifications (for polling and badge)
+  useEventStream(isAdmin ? ['admin'] : [], (event) => {
+    if (event.type === 'notification') {
+      setUnseenCount((count) => count + 1);
+    } else if (event.type === 'reset') {
+      fetchUnseenNotifications();
+    }
+  });
+
+  // Fetch the unread count for the badge
   const fetchUnseenNotifications = async () => {
     try {
       const token = await clerk.session?.getToken();
@@ -53,11 +62,7 @@ const AdminLayout = () => {
       });
       if (!response.ok) return;
       const data = await response.json();
-      if (data.notifications && data.notifications.length > 0) {
-        setUnseenCount(data.notifications.length);
-      } else {
-        setUnseenCount(0);
-      }
+      setUnseenCount(data.unread || 0);
     } catch (e) {
       // Ignore notification errors
     }
@@ -78,7 +83,7 @@ const AdminLayout = () => {
       const data = await response.json();
       if (data.notifications) {
         setNotifications(data.notifications);
-        setUnseenCount(0);
+        setUnseenCount(data.unread || 0);
       }
     } catch (e) {
       // Ignore notification errors
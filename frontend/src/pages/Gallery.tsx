@@ -109,6 +109,8 @@ const Gallery = () => {
   const { user } = useUser();
   const [images, setImages] = useState<Upload[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [editingImage, setEditingImage] = useState<Upload | null>(null);
   const [selectedFile, setSelectedFile] = useState<string | null>(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -120,41 +122,42 @@ const Gallery = () => {
   const [currentRollingIndex, setCurrentRollingIndex] = useState(0);
   const rollingContainerRef = useRef<HTMLDivElement>(null);
 
+  // Uploads come newest first, one page at a time; `cursor` continues after the previous page
+  const fetchUploadsPage = async (cursor: string | null) => {
+    const token = await window.Clerk.session?.getToken();
+    const params = new URLSearchParams({ limit: '50' });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`http://127.0.0.1:5000/api/user/user_uploads/${user?.id}?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+      },
+      credentials: 'include',
+      mode: 'cors'
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    if (data.error) {
+      throw new Error(data.error);
+    }
+    return data as { images: Upload[]; next_cursor: string | null };
+  };
+
   useEffect(() => {
     const fetchUploads = async () => {
       if (!user?.id) return;
       
       try {
         setLoading(true);
-        
-        // Get the authentication token from Clerk
-        const token = await window.Clerk.session?.getToken();
-        
-        const response = await fetch(`http://127.0.0.1:5000/api/user/user_uploads/${user.id}`, {
-          method: 'GET',
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`,
-          },
-          credentials: 'include',
-          mode: 'cors'
-        });
-        
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        const data = await response.json();
-        if (data.error) {
-          throw new Error(data.error);
-        }
-        
-        const sortedImages: Upload[] = data.images.sort((a: Upload, b: Upload) =>
-          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-        );
-
-        setImages(sortedImages);
-        console.log(sortedImages);
+        const data = await fetchUploadsPage(null);
+        setImages(data.images);
+        setNextCursor(data.next_cursor);
       } catch (error) {
         console.error('Error fetching uploads:', error);
           toast.error('Failed to fetch uploads');
@@ -166,6 +169,21 @@ const Gallery = () => {
     fetchUploads();
   }, [user?.id]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchUploadsPage(nextCursor);
+      setImages(prev => [...prev, ...data.images]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching uploads:', error);
+      toast.error('Failed to fetch uploads');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleEdit = (image: Upload) => {
     setEditingImage(image);
   };
@@ -294,13 +312,9 @@ const Gallery = () => {
     );
   };
 
-  const getThumbnailUrl = (filename: string) => {
-    if (filename.toLowerCase().endsWith('.pdf')) {
-      // For PDFs, use the thumbnail
-      return `http://127.0.0.1:5000/static/uploads/thumbnails/${filename.replace('.pdf', '.jpg')}`;
-    }
-    // For images, use the original file
-    return `http://127.0.0.1:5000/static/uploads/${filename}`;
+  const getThumbnailUrl = (image: Upload, width = 320) => {
+    // Resized derivative (PDFs are resized from their rendered thumbnail)
+    return `http://127.0.0.1:5000/media/${image.id}?w=${width}`;
   };
 
   const getSentimentColor = (sentiment?: string) => {
@@ -402,7 +416,7 @@ const Gallery = () => {
               <div className="relative w-full h-full max-w-5xl mx-auto">
                 <div className="relative w-full h-full rounded-2xl overflow-hidden shadow-2xl">
                   <img
-                    src={getThumbnailUrl(images[currentRollingIndex].filename)}
+                    src={getThumbnailUrl(images[currentRollingIndex], 1280)}
                     alt={images[currentRollingIndex].title}
                     className="w-full h-full object-contain bg-gray-100 dark:bg-gray-800"
                   />
@@ -631,7 +645,7 @@ const Gallery = () => {
                   transition={{ duration: 0.2 }}
                 >
                   <img
-                    src={getThumbnailUrl(image.filename)}
+                    src={getThumbnailUrl(image)}
                     alt={image.title}
                     className={`w-full h-full object-cover transition-transform duration-200`}
                   />
@@ -744,6 +758,18 @@ const Gallery = () => {
           </div>
         )}
 
+        {!loading && nextCursor && (
+          <div className="flex justify-center mt-8">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 rounded-lg bg-yellow-400 text-black hover:bg-yellow-500 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
+
         {editingImage && (
           <EditModal
             image={editingImage}
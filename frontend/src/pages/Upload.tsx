@@ -170,21 +170,9 @@ const Upload = () => {
       formData.append('description', description);
       formData.append('sentiment', sentiment === 'custom' ? customSentiment : sentiment);
       
-      // Add audio data if available
+      // Add the voice note as a binary part if available
       if (selectedVoiceNote) {
-        const audioReader = new FileReader();
-        audioReader.readAsDataURL(selectedVoiceNote);
-        await new Promise((resolve, reject) => {
-          audioReader.onloadend = async () => {
-            try {
-              formData.append('audioData', audioReader.result as string);
-              resolve(null);
-            } catch (error) {
-              reject(error);
-            }
-          };
-          audioReader.onerror = reject;
-        });
+        formData.append('audio', selectedVoiceNote);
       }
       // Make the upload request
       const token = await clerk.session?.getToken();
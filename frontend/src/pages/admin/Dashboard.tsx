@@ -4,6 +4,7 @@ import {
   PhotoIcon,
   ChartBarIcon,
   MicrophoneIcon,
+  ClockIcon,
 } from '@heroicons/react/24/outline';
 
 // Types for the dashboard data
@@ -11,6 +12,7 @@ interface DashboardStats {
   totalImages: number;
   totalVoiceNotes: number;
   totalMedia: number;
+  uploadsLast24Hours: number;
 }
 
 interface RecentUpload {
@@ -177,6 +179,12 @@ const Dashboard = () => {
             icon={ChartBarIcon}
             color="text-yellow-400"
           />
+          <StatCard
+            title="Last 24 Hours"
+            value={stats.uploadsLast24Hours}
+            icon={ClockIcon}
+            color="text-blue-500"
+          />
         </div>
 
         {/* Recent Activity */}
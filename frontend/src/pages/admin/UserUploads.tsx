@@ -22,43 +22,47 @@ const UserUploads = () => {
   const [uploads, setUploads] = useState<Upload[]>([]);
   const [userName, setUserName] = useState('User');
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedFile, setSelectedFile] = useState<string | null>(null);
   const [currentAudio, setCurrentAudio] = useState<string | null>(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const audioRef = useRef<HTMLAudioElement | null>(null);
 
+  // Uploads come newest first, one page at a time; `cursor` continues after the previous page
+  const fetchUploadsPage = async (cursor: string | null) => {
+    const token = await clerk.session?.getToken();
+    const params = new URLSearchParams({ limit: '50' });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`http://127.0.0.1:5000/api/admin/user_uploads/${userId}?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+      },
+      credentials: 'include',
+      mode: 'cors'
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    if (data.error) {
+      throw new Error(data.error);
+    }
+    return data as { images: Upload[]; next_cursor: string | null };
+  };
+
   useEffect(() => {
     const fetchUploads = async () => {
       try {
         setLoading(true);
-        
-        // Get the authentication token from Clerk
-        const token = await clerk.session?.getToken();
-        
-        const response = await fetch(`http://127.0.0.1:5000/api/admin/user_uploads/${userId}`, {
-          method: 'GET',
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`,
-          },
-          credentials: 'include',
-          mode: 'cors'
-        });
-        
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        const data = await response.json();
-        console.log(data);
-        if (data.error) {
-          throw new Error(data.error);
-        }
-        
-        const sortedImages: Upload[] = data.images.sort((a: Upload, b: Upload) =>
-          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-        );
-        setUploads(sortedImages);
+        const data = await fetchUploadsPage(null);
+        setUploads(data.images);
+        setNextCursor(data.next_cursor);
       } catch (error) {
         console.error('Error fetching uploads:', error);
         toast.error('Failed to fetch uploads');
@@ -69,6 +73,21 @@ const UserUploads = () => {
     fetchUploads();
   }, [userId]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const data = await fetchUploadsPage(nextCursor);
+      setUploads(prev => [...prev, ...data.images]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching uploads:', error);
+      toast.error('Failed to fetch uploads');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFileClick = (filename: string) => {
     setSelectedFile(filename);
     setIsModalOpen(true);
@@ -271,6 +290,17 @@ const UserUploads = () => {
               </table>
             )}
           </div>
+          {!loading && nextCursor && (
+            <div className="flex justify-center py-4">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 rounded-lg bg-yellow-400 text-black hover:bg-yellow-500 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
 
@@ -0,0 +1,39 @@
+"""gunicorn settings, from Config: `gunicorn wsgi:app`.
+
+Workers are forked from a master that has already loaded the app, and run
+`WEB_THREADS` threads each. On SIGTERM the master stops accepting
+connections and gives in-flight requests `WEB_GRACEFUL_TIMEOUT` seconds
+before the workers are killed.
+
+`timeout` only bounds the worker's heartbeat: under gthread a request stuck
+in one thread is not interrupted. Requests are bounded by the MongoDB and
+outbound HTTP timeouts instead (`MONGO_*_TIMEOUT_MS`, `HTTP_TIMEOUTS`).
+"""
+from config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+keepalive = Config.WEB_KEEPALIVE
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+# Loaded once and shared copy-on-write; importing the app opens no connections
+preload_app = True
+accesslog = '-'
+
+
+def on_starting(server):
+    # In-process events never reach clients connected to another worker
+    if server.cfg.workers > 1 and Config.EVENTS_BACKEND == 'memory':
+        raise RuntimeError('EVENTS_BACKEND=memory only works with one worker; set EVENTS_BACKEND=mongo')
+
+def post_fork(server, worker):
+    from utils.lifecycle import worker_started
+    worker_started(worker)
+
+def worker_exit(server, worker):
+    from utils.lifecycle import worker_stopping
+    worker_stopping()
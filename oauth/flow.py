@@ -0,0 +1,30 @@
+"""Google OAuth flow for admin sign-in, built on first use.
+
+Building it imports google_auth_oauthlib and reads `client_secret.json`,
+neither of which most processes need, so it is not done at import time.
+"""
+import os
+import pathlib
+
+OAUTH_SCOPES = [
+    "https://www.googleapis.com/auth/userinfo.profile",
+    "https://www.googleapis.com/auth/userinfo.email",
+    "openid"
+]
+CLIENT_SECRETS_FILE = os.path.join(pathlib.Path(__file__).parent.parent, "client_secret.json")
+REDIRECT_URI = "http://127.0.0.1:5000/admin/login/callback"
+
+
+def get_oauth_flow(app):
+    """The app's OAuth flow, created the first time it is asked for."""
+    flow = app.extensions.get('oauth_flow')
+    if flow is None:
+        from google_auth_oauthlib.flow import Flow
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+        flow = Flow.from_client_secrets_file(
+            client_secrets_file=app.config.get('CLIENT_SECRETS_FILE', CLIENT_SECRETS_FILE),
+            scopes=OAUTH_SCOPES,
+            redirect_uri=REDIRECT_URI
+        )
+        app.extensions['oauth_flow'] = flow
+    return flow
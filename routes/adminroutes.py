@@ -1,22 +1,44 @@
 from flask import Blueprint, request, jsonify
-import os
-import requests
+import time
 from database.admindatahandler import is_admin
-from database.userdatahandler import get_images_by_user, get_recent_uploads, get_upload_stats
+from database.databaseConfig import pool_stats
+from database.userdatahandler import get_images_by_user, get_recent_uploads, get_upload_stats, iter_images_by_user
+from config import Config
+from database.statsdatahandler import get_daily_stats, get_sentiment_totals
+from database.userindexdatahandler import USER_SORTS, get_sync_state, search_users, sync_due
+from database.versiondatahandler import IMAGES, USERS, get_versions
 from utils.clerk_auth import require_auth
+from utils.conditional import etag_from
+from utils.cache import cache_stats
+from utils.http_client import http_stats
+from utils.json_provider import stream_format, stream_response
+from utils.jobs import enqueue, enqueue_once
+from utils.pagination import CursorError, page_size
+from utils.user_directory import list_users
 
 # Create admin blueprint
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
+# Seconds clients wait before asking again while the user index is first built
+INDEX_BUILD_RETRY_SECONDS = 5
+
 # Get all images uploaded by a user (admin access)
 @admin_bp.route('/user_uploads/<user_id>')
 @require_auth
+@etag_from(lambda user_id: get_versions(IMAGES))
 def admin_user_images_show(user_id):
     try:
-        images = get_images_by_user(user_id)
+        fmt = stream_format(request.args.get('stream'))
+        if fmt:
+            return stream_response(iter_images_by_user(user_id), fmt)
+        limit = page_size(request.args.get('limit', type=int), Config.UPLOAD_PAGE_SIZE, Config.UPLOAD_PAGE_MAX)
+        images, next_cursor = get_images_by_user(user_id, limit, request.args.get('cursor'))
         return jsonify({
-            'images': images
+            'images': images,
+            'next_cursor': next_cursor
         })
+    except ValueError as e:  # bad cursor or stream format
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'error': str(e)
@@ -31,103 +53,122 @@ def get_users():
         query = request.args.get('query', '')
         limit = int(request.args.get('limit', 10))
         offset = int(request.args.get('offset', 0))
-        
-        # Get users from Clerk using REST API
-        clerk_api_key = os.getenv('CLERK_SECRET_KEY')
-        headers = {'Authorization': f'Bearer {clerk_api_key}'}
-        params = {
-            'limit': limit,
-            'offset': offset,
-            'query': query if query else None
-        }
-        response = requests.get('https://api.clerk.com/v1/users', headers=headers, params=params)
-        
-        if not response.ok:
-            raise Exception(f"Clerk API error: {response.text}")
-            
-        users_data = response.json()
-        
-        # Transform user data
-        transformed_users = []
-        users_list = users_data  
-        for user in users_list:
-            email = user['email_addresses'][0]['email_address'] if user['email_addresses'] else None
-            transformed_users.append({
-                'id': user['id'],
-                'name': f"{user['first_name']} {user['last_name']}".strip(),
-                'email': email,
-                'role': user['unsafe_metadata'].get('role', 'user'),
-                'lastActive': user['last_active_at'],
-                'image': user['image_url'],
-                'clerkId': user['id']
-            })
-            print(transformed_users)
-        
+
+        users = list_users(query, limit, offset)
         return jsonify({
-            'users': transformed_users,
-            'totalCount': len(users_list)  
+            'users': users,
+            'totalCount': len(users)
         })
         
     except Exception as e:
         print(f"Error fetching users: {str(e)}")
         return jsonify({'error': 'Failed to fetch users'}), 500
 
-# Get only users (not admins)
+# Get only users (not admins), from the local user index
 @admin_bp.route('/users/only-users', methods=['GET'])
 @require_auth
 def get_only_users():
     try:
         # Get query parameters
         query = request.args.get('query', '')
-        limit = int(request.args.get('limit', 10))
-        offset = int(request.args.get('offset', 0))
-        
-        # Get users from Clerk using REST API
-        clerk_api_key = os.getenv('CLERK_SECRET_KEY')
-        headers = {'Authorization': f'Bearer {clerk_api_key}'}
-        params = {
-            'limit': limit,
-            'offset': offset,
-            'query': query if query else None
-        }
-        response = requests.get('https://api.clerk.com/v1/users', headers=headers, params=params)
-        
-        if not response.ok:
-            raise Exception(f"Clerk API error: {response.text}")
-            
-        users_data = response.json()
-        
-        # Transform user data, filter only users with role 'user'
-        transformed_users = []
-        users_list = users_data  
-        for user in users_list:
-            role = user['unsafe_metadata'].get('role', 'user')
-            if role != 'user':
-                continue
-            email = user['email_addresses'][0]['email_address'] if user['email_addresses'] else None
-            transformed_users.append({
-                'id': user['id'],
-                'name': f"{user['first_name']} {user['last_name']}".strip(),
-                'email': email,
-                'role': role,
-                'lastActive': user['last_active_at'],
-                'image': user['image_url'],
-                'clerkId': user['id']
-            })
-            # print(transformed_users)
-        
+        limit = page_size(request.args.get('limit', type=int), 10, Config.USER_PAGE_MAX)
+        offset = max(0, request.args.get('offset', 0, type=int))
+        sort = request.args.get('sort', 'name')
+        if sort not in USER_SORTS:
+            return jsonify({'error': f'Unknown sort: {sort}'}), 400
+
+        # A fresh deployment fills the index in one background job, however many requests arrive meanwhile
+        sync_state = get_sync_state()
+        if not sync_state.get('built_at'):
+            job_id = enqueue_once('user_index_sync', {'full': True})
+            if sync_state.get('last_error'):
+                return jsonify({
+                    'error': 'The user index could not be built from Clerk',
+                    'detail': sync_state['last_error'],
+                    'job_id': str(job_id)
+                }), 502
+            response = jsonify({'error': 'The user index is being built, retry shortly', 'job_id': str(job_id)})
+            response.headers['Retry-After'] = str(INDEX_BUILD_RETRY_SECONDS)
+            return response, 503
+        if sync_due():
+            enqueue('user_index_sync', {})
+
+        users, total, next_cursor = search_users('user', query, sort, limit, offset, request.args.get('cursor'))
         return jsonify({
-            'users': transformed_users,
-            'totalCount': len(transformed_users)  
+            'users': users,
+            'totalCount': total,
+            'next_cursor': next_cursor
         })
-        
+
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching only users: {str(e)}")
         return jsonify({'error': 'Failed to fetch only users'}), 500
 
+# Refresh the local user index from Clerk in the background
+@admin_bp.route('/users/sync', methods=['POST'])
+@require_auth
+def sync_user_index():
+    try:
+        full = request.args.get('full', 'false').lower() == 'true'
+        job_id = enqueue('user_index_sync', {'full': full})
+        return jsonify({'job_id': str(job_id)}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Hit and miss counts of this process's caches
+@admin_bp.route('/cache', methods=['GET'])
+@require_auth
+def get_cache_stats():
+    return jsonify({'caches': cache_stats()})
+
+# Outbound call counts, latency and circuit state per host
+@admin_bp.route('/http', methods=['GET'])
+@require_auth
+def get_http_stats():
+    return jsonify({'hosts': http_stats()})
+
+# MongoDB connection pool counters for this process
+@admin_bp.route('/db/pool', methods=['GET'])
+@require_auth
+def get_db_pool_stats():
+    return jsonify({'pool': pool_stats.snapshot()})
+
+# Daily upload counts, optionally for one user or sentiment
+@admin_bp.route('/stats/daily', methods=['GET'])
+@require_auth
+def get_daily_upload_stats():
+    try:
+        days = max(1, min(request.args.get('days', 30, type=int), 366))
+        if request.args.get('user_id'):
+            series = get_daily_stats(days, 'user', request.args['user_id'])
+        elif request.args.get('sentiment'):
+            series = get_daily_stats(days, 'sentiment', request.args['sentiment'])
+        else:
+            series = get_daily_stats(days)
+        return jsonify({'days': series, 'sentiments': get_sentiment_totals()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Rebuild the dashboard counters from the images collection in the background
+@admin_bp.route('/stats/reconcile', methods=['POST'])
+@require_auth
+def reconcile_stats():
+    try:
+        job_id = enqueue('stats_reconcile', {})
+        return jsonify({'job_id': str(job_id)}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _dashboard_version():
+    # Counters are cached for STATS_CACHE_SECONDS and the last-24-hours figure moves with the clock
+    return get_versions(IMAGES, USERS), int(time.time() // Config.STATS_CACHE_SECONDS)
+
 # Get dashboard statistics and recent activity
 @admin_bp.route('/dashboard', methods=['GET'])
 @require_auth
+@etag_from(_dashboard_version)
 def get_dashboard_data():
     try:
         # Get query parameters for recent activity
@@ -0,0 +1,54 @@
+from flask import Blueprint, request, jsonify
+import datetime
+
+from config import Config
+from database.chatdatahandler import get_conversation, save_chat_message
+from utils.clerk_auth import require_auth
+from utils.pagination import CursorError, page_size
+
+# Create chat blueprint
+chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
+
+
+@chat_bp.route('/send', methods=['POST'])
+@require_auth
+def send_chat_message():
+    try:
+        data = request.json
+        from_id = data.get('from_id')
+        from_role = data.get('from_role')
+        to_id = data.get('to_id')
+        to_role = data.get('to_role')
+        content = data.get('content')
+        timestamp = datetime.datetime.now()
+        if not (from_id and from_role and to_id and to_role and content):
+            return jsonify({'error': 'Missing required fields'}), 400
+        save_chat_message(from_id, from_role, to_id, to_role, content, timestamp)
+        return jsonify({'message': 'Message sent'}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@chat_bp.route('/messages', methods=['GET'])
+@require_auth
+def get_chat_messages():
+    try:
+        user_id = request.args.get('user_id')
+        with_admin = request.args.get('with_admin', 'false').lower() == 'true'
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        since = request.args.get('since')
+        before = request.args.get('before')
+        if since and before:
+            return jsonify({'error': 'Use either since or before, not both'}), 400
+        limit = page_size(request.args.get('limit', type=int), Config.CHAT_PAGE_SIZE, Config.CHAT_PAGE_MAX)
+        # Get messages between this user and admin
+        messages, since_cursor, before_cursor = get_conversation(user_id, since, before, limit)
+        return jsonify({
+            'messages': messages,
+            'since_cursor': since_cursor,
+            'before_cursor': before_cursor
+        }), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
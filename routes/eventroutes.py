@@ -0,0 +1,84 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import threading
+import time
+
+from config import Config
+from utils.clerk_auth import require_auth
+from utils.json_provider import dumps
+from utils.pubsub import ADMIN_CHANNEL, event_bus
+
+# Create server-sent events blueprint
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+# Milliseconds EventSource-style clients wait before reconnecting
+RECONNECT_DELAY_MS = 3000
+
+# Each open stream holds one of the worker's threads; the rest are kept for requests
+_stream_slots = threading.BoundedSemaphore(Config.EVENTS_MAX_STREAMS)
+
+
+def _format_event(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {dumps(data).decode()}\n\n"
+
+def _release_once(semaphore):
+    once = threading.Lock()
+
+    def release():
+        if once.acquire(blocking=False):
+            semaphore.release()
+    return release
+
+def _channels():
+    channels = [c.strip() for c in request.args.get('channels', '').split(',') if c.strip()]
+    for channel in channels:
+        if channel != ADMIN_CHANNEL and not channel.startswith('chat:'):
+            raise ValueError(f'Unknown channel: {channel}')
+    return channels
+
+# Stream notification and chat events; reconnect with Last-Event-ID to resume
+@events_bp.route('/stream', methods=['GET'])
+@require_auth
+def stream_events():
+    try:
+        channels = _channels()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not channels:
+        return jsonify({'error': 'channels is required'}), 400
+
+    if not _stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open event streams, retry shortly'})
+        response.headers['Retry-After'] = str(RECONNECT_DELAY_MS // 1000)
+        return response, 503
+    release = _release_once(_stream_slots)
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscription = event_bus.subscribe(channels, last_event_id)
+    except Exception:
+        release()
+        raise
+
+    def generate():
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            if subscription.reset:
+                # The requested id is gone; the client reloads its state over REST
+                yield _format_event(event_bus.buffer.latest_id() or '', 'reset', {})
+            deadline = time.monotonic() + Config.EVENTS_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                events = subscription.next_events(Config.EVENTS_HEARTBEAT_SECONDS)
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for event in events:
+                    yield _format_event(event.id, event.type, {'channel': event.channel, **event.data})
+        finally:
+            release()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Also covers a client that goes away before the stream starts
+    response.call_on_close(release)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+import pymongo
+
+from config import Config
+from database import databaseConfig
+from utils.lifecycle import is_draining
+
+# Create health check blueprint
+health_bp = Blueprint('health', __name__)
+
+
+# Liveness: the process is up and serving requests
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({'status': 'ok'}), 200
+
+# Readiness: this worker can take traffic, MongoDB included
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    if is_draining():
+        return jsonify({'status': 'draining'}), 503
+    try:
+        with pymongo.timeout(Config.HEALTH_CHECK_TIMEOUT_SECONDS):
+            databaseConfig.get_client().admin.command('ping')
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'mongo': str(e)}), 503
+    return jsonify({'status': 'ok', 'mongo': 'ok'}), 200
@@ -0,0 +1,98 @@
+from flask import Blueprint, request, jsonify
+import threading
+import time
+from bson import ObjectId
+
+from config import Config
+from database.jobdatahandler import get_job, get_jobs_for_image
+from database.userdatahandler import get_image_by_id
+from utils.clerk_auth import require_auth
+
+# Create background job blueprint
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+TERMINAL_JOB_STATUSES = {'succeeded', 'failed'}
+TERMINAL_IMAGE_STATUSES = {'ready', 'failed'}
+WAIT_POLL_SECONDS = 0.5
+# Waiting requests hold a web thread each; once these are taken the rest answer at once
+_wait_slots = threading.BoundedSemaphore(Config.JOB_STATUS_MAX_WAITERS)
+
+
+def _job_response(job):
+    return {
+        'id': str(job['_id']),
+        'kind': job['kind'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'image_id': str(job['image_id']) if job.get('image_id') else None,
+        'result': job.get('result'),
+        'error': job.get('last_error') if job['status'] == 'failed' else None,
+        'updated_at': job['updated_at'].isoformat() if job.get('updated_at') else None
+    }
+
+def _wait_seconds():
+    try:
+        return max(0.0, min(float(request.args.get('wait', 0)), Config.JOB_STATUS_MAX_WAIT_SECONDS))
+    except ValueError:
+        return 0.0
+
+def _poll(load, is_done, wait):
+    """Reload until is_done() holds or `wait` seconds pass, for long-polling clients.
+
+    Without a free wait slot the current state is returned straight away.
+    """
+    value = load()
+    if value is None or is_done(value) or not wait or not _wait_slots.acquire(blocking=False):
+        return value
+    try:
+        deadline = time.monotonic() + wait
+        while value is not None and not is_done(value) and time.monotonic() < deadline:
+            time.sleep(WAIT_POLL_SECONDS)
+            value = load()
+        return value
+    finally:
+        _wait_slots.release()
+
+# Get the status of a single job
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@require_auth
+def get_job_status(job_id):
+    try:
+        try:
+            job_id = ObjectId(job_id)
+        except Exception as e:
+            return jsonify({'error': f'Invalid job ID format: {str(e)}'}), 400
+
+        job = _poll(lambda: get_job(job_id), lambda j: j['status'] in TERMINAL_JOB_STATUSES, _wait_seconds())
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(_job_response(job)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Get the processing status of an image and its jobs, e.g. thumbnail readiness
+@jobs_bp.route('/image/<image_id>', methods=['GET'])
+@require_auth
+def get_image_processing_status(image_id):
+    try:
+        try:
+            image_id = ObjectId(image_id)
+        except Exception as e:
+            return jsonify({'error': f'Invalid image ID format: {str(e)}'}), 400
+
+        image = _poll(
+            lambda: get_image_by_id(image_id),
+            lambda i: i.get('status', 'ready') in TERMINAL_IMAGE_STATUSES,
+            _wait_seconds()
+        )
+        if not image:
+            return jsonify({'error': 'Image not found.'}), 404
+        return jsonify({
+            'image_id': str(image_id),
+            'status': image.get('status', 'ready'),
+            'thumbnail': image.get('thumbnail'),
+            'jobs': [_job_response(job) for job in get_jobs_for_image(image_id)]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,98 @@
+from flask import Blueprint, abort, request, jsonify
+import hashlib
+import os
+from bson import ObjectId
+from werkzeug.security import safe_join
+
+from config import Config
+from database.userdatahandler import get_image_by_id
+from utils import blobstore
+from utils.derivatives import FORMATS, bucket_width, derivative_cache, derivative_key, render
+from utils.media_serving import content_etag, send_media
+
+# Create media blueprint
+media_bp = Blueprint('media', __name__)
+
+
+def _source_path(image):
+    """Original file to resize from; PDFs are resized from their rendered thumbnail."""
+    filename = image['filename']
+    if filename.lower().endswith('.pdf'):
+        path = blobstore.thumbnail_path(filename)
+    else:
+        path = blobstore.absolute_path(filename)
+    return path if os.path.exists(path) else None
+
+def _negotiate_format():
+    fmt = request.args.get('fmt', '').lower()
+    if fmt:
+        return fmt, False
+    return ('webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'), True
+
+# Serve an image, resized on demand when a width is requested
+@media_bp.route('/media/<image_id>', methods=['GET'])
+def get_media(image_id):
+    try:
+        try:
+            image_id = ObjectId(image_id)
+        except Exception as e:
+            return jsonify({'error': f'Invalid image ID format: {str(e)}'}), 400
+
+        image = get_image_by_id(image_id)
+        if not image:
+            return jsonify({'error': 'Image not found.'}), 404
+
+        width = request.args.get('w', type=int)
+        if not width:
+            path = blobstore.absolute_path(image['filename'])
+            if not os.path.exists(path):
+                return jsonify({'error': 'File not found.'}), 404
+            # An image id always points at the same blob
+            return send_media(path, etag=image.get('blob_hash'), immutable=bool(image.get('blob_hash')))
+
+        if width <= 0:
+            return jsonify({'error': 'w must be a positive integer'}), 400
+        fmt, negotiated = _negotiate_format()
+        if fmt not in FORMATS:
+            return jsonify({'error': f'fmt must be one of: {", ".join(FORMATS)}'}), 400
+
+        source_path = _source_path(image)
+        if source_path is None:
+            # PDF thumbnail still rendering
+            if image.get('status') == 'processing':
+                return jsonify({'status': 'processing'}), 202
+            return jsonify({'error': 'File not found.'}), 404
+
+        # Legacy uploads have no content hash, key them by path and size instead
+        digest = image.get('blob_hash') or hashlib.sha256(
+            f"{image['filename']}:{os.path.getsize(source_path)}".encode()).hexdigest()
+        width = bucket_width(width)
+        key = derivative_key(digest, width, fmt)
+
+        try:
+            path = derivative_cache.get_or_create(key, lambda destination: render(source_path, destination, width, fmt))
+        except OSError:
+            # Formats Pillow cannot decode (e.g. HEIF) and oversized images fall back to the original
+            return send_media(blobstore.absolute_path(image['filename']), etag=image.get('blob_hash'),
+                              immutable=bool(image.get('blob_hash')))
+
+        response = send_media(path, etag=key, mimetype=FORMATS[fmt][1], immutable=bool(image.get('blob_hash')))
+        if negotiated:
+            response.vary.add('Accept')
+        return response
+
+    except Exception as e:
+        return jsonify({'error': f'Error serving media: {str(e)}'}), 500
+
+# Uploaded files, served with validators and long-lived caching for content-addressed paths.
+# Takes precedence over the generic static route for /static/uploads/.
+@media_bp.route('/static/uploads/<path:filename>', methods=['GET'])
+def serve_upload(filename):
+    # Dot-directories and dotfiles hold work in progress (e.g. the blob store's .tmp)
+    if any(part.startswith('.') for part in filename.split('/')):
+        abort(404)
+    path = safe_join(Config.UPLOAD_FOLDER, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    etag = content_etag(filename)
+    return send_media(path, etag=etag, immutable=etag is not None)
@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+
+from config import Config
+from database.notificationdatahandler import (
+    claim_notifications,
+    get_notification_history,
+    get_unread_count,
+    iter_notification_history
+)
+from utils.clerk_auth import require_auth
+from utils.json_provider import stream_format, stream_response
+from utils.pagination import page_size
+
+# Create notifications blueprint
+notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/admin/notifications')
+
+
+@notifications_bp.route('', methods=['GET'])
+@require_auth
+def get_admin_notifications():
+    try:
+        admin_id = request.current_user['id']
+        mark_seen = request.args.get('mark_seen', 'false').lower() == 'true'
+        # Claim the next batch of notifications no admin has claimed yet
+        notifications = claim_notifications(admin_id, request.args.get('limit', type=int)) if mark_seen else []
+        return jsonify({
+            "notifications": notifications,
+            "unread": get_unread_count()
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Browse all notifications, newest first; `stream=json|ndjson` returns all of them unpaged
+@notifications_bp.route('/history', methods=['GET'])
+@require_auth
+def get_admin_notification_history():
+    try:
+        fmt = stream_format(request.args.get('stream'))
+        if fmt:
+            return stream_response(iter_notification_history(), fmt)
+        limit = page_size(request.args.get('limit', type=int), Config.NOTIFICATION_PAGE_SIZE, Config.NOTIFICATION_PAGE_MAX)
+        notifications, next_cursor = get_notification_history(limit, request.args.get('cursor'))
+        return jsonify({
+            "notifications": notifications,
+            "next_cursor": next_cursor
+        }), 200
+    except ValueError as e:  # bad cursor or stream format
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
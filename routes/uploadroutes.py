@@ -0,0 +1,193 @@
+from flask import Blueprint, request, jsonify
+import logging
+from bson import ObjectId
+from werkzeug.utils import secure_filename
+
+from config import Config
+from database.uploadsessiondatahandler import (
+    claim_upload_session_for_finalize,
+    complete_upload_session,
+    create_upload_session,
+    get_upload_session,
+    mark_chunk_received,
+    purge_expired_upload_sessions,
+    release_upload_session,
+    reset_upload_session
+)
+from utils import blobstore, chunked_upload
+from utils.clerk_auth import require_auth
+from utils.uploads import UploadItem, finish_uploads
+
+# Create resumable upload blueprint
+upload_bp = Blueprint('upload', __name__, url_prefix='/api/user/upload')
+
+
+def _session_response(upload_session):
+    return {
+        'upload_id': str(upload_session['_id']),
+        'filename': upload_session['filename'],
+        'size': upload_session['size'],
+        'chunk_size': upload_session['chunk_size'],
+        'total_chunks': upload_session['total_chunks'],
+        'received': sorted(int(i) for i in upload_session.get('received', {})),
+        'status': upload_session['status'],
+        'result': upload_session.get('result')
+    }
+
+def _load_session(user_id, upload_id):
+    try:
+        upload_id = ObjectId(upload_id)
+    except Exception:
+        return None
+    return get_upload_session(upload_id, user_id)
+
+# Start a resumable upload
+@upload_bp.route('/<user_id>/sessions', methods=['POST'])
+@require_auth
+def init_upload(user_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get('filename', ''))
+        title = data.get('title', '')
+        description = data.get('description', '')
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+        try:
+            size = int(data.get('size', 0))
+            chunk_size = int(data.get('chunk_size', Config.UPLOAD_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'size and chunk_size must be integers'}), 400
+
+        if not filename:
+            return jsonify({'error': 'No file selected'}), 400
+
+        if not title or not description:
+            return jsonify({'error': 'Title and description are required'}), 400
+
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        if file_ext not in Config.ALLOWED_EXTENSIONS:
+            return jsonify({'error': f'File type not allowed. Allowed types: {", ".join(Config.ALLOWED_EXTENSIONS)}'}), 400
+
+        if size <= 0 or size > Config.UPLOAD_MAX_SIZE:
+            return jsonify({'error': f'File size must be between 1 and {Config.UPLOAD_MAX_SIZE} bytes'}), 400
+
+        chunk_size = max(Config.UPLOAD_MIN_CHUNK_SIZE, min(chunk_size, Config.UPLOAD_MAX_CHUNK_SIZE))
+
+        for expired_id in purge_expired_upload_sessions():
+            chunked_upload.discard(expired_id)
+
+        upload_session, created = create_upload_session(
+            user_id,
+            data.get('username', ''),
+            filename,
+            size,
+            chunk_size,
+            title,
+            description,
+            sentiment=data.get('sentiment'),
+            sha256=data.get('sha256'),
+            idempotency_key=idempotency_key
+        )
+        if upload_session['status'] == 'uploading':
+            chunked_upload.allocate_part_file(upload_session['_id'], upload_session['size'])
+
+        return jsonify(_session_response(upload_session)), 201 if created else 200
+
+    except Exception as e:
+        logging.error(f"Upload init error: {str(e)}")
+        return jsonify({'error': f'Error starting upload: {str(e)}'}), 500
+
+# Get the state of an upload so a client can resume it
+@upload_bp.route('/<user_id>/sessions/<upload_id>', methods=['GET'])
+@require_auth
+def get_upload_status(user_id, upload_id):
+    upload_session = _load_session(user_id, upload_id)
+    if not upload_session:
+        return jsonify({'error': 'Upload session not found'}), 404
+    return jsonify(_session_response(upload_session)), 200
+
+# Receive one numbered chunk as the raw request body
+@upload_bp.route('/<user_id>/sessions/<upload_id>/chunks/<int:index>', methods=['PUT'])
+@require_auth
+def upload_chunk(user_id, upload_id, index):
+    try:
+        upload_session = _load_session(user_id, upload_id)
+        if not upload_session:
+            return jsonify({'error': 'Upload session not found'}), 404
+
+        if index < 0 or index >= upload_session['total_chunks']:
+            return jsonify({'error': f'Chunk index must be between 0 and {upload_session["total_chunks"] - 1}'}), 400
+
+        # Retried chunks are acknowledged without being written again
+        received = upload_session.get('received', {})
+        if str(index) in received or upload_session['status'] != 'uploading':
+            return jsonify({'index': index, 'sha256': received.get(str(index)), 'duplicate': True}), 200
+
+        expected_length = chunked_upload.chunk_length(index, upload_session['size'], upload_session['chunk_size'])
+        try:
+            digest = chunked_upload.write_chunk(
+                upload_session['_id'],
+                index,
+                upload_session['chunk_size'],
+                expected_length,
+                request.stream,
+                expected_sha256=request.headers.get('X-Chunk-SHA256')
+            )
+        except chunked_upload.ChunkError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not mark_chunk_received(upload_session['_id'], index, digest):
+            return jsonify({'error': 'Upload session is no longer accepting chunks'}), 409
+
+        return jsonify({'index': index, 'sha256': digest, 'duplicate': False}), 200
+
+    except Exception as e:
+        logging.error(f"Chunk upload error: {str(e)}")
+        return jsonify({'error': f'Error uploading chunk: {str(e)}'}), 500
+
+# Assemble the upload and hand it to the regular image/notification path
+@upload_bp.route('/<user_id>/sessions/<upload_id>/finalize', methods=['POST'])
+@require_auth
+def finalize_upload(user_id, upload_id):
+    upload_session = _load_session(user_id, upload_id)
+    if not upload_session:
+        return jsonify({'error': 'Upload session not found'}), 404
+
+    # Finalize is idempotent, a retry gets the original result back
+    if upload_session['status'] == 'complete':
+        return jsonify({'message': 'Upload successful', **upload_session['result']}), 200
+
+    missing = [i for i in range(upload_session['total_chunks']) if str(i) not in upload_session.get('received', {})]
+    if missing:
+        return jsonify({'error': 'Upload is incomplete', 'missing': missing}), 409
+
+    upload_session = claim_upload_session_for_finalize(upload_session['_id'])
+    if not upload_session:
+        return jsonify({'error': 'Upload is already being finalized'}), 409
+
+    try:
+        digest = chunked_upload.file_digest(upload_session['_id'], upload_session['total_chunks'])
+        if upload_session.get('sha256') and upload_session['sha256'].lower() != digest:
+            # Retried chunks are skipped by index, so start over or the bad bytes could never be replaced
+            chunked_upload.reset(upload_session['_id'], upload_session['size'])
+            reset_upload_session(upload_session['_id'])
+            return jsonify({'error': 'Checksum mismatch, send every chunk again', 'sha256': digest,
+                            'received': []}), 422
+
+        # The part file is kept until the upload is recorded so a failed finalize can be retried
+        filename = upload_session['filename']
+        file_ext = filename.rsplit('.', 1)[1].lower()
+        stored = blobstore.store_file(chunked_upload.part_path(upload_session['_id']), file_ext, digest,
+                                      keep_source=True)
+
+        result = finish_uploads(user_id, upload_session['username'], [UploadItem(stored, filename, None)],
+                                upload_session['title'], upload_session['description'],
+                                upload_session.get('sentiment'))[0]
+        complete_upload_session(upload_session['_id'], result)
+        chunked_upload.discard(upload_session['_id'])
+        return jsonify({'message': 'Upload successful', **result}), 200
+
+    except Exception as e:
+        release_upload_session(upload_session['_id'])
+        logging.error(f"Upload finalize error: {str(e)}")
+        return jsonify({'error': f'Error finalizing upload: {str(e)}'}), 500
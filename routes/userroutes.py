@@ -0,0 +1,210 @@
+from flask import Blueprint, abort, current_app, request, jsonify
+import base64
+import logging
+import os
+from bson import ObjectId
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from config import Config
+from database.userdatahandler import delete_image, get_image_by_id, get_images_by_user, iter_images_by_user, update_image
+from database.versiondatahandler import IMAGES, get_versions
+from utils import blobstore
+from utils.clerk_auth import require_auth
+from utils.conditional import etag_from
+from utils.json_provider import stream_format, stream_response
+from utils.media_serving import content_etag, send_media
+from utils.pagination import page_size
+from utils.uploads import UploadItem, finish_uploads, release_items
+
+# Create user blueprint
+user_bp = Blueprint('user', __name__)
+
+ALLOWED_EXTENSIONS = Config.ALLOWED_EXTENSIONS
+AUDIO_DATA_URL_EXTENSIONS = {'audio/webm': 'webm', 'audio/ogg': 'ogg', 'audio/mpeg': 'mp3', 'audio/mp4': 'm4a'}
+
+
+# Upload images 
+@user_bp.route('/api/user/upload/<user_id>', methods=['POST'])
+def upload_images(user_id):
+    try:
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        username = request.form.get('username', '')
+        files = request.files.getlist('files')  # Supports multiple file uploads
+        title = request.form.get('title', '')
+        sentiment = request.form.get('sentiment')
+        description = request.form.get('description', '')
+        audio_file = request.files.get('audio')  # Voice note as a binary part
+        audio_data = request.form.get('audioData')  # Older clients send a base64 data URL
+
+        if not files or not files[0]:
+            return jsonify({'error': 'No file selected'}), 400
+
+        if not title or not description:
+            return jsonify({'error': 'Title and description are required'}), 400
+
+        # Check every file extension before anything is written
+        files = [file for file in files if file]
+        for file in files:
+            filename = secure_filename(file.filename)
+            file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+            if file_ext not in ALLOWED_EXTENSIONS:
+                return jsonify({'error': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+
+        audio_ext = None
+        if audio_file:
+            audio_name = secure_filename(audio_file.filename or '')
+            audio_ext = audio_name.rsplit('.', 1)[1].lower() if '.' in audio_name else ''
+            if audio_ext not in Config.AUDIO_EXTENSIONS:
+                return jsonify({'error': f'Audio type not allowed. Allowed types: {", ".join(Config.AUDIO_EXTENSIONS)}'}), 400
+
+        items = []
+        audio = None
+        try:
+            # The voice note is stored once per request and shared by every file
+            if audio_file:
+                audio = blobstore.store_stream(audio_file.stream, audio_ext, upload_folder)
+            elif audio_data:
+                header, _, encoded = audio_data.partition(',')
+                audio_ext = AUDIO_DATA_URL_EXTENSIONS.get(header[5:].split(';')[0], 'wav')
+                audio = blobstore.store_bytes(base64.b64decode(encoded), audio_ext, upload_folder)
+
+            for file in files:
+                filename = secure_filename(file.filename)
+                file_ext = filename.rsplit('.', 1)[1].lower()
+
+                # Stored under its content hash, so identical files share one blob
+                stored = blobstore.store_stream(file.stream, file_ext, upload_folder)
+                items.append(UploadItem(stored, filename, None))
+
+            # Every image holds its own reference to the shared voice note
+            if audio:
+                blobstore.retain(audio, len(items) - 1)
+                items = [item._replace(audio=audio) for item in items]
+        except Exception:
+            release_items(items, upload_folder)
+            if audio and not any(item.audio for item in items):
+                blobstore.release(audio.digest, upload_folder)
+            raise
+
+        # One batched write for all images and notifications of this upload
+        uploaded = finish_uploads(user_id, username, items, title, description, sentiment,
+                                  upload_folder=upload_folder)
+
+        return jsonify({'message': 'Upload successful', 'images': uploaded}), 200
+
+    except Exception as e:
+        logging.error(f"Upload error: {str(e)}")  # Add logging
+        return jsonify({'error': f'Error uploading file: {str(e)}'}), 500
+
+
+
+# Edit images uploaded by the user
+@user_bp.route('/edit/<image_id>', methods=['POST'])
+@require_auth
+def edit_image(image_id):
+    try:
+        # Get form data
+        title = request.form.get('title')
+        description = request.form.get('description')
+        sentiment = request.form.get('sentiment', '')
+
+        if not title or not description:
+            return jsonify({'error': 'Title and description are required.'}), 400
+
+        try:
+            image_id = ObjectId(image_id)
+        except Exception as e:
+            return jsonify({'error': f'Invalid image ID format: {str(e)}'}), 400
+
+        # Verify the image exists
+        image = get_image_by_id(image_id)
+        if not image:
+            return jsonify({'error': 'Image not found.'}), 404
+
+        # Update the image
+        update_image(image_id, title, description, sentiment)
+        return jsonify({'message': 'Image updated successfully!'}), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Error updating image: {str(e)}'}), 500
+
+@user_bp.route('/audio/<path:filename>')
+def serve_audio(filename):
+    path = safe_join(current_app.config['UPLOAD_FOLDER'], filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    # Range support lets players seek without downloading the whole file again
+    etag = content_etag(filename)
+    return send_media(path, etag=etag, immutable=etag is not None)
+   
+# Delete images uploaded by the user
+@user_bp.route('/delete/<image_id>')
+@require_auth
+def delete_image_route(image_id):
+    try:
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        try:
+            image_id = ObjectId(image_id)
+        except Exception as e:
+            return jsonify({'error': f'Invalid image ID format: {str(e)}'}), 400
+
+        # Verify the image exists
+        image = get_image_by_id(image_id)
+        if not image:
+            return jsonify({'error': 'Image not found.'}), 404
+
+        # Delete image record from database
+        delete_image(image_id)
+
+        # Drop the blob references, files are reclaimed once nothing points at them
+        if image.get('blob_hash'):
+            blobstore.release(image['blob_hash'], upload_folder)
+        else:
+            # Files uploaded before the content-addressed store
+            filepath = os.path.join(upload_folder, image['filename'])
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                # Also delete thumbnail if it exists
+                if image['filename'].lower().endswith('.pdf'):
+                    thumbnail_path = os.path.join(upload_folder, 'thumbnails', 
+                                                image['filename'].replace('.pdf', '.jpg'))
+                    if os.path.exists(thumbnail_path):
+                        os.remove(thumbnail_path)
+
+        if image.get('audio_blob_hash'):
+            blobstore.release(image['audio_blob_hash'], upload_folder)
+        elif image.get('audio_filename'):
+            audio_path = os.path.join(upload_folder, image['audio_filename'])
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+
+        return jsonify({'message': 'Image deleted successfully!'}), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Error deleting image: {str(e)}'}), 500
+
+# Get all images uploaded by a user
+@user_bp.route('/api/user/user_uploads/<user_id>')
+@require_auth
+@etag_from(lambda user_id: get_versions(IMAGES))
+def user_images_show(user_id):
+    try:
+        fmt = stream_format(request.args.get('stream'))
+        if fmt:
+            return stream_response(iter_images_by_user(user_id), fmt)
+        limit = page_size(request.args.get('limit', type=int), Config.UPLOAD_PAGE_SIZE, Config.UPLOAD_PAGE_MAX)
+        images, next_cursor = get_images_by_user(user_id, limit, request.args.get('cursor'))
+        response_data = {
+            'images': images,
+            'next_cursor': next_cursor,
+            'user_id': user_id,
+            'message': 'Success'
+        }
+        return jsonify(response_data)
+    except ValueError as e:  # bad cursor or stream format
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
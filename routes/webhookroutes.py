@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify
+import json
+
+from config import Config
+from database.userindexdatahandler import delete_user, upsert_users
+from database.versiondatahandler import USERS, bump_versions
+from utils.clerk_auth import verify_webhook
+from utils.user_directory import serialize_user, user_changed
+
+# Create webhook blueprint; deliveries are authenticated by signature, not by token
+webhooks_bp = Blueprint('webhooks', __name__, url_prefix='/api/webhooks')
+
+USER_EVENTS = {'user.created', 'user.updated', 'user.deleted'}
+
+
+# Keep cached Clerk users current as they change
+@webhooks_bp.route('/clerk', methods=['POST'])
+def clerk_webhook():
+    body = request.get_data()
+    try:
+        verify_webhook(Config.CLERK_WEBHOOK_SECRET, request.headers, body)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 401
+
+    try:
+        event = json.loads(body)
+        if event.get('type') in USER_EVENTS:
+            data = event.get('data') or {}
+            if event['type'] == 'user.deleted':
+                user_changed(data['id'])
+                delete_user(data['id'])
+            else:
+                user_changed(data['id'], serialize_user(data))
+                upsert_users([data])
+            bump_versions(USERS)
+        return jsonify({'received': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,112 @@
+"""Fixtures for the offline benchmark suite.
+
+Each benchmark runs against an in-memory Mongo (mongomock) filled with
+`size` documents per collection, for every size in `BENCHMARK_SIZES`
+(comma separated, default "1000"; CI and release checks use
+"1000,100000"). Clerk is stubbed, so no network access or real tokens are
+needed. Datasets are built once per size and shared by every benchmark.
+"""
+import datetime
+import os
+
+import mongomock
+import pytest
+
+from config import Config
+from database import chatdatahandler, notificationdatahandler, statsdatahandler, userdatahandler
+from utils import user_directory
+
+SIZES = [int(size) for size in os.getenv("BENCHMARK_SIZES", "1000").split(",")]
+USERS = 100
+NOW = datetime.datetime.now().replace(microsecond=0)
+
+_datasets = {}
+
+
+class FakeResponse:
+    ok = True
+    text = ""
+
+    def __init__(self, users):
+        self._users = users
+
+    def json(self):
+        return self._users
+
+
+def _clerk_get(url, headers=None, params=None, timeout=None):
+    return FakeResponse([{
+        "id": user_id,
+        "first_name": "User",
+        "last_name": user_id,
+        "email_addresses": [{"email_address": f"{user_id}@example.com"}],
+        "unsafe_metadata": {"role": "user"},
+        "last_active_at": None,
+        "image_url": None,
+    } for user_id in params.get("user_id", [])])
+
+
+def _bulk_write(collection):
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    def bulk_write(operations, ordered=True):
+        for op in operations:
+            collection.update_one(op._filter, op._doc, upsert=op._upsert)
+    return bulk_write
+
+
+def _build(size):
+    """`size` images, notifications and chat messages spread over USERS users and 30 days."""
+    db = mongomock.MongoClient().beehive
+    step = datetime.timedelta(days=30) / size
+    images, notifications, messages = [], [], []
+    for i in range(size):
+        user_id = f"user_{i % USERS}"
+        created_at = NOW - step * i
+        images.append(userdatahandler.build_image(
+            user_id, f"page{i}.jpg", f"Drawing {i}", "A drawing", created_at,
+            audio_filename=f"note{i}.m4a" if i % 3 == 0 else None, sentiment=("happy", "sad", "calm")[i % 3],
+            blob_hash=f"{i:064x}"))
+        notifications.append(userdatahandler.build_notification(
+            user_id, user_id, f"page{i}.jpg", f"Drawing {i}", created_at, None))
+        if i % 2:
+            messages.append({"from_id": user_id, "from_role": "user", "to_id": "admin", "to_role": "admin",
+                             "content": f"message {i}", "timestamp": created_at})
+        else:
+            messages.append({"from_id": "admin_1", "from_role": "admin", "to_id": user_id, "to_role": "user",
+                             "content": f"message {i}", "timestamp": created_at})
+    db.images.insert_many(images)
+    db.notifications.insert_many(notifications)
+    db.messages.insert_many(messages)
+    db.stats.bulk_write = _bulk_write(db.stats)
+    return db
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"{size // 1000}k" if size >= 1000 else str(size))
+def db(request, monkeypatch):
+    """A populated in-memory database, patched into the data handlers."""
+    size = request.param
+    if size not in _datasets:
+        _datasets[size] = _build(size)
+    db = _datasets[size]
+
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", db.images)
+    monkeypatch.setattr(userdatahandler, "beehive_notification_collection", db.notifications)
+    monkeypatch.setattr(notificationdatahandler, "beehive_notification_collection", db.notifications)
+    monkeypatch.setattr(notificationdatahandler, "beehive_notification_counter_collection", db.notification_counters)
+    monkeypatch.setattr(chatdatahandler, "beehive_message_collection", db.messages)
+    monkeypatch.setattr(statsdatahandler, "beehive_stats_collection", db.stats)
+    if db.stats.estimated_document_count() == 0:
+        statsdatahandler.rebuild_stats(db.images)
+    # Measure the counter reads, not the per-process cache in front of them
+    monkeypatch.setattr(Config, "STATS_CACHE_SECONDS", 0)
+    statsdatahandler.clear_stats_cache()
+    return db
+
+
+@pytest.fixture
+def clerk(monkeypatch):
+    """Clerk's user list endpoint, answered in memory."""
+    user_directory.clear_user_cache()
+    monkeypatch.setattr(user_directory.http_client, "get", _clerk_get)
+    yield
+    user_directory.clear_user_cache()
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from database import userdatahandler  # noqa: E402
+
+
+def test_get_images_by_user_first_page(benchmark, db):
+    images, next_cursor = benchmark(userdatahandler.get_images_by_user, "user_0", 50)
+    assert images and len(images) <= 50
+
+
+def test_get_images_by_user_deep_page(benchmark, db):
+    """A page far into the history, reached by cursor rather than offset."""
+    cursor = None
+    for _ in range(3):
+        _, cursor = userdatahandler.get_images_by_user("user_0", 3, cursor)
+    if cursor is None:
+        pytest.skip("dataset too small for a deep page")
+    images, _ = benchmark(userdatahandler.get_images_by_user, "user_0", 50, cursor)
+    assert images
+
+
+def test_get_upload_stats(benchmark, db):
+    stats = benchmark(userdatahandler.get_upload_stats)
+    assert stats["totalImages"] == db.images.estimated_document_count()
+
+
+def test_get_recent_uploads(benchmark, db, clerk):
+    uploads = benchmark(userdatahandler.get_recent_uploads, 10)
+    assert len(uploads) == 10
+    assert uploads[0]["user"] != "Unknown User"
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from flask import Flask, jsonify, request  # noqa: E402
+
+from utils import clerk_auth  # noqa: E402
+from utils.clerk_auth import require_auth  # noqa: E402
+
+
+@pytest.fixture
+def headers(auth_token):
+    return {"Authorization": f"Bearer {auth_token('admin_1')}", "Accept-Encoding": "gzip"}
+
+
+def test_notification_badge(benchmark, db, client, headers):
+    response = benchmark(client.get, "/api/admin/notifications", headers=headers)
+    assert response.status_code == 200
+
+
+def test_notification_history(benchmark, db, client, headers):
+    response = benchmark(client.get, "/api/admin/notifications/history?limit=50", headers=headers)
+    assert response.status_code == 200
+
+
+def test_chat_messages(benchmark, db, client, headers):
+    response = benchmark(client.get, "/api/chat/messages?user_id=user_1&limit=50", headers=headers)
+    assert response.status_code == 200
+    assert "Content-Encoding" in response.headers
+
+
+def test_user_uploads_not_modified(benchmark, db, client, headers):
+    """The 304 path: one version read instead of the listing query."""
+    etag = client.get("/api/user/user_uploads/user_0", headers=headers).headers["ETag"]
+    response = benchmark(client.get, "/api/user/user_uploads/user_0", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("verified", [True, False], ids=["cached", "verify"])
+def test_require_auth(benchmark, auth_token, verified):
+    """Token check alone: cached verification versus a full RS256 signature check."""
+    app = Flask(__name__)
+
+    @require_auth
+    def view():
+        return jsonify(request.current_user["id"])
+
+    token = auth_token("user_1")
+    environ = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def call():
+        if not verified:
+            clerk_auth.verified_tokens.clear()
+        with app.test_request_context(environ_base=environ):
+            return view()
+
+    assert benchmark(call).get_json() == "user_1"
@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+fitz = pytest.importorskip("fitz")
+
+from utils.thumbnails import generate_pdf_thumbnail  # noqa: E402
+
+
+@pytest.mark.parametrize("pages", [1, 20])
+def test_generate_pdf_thumbnail(benchmark, tmp_path, pages):
+    """Only the first page is rendered, so longer documents should cost about the same."""
+    pdf_path = os.path.join(tmp_path, "drawing.pdf")
+    document = fitz.open()
+    for i in range(pages):
+        document.new_page().insert_text((72, 72), f"Beehive page {i}")
+    document.save(pdf_path)
+
+    thumbnail = benchmark(generate_pdf_thumbnail, pdf_path, "drawing.pdf", str(tmp_path))
+    assert os.path.exists(thumbnail)
@@ -1,13 +1,47 @@
+import os
+import time
+from pathlib import Path
+
+import mongomock
 import pytest
-from app import app as flask_app
+from authlib.jose import JsonWebKey, KeySet
+
+# Events stay in this process; the default for several workers is the mongo bus
+os.environ.setdefault("EVENTS_BACKEND", "memory")
+
+from app import create_app
+from database import versiondatahandler
+from utils import clerk_auth
+
+BENCHMARKS = Path(__file__).parent / "benchmarks"
+
+
+def pytest_ignore_collect(collection_path, config):
+    """Benchmarks only run when asked for with --benchmark-only."""
+    if collection_path == BENCHMARKS and not config.getoption("benchmark_only", default=False):
+        return True
+    return None
 
 @pytest.fixture
 def app():
-    flask_app.config.update({
+    yield create_app({
         "TESTING": True,
         "SECRET_KEY": "beehive",
     })
-    yield flask_app
+
+@pytest.fixture(autouse=True)
+def versions(monkeypatch):
+    """Change counters in memory; nearly every write bumps one."""
+    collection = mongomock.MongoClient().beehive.versions
+
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    def bulk_write(operations, ordered=True):
+        for op in operations:
+            collection.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    monkeypatch.setattr(collection, "bulk_write", bulk_write)
+    monkeypatch.setattr(versiondatahandler, "beehive_version_collection", collection)
+    return collection
 
 @pytest.fixture
 def client(app):
@@ -16,3 +50,24 @@ def client(app):
 @pytest.fixture
 def runner(app):
     return app.test_cli_runner()
+
+@pytest.fixture(scope="session")
+def signing_key():
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": "test-key"})
+
+@pytest.fixture
+def auth_token(signing_key, monkeypatch):
+    """Sign Clerk-style session tokens with a test key served as the JWKS."""
+    public = JsonWebKey.import_key(signing_key.as_dict(is_private=False))
+    monkeypatch.setattr(clerk_auth, "fetch_jwks", lambda: KeySet([public]))
+    clerk_auth._jwks_cache.clear()
+    clerk_auth.verified_tokens.clear()
+
+    def sign(user_id, expires_in=60, key=signing_key, **claims):
+        now = int(time.time())
+        payload = {"sub": user_id, "iat": now, "exp": now + expires_in, **claims}
+        return clerk_auth.jwt.encode({"alg": "RS256", "kid": key.kid}, payload, key).decode()
+
+    yield sign
+    clerk_auth._jwks_cache.clear()
+    clerk_auth.verified_tokens.clear()
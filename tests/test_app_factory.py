@@ -0,0 +1,64 @@
+import subprocess
+import sys
+
+from app import create_app
+from oauth.flow import get_oauth_flow
+
+# Seconds for a fresh interpreter to import the app and build it; measured at about 0.5
+STARTUP_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = ("fitz", "PIL", "google_auth_oauthlib", "google.oauth2")
+
+STARTUP = """
+import sys, time
+started = time.perf_counter()
+import app
+flask_app = app.create_app({"TESTING": True})
+print(time.perf_counter() - started)
+from database import databaseConfig
+assert databaseConfig._client is None, "connected to MongoDB"
+assert "oauth_flow" not in flask_app.extensions
+loaded = [m for m in %r if m in sys.modules]
+assert not loaded, loaded
+"""
+
+
+def _startup_seconds():
+    result = subprocess.run([sys.executable, "-c", STARTUP % (HEAVY_MODULES,)],
+                            check=True, capture_output=True, text=True, timeout=60)
+    return float(result.stdout.strip())
+
+
+def test_startup_is_lazy_and_within_budget():
+    """Building the app loads no heavy library, makes no connection and stays under budget."""
+    # Best of three, so a busy machine does not fail the check
+    assert min(_startup_seconds() for _ in range(3)) < STARTUP_BUDGET_SECONDS
+
+
+def test_create_app_registers_every_blueprint():
+    app = create_app({"TESTING": True, "UPLOAD_FOLDER": "/tmp/uploads"})
+    assert app.testing and app.config["UPLOAD_FOLDER"] == "/tmp/uploads"
+    assert {"user", "admin", "notifications", "chat", "upload", "jobs", "media", "events",
+            "webhooks"} <= set(app.blueprints)
+    rules = {rule.rule: rule.endpoint for rule in app.url_map.iter_rules()}
+    assert rules["/api/user/upload/<user_id>"] == "user.upload_images"
+    assert rules["/api/admin/notifications"] == "notifications.get_admin_notifications"
+    assert rules["/api/chat/messages"] == "chat.get_chat_messages"
+
+
+def test_apps_are_independent():
+    first, second = create_app({"UPLOAD_FOLDER": "a"}), create_app()
+    assert first.config["UPLOAD_FOLDER"] == "a"
+    assert second.config["UPLOAD_FOLDER"] == "static/uploads"
+
+
+def test_oauth_flow_is_built_once_on_first_use(monkeypatch):
+    from google_auth_oauthlib.flow import Flow
+
+    calls = []
+    monkeypatch.setattr(Flow, "from_client_secrets_file", classmethod(lambda cls, **kwargs: calls.append(kwargs) or object()))
+    app = create_app({"CLIENT_SECRETS_FILE": "missing.json"})
+    assert calls == []
+
+    flow = get_oauth_flow(app)
+    assert get_oauth_flow(app) is flow
+    assert len(calls) == 1 and calls[0]["client_secrets_file"] == "missing.json"
@@ -0,0 +1,62 @@
+import array
+import math
+import os
+import wave
+
+import pytest
+
+from config import Config
+from utils import audio
+
+
+@pytest.fixture
+def no_ffmpeg(monkeypatch):
+    monkeypatch.setattr(Config, "FFMPEG_BINARY", "ffmpeg-not-installed")
+
+
+def _write_wav(path, seconds, rate=8000, channels=1):
+    samples = array.array("h")
+    for i in range(int(seconds * rate)):
+        value = int(16000 * math.sin(2 * math.pi * 440 * i / rate) * (i / (seconds * rate)))
+        samples.extend([value] * channels)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+
+def test_waveform_from_wav_without_ffmpeg(tmp_path, no_ffmpeg):
+    """16-bit WAV voice notes are measured with the standard library."""
+    path = os.path.join(tmp_path, "note.wav")
+    _write_wav(path, 2, channels=2)
+
+    duration, peaks = audio.waveform(path, peaks=50)
+
+    assert duration == 2.0
+    assert len(peaks) == 50
+    assert all(0 <= peak <= 1 for peak in peaks)
+    assert peaks[-1] > peaks[0]  # the test tone fades in
+
+
+def test_voice_note_is_kept_as_uploaded_without_ffmpeg(tmp_path, no_ffmpeg):
+    """Without ffmpeg the voice note is not transcoded but still gets metadata."""
+    path = os.path.join(tmp_path, "note.wav")
+    _write_wav(path, 1)
+
+    result = audio.process_voice_note(path, os.path.join(tmp_path, "note.m4a"))
+
+    assert result["transcoded"] is False
+    assert result["duration"] == 1.0
+    assert len(result["peaks"]) == Config.AUDIO_WAVEFORM_PEAKS
+
+
+def test_undecodable_voice_note_has_no_waveform(tmp_path, no_ffmpeg):
+    """Browser recordings that cannot be decoded locally are left without peaks."""
+    path = os.path.join(tmp_path, "note.webm")
+    with open(path, "wb") as f:
+        f.write(b"\x1aE\xdf\xa3 not really webm")
+
+    result = audio.process_voice_note(path, os.path.join(tmp_path, "note.m4a"))
+
+    assert result == {"transcoded": False, "duration": None, "peaks": []}
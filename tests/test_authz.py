@@ -0,0 +1,51 @@
+import datetime
+
+import mongomock
+import pytest
+from flask import request, session
+
+from database import admindatahandler
+from utils import authz
+
+
+@pytest.fixture
+def admins(monkeypatch):
+    collection = mongomock.MongoClient().beehive.admins
+    monkeypatch.setattr(admindatahandler, "beehive_admin_collection", collection)
+    monkeypatch.setattr(admindatahandler.databaseConfig, "get_beehive_admin_collection", lambda: collection)
+    authz.role_cache.clear()
+    lookups = []
+    find_one = collection.find_one
+    monkeypatch.setattr(collection, "find_one", lambda *a, **k: lookups.append(a) or find_one(*a, **k))
+    yield lookups
+    authz.role_cache.clear()
+
+
+def _is_admin(app, **session_values):
+    with app.test_request_context():
+        session.update(session_values)
+        return admindatahandler.is_admin()
+
+
+def test_admin_role_is_looked_up_once_and_invalidated_on_change(app, admins):
+    assert not _is_admin(app, google_id="g1")
+    assert not _is_admin(app, google_id="g1")
+    assert len(admins) == 1
+
+    admindatahandler.create_admin("Ada", "ada@example.com", "g1", datetime.datetime.now())
+    assert _is_admin(app, google_id="g1")
+    assert _is_admin(app, google_id="g1")
+    assert len(admins) == 2
+
+
+def test_only_admin_records_and_allowed_emails_make_an_admin(app, admins, monkeypatch):
+    """A role stored on a session user or carried by a Clerk token does not grant admin."""
+    monkeypatch.setattr("oauth.config.ALLOWED_EMAILS", ["boss@example.com"])
+    monkeypatch.setattr("database.userdatahandler.get_user_by_username", lambda name: {"role": "admin"})
+
+    assert _is_admin(app, email="boss@example.com")
+    assert not _is_admin(app, email="someone@example.com")
+    assert not _is_admin(app, username="legacy_admin")
+    with app.test_request_context():
+        request.current_user = {"id": "user_1", "claims": {"role": "admin"}}
+        assert not admindatahandler.is_admin()
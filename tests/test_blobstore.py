@@ -0,0 +1,111 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from utils import blobstore
+
+
+@pytest.fixture
+def blobs(monkeypatch):
+    """In-memory stand-in for the blobs collection."""
+    records = {}
+
+    def add_blob_reference(digest, path, size):
+        previous = dict(records[digest]) if digest in records else None
+        record = records.setdefault(digest, {"_id": digest, "path": path, "size": size, "refs": 0})
+        record["refs"] += 1
+        return previous
+
+    def release_blob_reference(digest):
+        record = records.get(digest)
+        if not record or record["refs"] <= 0:
+            return None
+        record["refs"] -= 1
+        return dict(record)
+
+    def delete_unreferenced_blob(digest):
+        if digest in records and records[digest]["refs"] <= 0:
+            del records[digest]
+            return True
+        return False
+
+    monkeypatch.setattr(blobstore, "add_blob_reference", add_blob_reference)
+    monkeypatch.setattr(blobstore, "release_blob_reference", release_blob_reference)
+    monkeypatch.setattr(blobstore, "delete_unreferenced_blob", delete_unreferenced_blob)
+    monkeypatch.setattr(blobstore, "get_blob", records.get)
+    return records
+
+
+def test_blob_is_stored_under_sharded_content_hash(tmp_path, blobs):
+    """Blobs are named by SHA-256 in an ab/cd/<hash> layout."""
+    data = b"scanned drawing"
+    digest = hashlib.sha256(data).hexdigest()
+
+    stored = blobstore.store_stream(io.BytesIO(data), "jpg", str(tmp_path))
+
+    assert stored.digest == digest
+    assert stored.filename == f"{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    assert stored.created
+    with open(os.path.join(tmp_path, stored.filename), "rb") as f:
+        assert f.read() == data
+
+
+def test_identical_uploads_share_one_blob(tmp_path, blobs):
+    """A second identical upload only adds a reference."""
+    first = blobstore.store_bytes(b"same bytes", "png", str(tmp_path))
+    second = blobstore.store_stream(io.BytesIO(b"same bytes"), "png", str(tmp_path))
+
+    assert second.filename == first.filename
+    assert not second.created
+    assert blobs[first.digest]["refs"] == 2
+    assert os.listdir(os.path.join(tmp_path, ".tmp")) == []
+
+
+def test_blob_is_reclaimed_with_last_reference(tmp_path, blobs):
+    """Files and their thumbnails are removed only when nothing references them."""
+    stored = blobstore.store_bytes(b"%PDF-1.4", "pdf", str(tmp_path))
+    blobstore.store_bytes(b"%PDF-1.4", "pdf", str(tmp_path))
+    thumbnail = blobstore.thumbnail_path(stored.filename, str(tmp_path))
+    os.makedirs(os.path.dirname(thumbnail))
+    open(thumbnail, "wb").close()
+
+    assert not blobstore.release(stored.digest, str(tmp_path))
+    assert os.path.exists(os.path.join(tmp_path, stored.filename))
+
+    assert blobstore.release(stored.digest, str(tmp_path))
+    assert not os.path.exists(os.path.join(tmp_path, stored.filename))
+    assert not os.path.exists(thumbnail)
+    assert stored.digest not in blobs
+
+
+def test_an_upload_racing_the_last_release_keeps_its_file(tmp_path, blobs, monkeypatch):
+    """A blob stored again right after its record is deleted is not removed by the release."""
+    stored = blobstore.store_bytes(b"voice", "webm", str(tmp_path))
+    delete_unreferenced_blob = blobstore.delete_unreferenced_blob
+
+    def deleted_then_stored_again(digest):
+        deleted = delete_unreferenced_blob(digest)
+        blobstore.store_bytes(b"voice", "webm", str(tmp_path))
+        return deleted
+
+    monkeypatch.setattr(blobstore, "delete_unreferenced_blob", deleted_then_stored_again)
+    assert not blobstore.release(stored.digest, str(tmp_path))
+    with open(os.path.join(tmp_path, stored.filename), "rb") as f:
+        assert f.read() == b"voice"
+    assert blobs[stored.digest]["refs"] == 1
+    assert os.listdir(os.path.join(tmp_path, ".tmp")) == []
+
+
+def test_keep_source_leaves_original_file(tmp_path, blobs):
+    """keep_source stores a copy and leaves the source in place."""
+    source = os.path.join(tmp_path, "upload.part")
+    with open(source, "wb") as f:
+        f.write(b"chunked")
+
+    stored = blobstore.store_file(source, "gif", hashlib.sha256(b"chunked").hexdigest(), str(tmp_path),
+                                  keep_source=True)
+
+    assert os.path.exists(source)
+    assert os.path.exists(os.path.join(tmp_path, stored.filename))
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from utils.cache import TTLCache, cache_stats
+
+
+def test_ttl_lru_and_metrics():
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    loads = []
+
+    def load(keys):
+        loads.append(list(keys))
+        return {key: key.upper() for key in keys}
+
+    assert cache.get_many(["a", "b"], load) == {"a": "A", "b": "B"}
+    assert cache.get("a", lambda: "never") == "A"
+    # "b" is least recently used and makes room for "c"
+    cache.get_many(["c"], load)
+    cache.get_many(["b"], load)
+    assert loads == [["a", "b"], ["c"], ["b"]]
+    assert cache_stats()["test_lru"] == {
+        "hits": 1, "stale_hits": 0, "misses": 4, "loads": 3, "load_errors": 0,
+        "evictions": 2, "size": 2, "maxsize": 2, "hit_rate": 0.2
+    }
+
+
+def test_stale_entries_are_served_while_refreshing():
+    cache = TTLCache("test_stale", maxsize=10, ttl=0.05, stale_ttl=60)
+    cache.set("user", "old")
+    time.sleep(0.06)
+    refreshed = threading.Event()
+
+    def slow_load(keys):
+        refreshed.wait(5)
+        return {"user": "new"}
+
+    started = time.monotonic()
+    assert cache.get("user", lambda: slow_load(["user"])["user"]) == "old"
+    assert time.monotonic() - started < 1
+    refreshed.set()
+    for _ in range(100):
+        if cache.get("user", lambda: "miss") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("user", lambda: "miss") == "new"
+
+
+def test_failed_refresh_keeps_stale_value():
+    cache = TTLCache("test_failed", maxsize=10, ttl=0.01, stale_ttl=60)
+    cache.set("user", "old")
+    time.sleep(0.02)
+
+    def failing(keys):
+        raise RuntimeError("upstream down")
+
+    assert cache.get_many(["user"], failing) == {"user": "old"}
+    for _ in range(100):
+        if cache.metrics["load_errors"]:
+            break
+        time.sleep(0.01)
+    assert cache.get_many(["user"], failing) == {"user": "old"}
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache("test_single_flight", maxsize=10, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def load(keys):
+        calls.append(keys)
+        release.wait(5)
+        return {key: len(calls) for key in keys}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_many(["k"], load))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [["k"]]
+    assert results == [{"k": 1}] * 5
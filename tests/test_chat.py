@@ -0,0 +1,70 @@
+import datetime
+
+import mongomock
+import pytest
+
+from database import chatdatahandler
+
+START = datetime.datetime(2025, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    collection = mongomock.MongoClient().beehive.messages
+    monkeypatch.setattr(chatdatahandler, "beehive_message_collection", collection)
+    return collection
+
+
+def _send(count, offset=0):
+    for i in range(offset, offset + count):
+        # Every other message shares its millisecond with the previous one
+        timestamp = START + datetime.timedelta(seconds=i // 2)
+        if i % 3:
+            chatdatahandler.save_chat_message("user_1", "user", "admin", "admin", f"m{i}", timestamp)
+        else:
+            chatdatahandler.save_chat_message("admin_1", "admin", "user_1", "user", f"m{i}", timestamp)
+    chatdatahandler.save_chat_message("user_2", "user", "admin", "admin", "elsewhere", START)
+
+
+def test_latest_page_and_history(messages):
+    """The first load is the newest page; before cursors walk back to the start."""
+    _send(25)
+
+    page, since_cursor, before_cursor = chatdatahandler.get_conversation("user_1", limit=10)
+    assert [m["content"] for m in page] == [f"m{i}" for i in range(15, 25)]
+    assert since_cursor is not None
+
+    history = page
+    while before_cursor:
+        page, _, before_cursor = chatdatahandler.get_conversation("user_1", before=before_cursor, limit=10)
+        history = page + history
+    assert [m["content"] for m in history] == [f"m{i}" for i in range(25)]
+
+
+def test_poll_returns_only_new_messages(messages):
+    """A poll with no new messages reads nothing and keeps its cursor."""
+    _send(5)
+    _, since_cursor, _ = chatdatahandler.get_conversation("user_1")
+
+    page, cursor, _ = chatdatahandler.get_conversation("user_1", since=since_cursor)
+    assert page == []
+    assert cursor == since_cursor
+
+    _send(3, offset=5)
+    page, cursor, _ = chatdatahandler.get_conversation("user_1", since=since_cursor)
+    assert [m["content"] for m in page] == ["m5", "m6", "m7"]
+    assert chatdatahandler.get_conversation("user_1", since=cursor)[0] == []
+
+
+def test_poll_catches_a_message_that_commits_late(messages):
+    """A message stamped before one already read is still delivered by the next poll."""
+    now = datetime.datetime.now()
+    chatdatahandler.save_chat_message("user_1", "user", "admin", "admin", "old", now - datetime.timedelta(minutes=1))
+    chatdatahandler.save_chat_message("user_1", "user", "admin", "admin", "fast", now)
+    page, since_cursor, _ = chatdatahandler.get_conversation("user_1")
+    assert [m["content"] for m in page] == ["old", "fast"]
+
+    # Stamped before "fast" but only written after it was read
+    chatdatahandler.save_chat_message("admin_1", "admin", "user_1", "user", "slow", now - datetime.timedelta(milliseconds=5))
+    page, _, _ = chatdatahandler.get_conversation("user_1", since=since_cursor)
+    assert [m["content"] for m in page] == ["slow", "fast"]
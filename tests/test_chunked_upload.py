@@ -0,0 +1,97 @@
+import hashlib
+import io
+
+import mongomock
+import pytest
+
+from config import Config
+from database import uploadsessiondatahandler
+from routes import uploadroutes
+from utils import chunked_upload
+
+
+@pytest.fixture
+def session_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_SESSION_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+def _upload(upload_id, data, chunk_size, order):
+    chunked_upload.allocate_part_file(upload_id, len(data))
+    total = -(-len(data) // chunk_size)
+    for index in order(range(total)):
+        length = chunked_upload.chunk_length(index, len(data), chunk_size)
+        body = data[index * chunk_size:index * chunk_size + length]
+        chunked_upload.write_chunk(upload_id, index, chunk_size, length, io.BytesIO(body))
+    return total
+
+
+def test_in_order_chunks_assemble_file(session_folder):
+    """Chunks written in order produce the original bytes and digest."""
+    data = bytes(range(256)) * 41
+    total = _upload("in-order", data, 1000, list)
+
+    assert chunked_upload.file_digest("in-order", total) == hashlib.sha256(data).hexdigest()
+    with open(chunked_upload.part_path("in-order"), "rb") as f:
+        assert f.read() == data
+
+
+def test_out_of_order_chunks_fall_back_to_file_digest(session_folder):
+    """Chunks written out of order are still hashed correctly at finalize."""
+    data = b"beehive" * 1000
+    total = _upload("reversed", data, 1024, reversed)
+
+    assert chunked_upload.file_digest("reversed", total) == hashlib.sha256(data).hexdigest()
+
+
+def test_short_chunk_is_rejected(session_folder):
+    """A chunk that does not match its expected length raises ChunkError."""
+    chunked_upload.allocate_part_file("short", 2048)
+    with pytest.raises(chunked_upload.ChunkError):
+        chunked_upload.write_chunk("short", 0, 1024, 1024, io.BytesIO(b"x" * 10))
+
+
+def test_oversized_chunk_is_rejected(session_folder):
+    """A chunk body longer than the chunk size raises ChunkError."""
+    chunked_upload.allocate_part_file("long", 2048)
+    with pytest.raises(chunked_upload.ChunkError):
+        chunked_upload.write_chunk("long", 0, 1024, 1024, io.BytesIO(b"x" * 2000))
+
+
+def test_chunk_checksum_mismatch_is_rejected(session_folder):
+    """A client-supplied chunk checksum must match the streamed bytes."""
+    chunked_upload.allocate_part_file("checksum", 4)
+    with pytest.raises(chunked_upload.ChunkError):
+        chunked_upload.write_chunk("checksum", 0, 4, 4, io.BytesIO(b"abcd"), expected_sha256="0" * 64)
+
+
+def test_checksum_mismatch_lets_the_client_send_every_chunk_again(client, auth_token, session_folder, monkeypatch):
+    """After a failed finalize, re-sent chunks are written instead of skipped as duplicates."""
+    monkeypatch.setattr(uploadsessiondatahandler, "beehive_upload_session_collection",
+                        mongomock.MongoClient().beehive.upload_sessions)
+    monkeypatch.setattr(uploadroutes.blobstore, "store_file", lambda path, ext, digest, keep_source: digest)
+    monkeypatch.setattr(uploadroutes, "finish_uploads",
+                        lambda *args: [{"filename": "drawing.png", "sha256": args[2][0].stored}])
+    headers = {"Authorization": f"Bearer {auth_token('user_1')}"}
+    data = b"beehive!" * 64 * 1024
+    base = "/api/user/upload/user_1/sessions"
+
+    upload = client.post(base, headers=headers, json={
+        "filename": "drawing.png", "size": len(data), "title": "Drawing", "description": "desc",
+        "chunk_size": 256 * 1024, "sha256": hashlib.sha256(data).hexdigest()}).get_json()
+    chunks = range(upload["total_chunks"])
+
+    def send(payload):
+        for index in chunks:
+            body = payload[index * upload["chunk_size"]:(index + 1) * upload["chunk_size"]]
+            client.put(f"{base}/{upload['upload_id']}/chunks/{index}", headers=headers, data=body)
+
+    send(b"x" * len(data))
+    mismatch = client.post(f"{base}/{upload['upload_id']}/finalize", headers=headers)
+    assert mismatch.status_code == 422
+    assert client.get(f"{base}/{upload['upload_id']}", headers=headers).get_json()["received"] == []
+
+    send(data)
+    finalized = client.post(f"{base}/{upload['upload_id']}/finalize", headers=headers)
+    assert finalized.status_code == 200
+    assert finalized.get_json()["sha256"] == hashlib.sha256(data).hexdigest()
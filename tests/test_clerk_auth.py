@@ -0,0 +1,54 @@
+import pytest
+from authlib.jose import JsonWebKey, KeySet
+
+from config import Config
+from utils import clerk_auth
+
+STREAM = "/api/events/stream?channels=everything"
+
+
+def _get(client, token):
+    # An unknown channel is a 400 once authenticated, so the handler returns immediately
+    return client.get(STREAM, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_valid_tokens_are_verified_once(client, auth_token, monkeypatch):
+    token = auth_token("user_1")
+    verifications = []
+    verify = clerk_auth.verify_token
+    monkeypatch.setattr(clerk_auth, "verify_token", lambda t: verifications.append(t) or verify(t))
+
+    assert _get(client, token).status_code == 400
+    assert _get(client, token).status_code == 400
+    assert len(verifications) == 1
+
+
+@pytest.mark.parametrize("make_token", [
+    lambda sign: sign("user_1", expires_in=-60),
+    lambda sign: sign("user_1")[:-4] + "AAAA",
+    lambda sign: "header.eyJzdWIiOiAidXNlcl8xIn0.signature",
+    lambda sign: sign("user_1", key=JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": "test-key"})),
+], ids=["expired", "tampered", "unsigned", "wrong-key"])
+def test_invalid_tokens_are_rejected(client, auth_token, make_token):
+    assert _get(client, make_token(auth_token)).status_code == 401
+
+
+def test_authorized_party_is_checked(client, auth_token, monkeypatch):
+    monkeypatch.setattr(Config, "CLERK_AUTHORIZED_PARTIES", ["http://localhost:5173"])
+    assert _get(client, auth_token("user_1", azp="http://localhost:5173")).status_code == 400
+    assert _get(client, auth_token("user_1", azp="https://evil.example")).status_code == 401
+
+
+def test_rotated_keys_are_refetched(client, auth_token, signing_key, monkeypatch):
+    rotated = JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": "rotated"})
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return KeySet([JsonWebKey.import_key(k.as_dict(is_private=False)) for k in (signing_key, rotated)])
+
+    assert _get(client, auth_token("user_1")).status_code == 400
+    monkeypatch.setattr(clerk_auth, "fetch_jwks", fetch)
+    monkeypatch.setattr(clerk_auth, "_last_jwks_fetch", 0.0)
+    assert _get(client, auth_token("user_2", key=rotated)).status_code == 400
+    assert len(fetches) == 1
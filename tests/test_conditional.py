@@ -0,0 +1,104 @@
+import gzip
+import json
+
+import mongomock
+import pytest
+from flask import jsonify
+
+from config import Config
+from database import userdatahandler, versiondatahandler
+from database.versiondatahandler import IMAGES, USERS
+
+
+@pytest.fixture
+def json_app(app):
+    @app.route("/test/items")
+    def items():
+        return jsonify({"items": [{"n": i, "name": f"item {i}"} for i in range(int(app.config["ITEMS"]))]})
+
+    app.config["ITEMS"] = 200
+    return app
+
+
+def test_get_json_gets_a_weak_etag_and_304(json_app):
+    client = json_app.test_client()
+    first = client.get("/test/items")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get("/test/items", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+    json_app.config["ITEMS"] = 3
+    changed = client.get("/test/items", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_large_json_is_gzipped_when_accepted(json_app):
+    client = json_app.test_client()
+    plain = client.get("/test/items")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    compressed = client.get("/test/items", headers={"Accept-Encoding": "gzip, deflate"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert int(compressed.headers["Content-Length"]) < len(plain.get_data())
+    assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+    # Weak validators are shared by both encodings
+    assert compressed.headers["ETag"] == plain.headers["ETag"]
+
+
+def test_small_json_is_not_compressed(json_app):
+    json_app.config["ITEMS"] = 1
+    response = json_app.test_client().get("/test/items", headers={"Accept-Encoding": "gzip"})
+    assert len(response.get_data()) < Config.COMPRESS_MIN_BYTES
+    assert "Content-Encoding" not in response.headers
+
+
+def test_bump_versions(versions):
+    assert versiondatahandler.get_versions(IMAGES, USERS) == (0, 0)
+    versiondatahandler.bump_versions(IMAGES)
+    versiondatahandler.bump_versions(IMAGES, USERS)
+    assert versiondatahandler.get_versions(USERS, IMAGES) == (1, 2)
+
+
+def test_version_keyed_list_skips_the_query(client, auth_token, monkeypatch):
+    """A matching ETag is answered from the version counter; any image write invalidates it."""
+    calls = []
+
+    def get_images_by_user(user_id, limit, cursor):
+        calls.append(user_id)
+        return [{"id": "1", "title": "Drawing"}], None
+
+    monkeypatch.setattr("routes.userroutes.get_images_by_user", get_images_by_user)
+    headers = {"Authorization": f"Bearer {auth_token('user_1')}"}
+    url = "/api/user/user_uploads/user_1"
+
+    etag = client.get(url, headers=headers).headers["ETag"]
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert calls == ["user_1"]
+
+    # Another page of the same list has its own ETag
+    assert client.get(f"{url}?limit=5", headers={**headers, "If-None-Match": etag}).status_code == 200
+    assert len(calls) == 2
+
+    versiondatahandler.bump_versions(IMAGES)
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert len(calls) == 3
+
+
+def test_image_writes_bump_the_images_version(versions, monkeypatch):
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", db.images)
+    monkeypatch.setattr(userdatahandler, "record_images", lambda images, sign=1: None)
+    monkeypatch.setattr(userdatahandler, "record_image_change", lambda before, after: None)
+
+    image_id = userdatahandler.save_image("user_1", "page.jpg", "Drawing", "desc", None)
+    userdatahandler.update_image(image_id, "Renamed", "desc", None)
+    userdatahandler.set_image_status(image_id, "ready")
+    userdatahandler.delete_image(image_id)
+    assert versiondatahandler.get_versions(IMAGES) == (4,)
@@ -0,0 +1,82 @@
+import subprocess
+import sys
+
+import pytest
+
+from config import Config
+from database import databaseConfig
+
+
+class FakeClient:
+    created = []
+
+    def __init__(self, uri, **options):
+        self.uri = uri
+        self.options = options
+        self.databases = []
+        FakeClient.created.append(self)
+
+    def get_database(self, name, **options):
+        database = {"name": name, **options}
+        self.databases.append(database)
+        return FakeDatabase(name)
+
+    def close(self):
+        pass
+
+
+class FakeDatabase(dict):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def __missing__(self, collection):
+        return f"{self.name}.{collection}"
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeClient.created = []
+    monkeypatch.setattr(databaseConfig, "MongoClient", FakeClient)
+    monkeypatch.setattr(Config, "MONGO_READ_PREFERENCE", "secondaryPreferred")
+    monkeypatch.setattr(Config, "MONGO_WRITE_CONCERN", "majority")
+    databaseConfig.close_client()
+    yield FakeClient
+    databaseConfig.close_client()
+
+
+def test_importing_the_app_does_not_connect():
+    code = "import app; from database import databaseConfig; assert databaseConfig._client is None"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, timeout=60)
+
+
+def test_client_is_created_once_per_process_from_config(fake_client, monkeypatch):
+    collection = databaseConfig.get_beehive_image_collection()
+    assert fake_client.created == []
+
+    assert databaseConfig.get_client() is databaseConfig.get_client()
+    client = fake_client.created[0]
+    assert client.options["maxPoolSize"] == Config.MONGO_MAX_POOL_SIZE
+    assert client.options["serverSelectionTimeoutMS"] == Config.MONGO_SERVER_SELECTION_TIMEOUT_MS
+    assert client.databases[0]["read_preference"].mongos_mode == "secondaryPreferred"
+    assert client.databases[0]["write_concern"].document == {"w": "majority"}
+    assert collection.upper() == "BEEHIVE.IMAGES"
+
+    # A forked child sees a different pid and builds its own client
+    monkeypatch.setattr(databaseConfig.os, "getpid", lambda: -1)
+    assert databaseConfig.get_client() is not client
+    assert len(fake_client.created) == 2
+    assert databaseConfig.pool_stats.snapshot()["open"] == 0
+
+
+def test_pool_stats_count_connection_events():
+    stats = databaseConfig.PoolStats()
+    for _ in range(3):
+        stats.connection_created(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    stats.connection_closed(None)
+
+    snapshot = stats.snapshot()
+    assert (snapshot["open"], snapshot["checked_out"], snapshot["checkouts"]) == (2, 1, 2)
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from utils.derivatives import DerivativeCache, bucket_width, render
+
+
+def _write(size):
+    def create(destination):
+        with open(destination, "wb") as f:
+            f.write(b"x" * size)
+    return create
+
+
+def test_width_is_bucketed():
+    """Requested widths round up to a configured size."""
+    assert bucket_width(300) == 320
+    assert bucket_width(320) == 320
+    assert bucket_width(10000) == 1920
+
+
+def test_render_resizes_without_upscaling(tmp_path):
+    """Derivatives keep the aspect ratio and never exceed the original size."""
+    source = os.path.join(tmp_path, "original.png")
+    Image.new("RGBA", (1000, 500), (255, 0, 0, 128)).save(source)
+
+    render(source, os.path.join(tmp_path, "small.webp"), 320, "webp")
+    render(source, os.path.join(tmp_path, "large.jpg"), 1920, "jpeg")
+
+    with Image.open(os.path.join(tmp_path, "small.webp")) as small:
+        assert small.format == "WEBP"
+        assert small.size == (320, 160)
+    with Image.open(os.path.join(tmp_path, "large.jpg")) as large:
+        assert large.format == "JPEG"
+        assert large.size == (1000, 500)
+
+
+def test_decompression_bomb_is_a_decode_error(tmp_path, monkeypatch):
+    """Images over Pillow's pixel limit fail like any undecodable file, so the route falls back."""
+    source = os.path.join(tmp_path, "huge.png")
+    Image.new("RGB", (100, 100)).save(source)
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    with pytest.raises(OSError):
+        render(source, os.path.join(tmp_path, "small.webp"), 320, "webp")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """The cache drops the least recently used entries once it is over its size budget."""
+    cache = DerivativeCache(str(tmp_path), max_bytes=250)
+    first = cache.get_or_create("aa-first", _write(100))
+    second = cache.get_or_create("bb-second", _write(100))
+    cache.get_or_create("aa-first", _write(100))  # hit, becomes most recently used
+    cache.get_or_create("cc-third", _write(100))
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert cache.stats()["bytes"] == 200
+
+
+def test_concurrent_misses_render_once(tmp_path):
+    """Many simultaneous requests for one missing derivative trigger a single render."""
+    cache = DerivativeCache(str(tmp_path), max_bytes=10_000)
+    renders = []
+
+    def slow_create(destination):
+        renders.append(destination)
+        time.sleep(0.05)
+        _write(10)(destination)
+
+    threads = [threading.Thread(target=cache.get_or_create, args=("dd-herd", slow_create)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(renders) == 1
+    assert os.path.exists(cache.path("dd-herd"))
@@ -0,0 +1,97 @@
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from database import databaseConfig
+from utils import http_client, lifecycle
+
+
+class FakeAdmin:
+    def __init__(self, error=None):
+        self.error = error
+
+    def command(self, name):
+        if self.error:
+            raise self.error
+        return {"ok": 1}
+
+
+@pytest.fixture(autouse=True)
+def no_worker(monkeypatch):
+    monkeypatch.setattr(lifecycle, "_worker", None)
+
+
+def test_healthz_needs_no_database(client, monkeypatch):
+    monkeypatch.setattr(databaseConfig, "get_client", lambda: pytest.fail("liveness must not touch MongoDB"))
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+def test_readyz_pings_mongo(client, monkeypatch):
+    monkeypatch.setattr(databaseConfig, "get_client", lambda: SimpleNamespace(admin=FakeAdmin()))
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["mongo"] == "ok"
+
+
+def test_readyz_fails_when_mongo_is_unreachable(client, monkeypatch):
+    error = RuntimeError("No servers found")
+    monkeypatch.setattr(databaseConfig, "get_client", lambda: SimpleNamespace(admin=FakeAdmin(error)))
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "unavailable", "mongo": "No servers found"}
+
+
+def test_readyz_fails_while_the_worker_drains(client, monkeypatch):
+    monkeypatch.setattr(databaseConfig, "get_client", lambda: SimpleNamespace(admin=FakeAdmin()))
+    monkeypatch.setattr(lifecycle, "_worker", SimpleNamespace(pid=os.getpid(), alive=False))
+    assert client.get("/readyz").status_code == 503
+
+
+def test_gunicorn_settings_come_from_config():
+    settings = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py"))
+    assert settings["workers"] == Config.WEB_WORKERS
+    assert settings["threads"] == Config.WEB_THREADS
+    assert settings["timeout"] == Config.WEB_TIMEOUT
+    assert settings["graceful_timeout"] == Config.WEB_GRACEFUL_TIMEOUT
+    assert settings["preload_app"] is True
+
+
+def test_gunicorn_refuses_memory_events_with_several_workers(monkeypatch):
+    """In-process events would never reach streams held by another worker."""
+    settings = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py"))
+    monkeypatch.setattr(Config, "EVENTS_BACKEND", "memory")
+    settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+    with pytest.raises(RuntimeError, match="EVENTS_BACKEND"):
+        settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+
+    monkeypatch.setattr(Config, "EVENTS_BACKEND", "mongo")
+    settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+
+
+
+def test_events_backend_defaults_to_mongo_with_several_workers(monkeypatch):
+    """A plain `gunicorn wsgi:app` must pass its own startup check."""
+    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.py")
+    monkeypatch.delenv("EVENTS_BACKEND", raising=False)
+    for workers, backend in (("1", "memory"), ("4", "mongo")):
+        monkeypatch.setenv("WEB_WORKERS", workers)
+        assert runpy.run_path(config_path)["Config"].EVENTS_BACKEND == backend
+
+def test_post_fork_rebuilds_pools(monkeypatch):
+    """A new worker drops the HTTP session and Mongo client it inherited."""
+    closed = []
+    monkeypatch.setattr(databaseConfig, "close_client", lambda: closed.append(True))
+    session = http_client.client.session
+    worker = SimpleNamespace(pid=os.getpid(), alive=True)
+
+    lifecycle.worker_started(worker)
+    assert closed == [True]
+    assert http_client.client.session is not session
+    assert not lifecycle.is_draining()
+    worker.alive = False
+    assert lifecycle.is_draining()
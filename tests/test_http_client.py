@@ -0,0 +1,92 @@
+import os
+
+import pytest
+import requests
+
+from config import Config
+from utils.http_client import CircuitOpenError, HTTPClient
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class FakeSession:
+    """Plays back `outcomes` (status codes or exceptions) one call at a time."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def _client(outcomes, retries=2):
+    client = HTTPClient(retries=retries, backoff=0)
+    client._session, client._pid = FakeSession(outcomes), os.getpid()
+    return client
+
+
+def test_retries_transient_failures_with_host_timeouts():
+    client = _client([requests.ConnectionError("reset"), 503, 200])
+    assert client.get("https://api.clerk.com/v1/users").status_code == 200
+    assert [call[2] for call in client.session.calls] == [Config.HTTP_TIMEOUTS["api.clerk.com"]] * 3
+
+    stats = client.stats()["api.clerk.com"]
+    assert (stats["error"], stats["ok"], stats["circuit"]) == (2, 1, "closed")
+    assert stats["p50_ms"] is not None
+
+
+def test_posts_are_not_retried():
+    client = _client([requests.Timeout("slow")])
+    with pytest.raises(requests.Timeout):
+        client.post("https://api.clerk.com/v1/users")
+    assert len(client.session.calls) == 1
+
+
+def test_circuit_opens_then_lets_one_trial_through(monkeypatch):
+    monkeypatch.setattr(Config, "HTTP_BREAKER_FAILURES", 3)
+    monkeypatch.setattr(Config, "HTTP_BREAKER_RESET_SECONDS", 60)
+    client = _client([500, 500, 500, 200], retries=0)
+    for _ in range(3):
+        assert client.get("https://api.clerk.com/v1/users").status_code == 500
+
+    # Open: fails fast without touching the network
+    with pytest.raises(CircuitOpenError):
+        client.get("https://api.clerk.com/v1/users")
+    assert len(client.session.calls) == 3
+    assert client.stats()["api.clerk.com"]["circuit"] == "open"
+
+    breaker = client._breakers["api.clerk.com"]
+    breaker.opened_at -= 60
+    assert client.get("https://api.clerk.com/v1/users").status_code == 200
+    assert client.stats()["api.clerk.com"]["circuit"] == "closed"
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ChunkedEncodingError("cut"),
+                                   requests.TooManyRedirects("loop"), ValueError("bad body")])
+def test_failed_trial_of_any_kind_reopens_the_circuit(monkeypatch, error):
+    """A trial call that fails with anything must not leave the circuit stuck half-open."""
+    monkeypatch.setattr(Config, "HTTP_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(Config, "HTTP_BREAKER_RESET_SECONDS", 60)
+    client = _client([500, error, 200], retries=2)
+    assert client.post("https://api.clerk.com/v1/users").status_code == 500
+    breaker = client._breakers["api.clerk.com"]
+
+    breaker.opened_at -= 60
+    with pytest.raises(type(error)):
+        client.get("https://api.clerk.com/v1/users")
+    # Not retried, and the circuit is open again rather than stuck with a trial in flight
+    assert len(client.session.calls) == 2
+    assert breaker.state == "open" and not breaker._trial
+
+    breaker.opened_at -= 60
+    assert client.get("https://api.clerk.com/v1/users").status_code == 200
+    assert breaker.state == "closed"
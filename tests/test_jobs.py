@@ -0,0 +1,110 @@
+import datetime
+import os
+
+import fitz
+import mongomock
+import pytest
+
+from config import Config
+from database import jobdatahandler
+from utils import jobs
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = {"complete": [], "failed": [], "status": []}
+    monkeypatch.setattr(jobs, "complete_job", lambda job, result=None: calls["complete"].append((job["_id"], result)) or True)
+    monkeypatch.setattr(jobs, "fail_job", lambda job, error: calls["failed"].append(job["_id"]) or False)
+    monkeypatch.setattr(jobs, "set_image_status", lambda image_id, status, **fields: calls["status"].append((image_id, status, fields)))
+    return calls
+
+
+def _queue(monkeypatch, *queued):
+    pending = list(queued)
+    monkeypatch.setattr(jobs, "claim_next_job", lambda worker_id: pending.pop(0) if pending else None)
+
+
+def _make_pdf(path):
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), "Beehive")
+    document.save(path)
+
+
+def test_pdf_thumbnail_job_runs_in_process_pool(tmp_path, monkeypatch, recorded):
+    """A queued thumbnail job is rendered out of process and marks the image ready."""
+    pdf_path = os.path.join(tmp_path, "drawing.pdf")
+    _make_pdf(pdf_path)
+    _queue(monkeypatch, {
+        "_id": "job-1",
+        "kind": "pdf_thumbnail",
+        "image_id": "image-1",
+        "payload": {"pdf_path": pdf_path, "filename": "drawing.pdf", "upload_folder": str(tmp_path)},
+    })
+
+    runner = jobs.JobRunner(max_workers=1, poll_interval=0.05)
+    runner.ensure_started()
+    try:
+        for _ in range(200):
+            if recorded["complete"] or recorded["failed"]:
+                break
+            runner._stopping.wait(0.05)
+    finally:
+        runner.shutdown()
+
+    assert recorded["complete"] == [("job-1", {"thumbnail": os.path.join("thumbnails", "drawing.jpg")})]
+    assert recorded["status"][0][:2] == ("image-1", "ready")
+    assert os.path.exists(os.path.join(tmp_path, "thumbnails", "drawing.jpg"))
+
+
+def test_unknown_job_kind_fails_and_marks_image(monkeypatch, recorded):
+    """Jobs without a handler fail without reaching the process pool."""
+    runner = jobs.JobRunner(max_workers=1)
+    runner._slots.acquire()
+    runner._dispatch({"_id": "job-2", "kind": "nope", "image_id": "image-2", "payload": {}})
+
+    assert recorded["failed"] == ["job-2"]
+    assert recorded["status"] == [("image-2", "failed", {})]
+
+
+def test_a_renewed_lease_keeps_the_job_and_a_lost_one_drops_the_result(monkeypatch):
+    """A running job is not reclaimed while its worker renews the lease; a stale worker cannot finish it."""
+    collection = mongomock.MongoClient().beehive.jobs
+    monkeypatch.setattr(jobdatahandler, "beehive_job_collection", collection)
+    monkeypatch.setattr(Config, "JOB_LEASE_SECONDS", 60)
+    jobdatahandler.enqueue_job("user_index_sync", {"full": True})
+    first = jobdatahandler.claim_next_job("web-1")
+
+    def expire_lease():
+        collection.update_one({"_id": first["_id"]}, {"$set": {"lease_expires_at": datetime.datetime.now() - datetime.timedelta(seconds=1)}})
+
+    expire_lease()
+    jobdatahandler.renew_job_leases("web-1", [first["_id"]])
+    assert jobdatahandler.claim_next_job("web-2") is None
+
+    expire_lease()
+    second = jobdatahandler.claim_next_job("web-2")
+    assert second["worker_id"] == "web-2"
+    assert not jobdatahandler.complete_job(first, {"users": 1})
+    assert jobdatahandler.fail_job(first, "boom") is None
+    assert jobdatahandler.complete_job(second, {"users": 2})
+    assert collection.find_one({"_id": first["_id"]})["result"] == {"users": 2}
+
+
+def test_job_status_waits_are_capped_and_bounded(monkeypatch):
+    from routes import jobroutes
+
+    monkeypatch.setattr(jobroutes, "WAIT_POLL_SECONDS", 0.01)
+    loads = []
+    running = lambda: loads.append(1) or {"status": "running"}
+    is_done = lambda job: job["status"] in jobroutes.TERMINAL_JOB_STATUSES
+
+    assert jobroutes._poll(running, is_done, 0.05) == {"status": "running"}
+    assert len(loads) > 1
+
+    # With every wait slot taken the current state comes back from a single read
+    monkeypatch.setattr(jobroutes, "_wait_slots", jobroutes.threading.BoundedSemaphore(1))
+    jobroutes._wait_slots.acquire()
+    loads.clear()
+    jobroutes._poll(running, is_done, 5)
+    assert loads == [1]
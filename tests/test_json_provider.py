@@ -0,0 +1,77 @@
+import datetime
+import json
+
+import mongomock
+import pytest
+from bson import ObjectId
+from flask import jsonify
+
+from database import userdatahandler
+from utils import json_provider
+
+WHEN = datetime.datetime(2025, 1, 2, 3, 4, 5, 600000)
+
+
+def test_documents_encode_without_conversion(app):
+    _id = ObjectId()
+    with app.app_context():
+        body = jsonify({"_id": _id, "timestamp": WHEN, "seen_at": None, 7: "int key"}).get_data()
+    assert json.loads(body) == {"_id": str(_id), "timestamp": "2025-01-02T03:04:05.600000", "seen_at": None,
+                                "7": "int key"}
+
+
+def test_request_json_is_parsed_by_the_provider(app):
+    with app.test_request_context(method="POST", data='{"content": "hi"}', content_type="application/json"):
+        from flask import request
+        assert request.json == {"content": "hi"}
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    doc = {"_id": ObjectId("65a000000000000000000001"), "at": WHEN, "tags": ["a"]}
+    fast = json_provider.dumps(doc)
+    monkeypatch.setattr(json_provider, "orjson", None)
+    assert json.loads(json_provider.dumps(doc)) == json.loads(fast)
+
+
+@pytest.mark.parametrize("items", [[], [{"n": 1}], [{"n": i} for i in range(5000)]])
+def test_streamed_array_and_ndjson(items, monkeypatch):
+    monkeypatch.setattr(json_provider, "STREAM_CHUNK_BYTES", 1024)
+    chunks = list(json_provider.stream_json(iter(items), "json"))
+    assert json.loads(b"".join(chunks)) == items
+    assert all(len(chunk) < 2048 for chunk in chunks)
+
+    lines = b"".join(json_provider.stream_json(iter(items), "ndjson")).splitlines()
+    assert [json.loads(line) for line in lines] == items
+
+
+def test_stream_format_is_validated():
+    assert json_provider.stream_format(None) is None
+    assert json_provider.stream_format("ndjson") == "ndjson"
+    with pytest.raises(ValueError):
+        json_provider.stream_format("xml")
+
+
+@pytest.fixture
+def images(monkeypatch):
+    collection = mongomock.MongoClient().beehive.images
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", collection)
+    collection.insert_many([
+        userdatahandler.build_image("user_1", f"page{i}.jpg", f"Drawing {i}", "desc",
+                                    WHEN + datetime.timedelta(minutes=i), blob_hash="a" * 64)
+        for i in range(30)
+    ])
+    return collection
+
+
+def test_user_uploads_stream_every_image(client, images, auth_token):
+    headers = {"Authorization": f"Bearer {auth_token('user_1')}"}
+    response = client.get("/api/user/user_uploads/user_1?stream=ndjson", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.get_data().splitlines()]
+    assert [image["title"] for image in streamed] == [f"Drawing {i}" for i in reversed(range(30))]
+
+    paged = client.get("/api/user/user_uploads/user_1?limit=5", headers=headers).get_json()
+    assert paged["images"] == streamed[:5]
+
+    assert client.get("/api/user/user_uploads/user_1?stream=xml", headers=headers).status_code == 400
@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+import pytest
+
+from config import Config
+from utils.media_serving import content_etag
+
+DIGEST = hashlib.sha256(b"voice note").hexdigest()
+SHARDED = f"{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.m4a"
+
+
+@pytest.fixture
+def uploads(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app.config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(Config, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+    os.makedirs(os.path.join(tmp_path, DIGEST[:2], DIGEST[2:4]))
+    with open(os.path.join(tmp_path, SHARDED), "wb") as f:
+        f.write(bytes(range(256)) * 4)
+    with open(os.path.join(tmp_path, "legacy.jpg"), "wb") as f:
+        f.write(b"legacy")
+    return tmp_path
+
+
+def test_content_etag_only_for_sharded_paths():
+    """Only store paths that embed a SHA-256 are treated as immutable."""
+    assert content_etag(SHARDED) == SHARDED
+    assert content_etag(f"thumbnails/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.jpg") is not None
+    assert content_etag("legacy.jpg") is None
+
+
+def test_sharded_upload_is_immutable_and_revalidates(client, uploads):
+    """Content-addressed files get a long lifetime and answer If-None-Match with 304."""
+    response = client.get(f"/static/uploads/{SHARDED}")
+    assert response.status_code == 200
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert f"max-age={Config.MEDIA_IMMUTABLE_MAX_AGE}" in response.headers["Cache-Control"]
+
+    again = client.get(f"/static/uploads/{SHARDED}", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_range_request_returns_partial_content(client, uploads):
+    """Seeking in a voice note only transfers the requested bytes."""
+    response = client.get(f"/audio/{SHARDED}", headers={"Range": "bytes=256-511"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 256-511/1024"
+    assert response.data == bytes(range(256))
+
+
+def test_legacy_upload_must_revalidate(client, uploads):
+    """Files stored under their original name can change and are not cached blindly."""
+    response = client.get("/static/uploads/legacy.jpg")
+    assert response.status_code == 200
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert "immutable" not in response.headers["Cache-Control"]
+
+
+def test_path_traversal_is_rejected(client, uploads):
+    assert client.get("/static/uploads/../config.py").status_code == 404
+
+
+def test_dot_directories_are_not_served(client, uploads):
+    """In-progress files under dot-directories stay private."""
+    os.makedirs(os.path.join(uploads, ".sessions"))
+    with open(os.path.join(uploads, ".sessions", "upload.part"), "wb") as f:
+        f.write(b"partial")
+    assert client.get("/static/uploads/.sessions/upload.part").status_code == 404
+
+
+def test_accel_redirect_leaves_body_to_proxy(client, uploads, monkeypatch):
+    """With a redirect prefix configured, nginx is told which file to send."""
+    monkeypatch.setattr(Config, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected/")
+    response = client.get(f"/static/uploads/{SHARDED}")
+    assert response.headers["X-Accel-Redirect"].startswith("/protected/")
+    assert response.headers["X-Accel-Redirect"].endswith(SHARDED)
+    assert response.data == b""
+    assert client.get(f"/static/uploads/{SHARDED}",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
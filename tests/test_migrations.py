@@ -0,0 +1,48 @@
+import mongomock
+
+from database import migrations
+
+
+def test_migrations_are_applied_once():
+    """Pending migrations run on the first start and are skipped afterwards."""
+    db = mongomock.MongoClient().beehive
+
+    assert migrations.run_migrations(db) == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.run_migrations(db) == []
+    assert "user_created_id" in db.images.index_information()
+    assert "user_created" not in db.images.index_information()
+
+
+def test_every_query_shape_is_indexed_after_migrating():
+    """The declared indexes cover every query the application issues."""
+    db = mongomock.MongoClient().beehive
+    assert len(migrations.unindexed_query_shapes(db)) == len(migrations.QUERY_SHAPES)
+
+    migrations.run_migrations(db)
+
+    assert migrations.unindexed_query_shapes(db) == []
+
+
+def test_index_must_match_equality_then_sort():
+    """A sort key in front of the filtered field cannot serve the query."""
+    shape = migrations.QueryShape("messages", ["from_id", "to_role"], [("timestamp", 1)], [], "chat")
+
+    assert migrations._supports(["to_role", "from_id", "timestamp"], shape)
+    assert not migrations._supports(["timestamp", "from_id", "to_role"], shape)
+    assert not migrations._supports(["from_id", "timestamp"], shape)
+
+
+def test_seen_notifications_become_claims(monkeypatch):
+    db = mongomock.MongoClient().beehive
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    monkeypatch.setattr(db.notifications, "bulk_write", lambda ops, ordered=True: [
+        db.notifications.update_one(op._filter, op._doc, upsert=op._upsert) for op in ops])
+    seen = db.notifications.insert_one({"seen": True, "seen_by": "admin_1", "seen_at": "then"}).inserted_id
+    unseen = db.notifications.insert_one({"seen": False}).inserted_id
+    db.notification_counters.insert_one({"_id": "admin_1", "unread": 1, "read_through": seen})
+
+    migrations.run_migrations(db)
+
+    assert db.notifications.find_one({"_id": seen}, {"_id": 0}) == {"claimed_by": "admin_1", "claimed_at": "then"}
+    assert db.notifications.find_one({"_id": unseen}, {"_id": 0}) == {"claimed_by": None}
+    assert db.notification_counters.count_documents({}) == 0
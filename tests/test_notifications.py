@@ -0,0 +1,91 @@
+import datetime
+
+import mongomock
+from bson import ObjectId
+import pytest
+
+from database import notificationdatahandler, userdatahandler
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userdatahandler, "beehive_notification_collection", db.notifications)
+    monkeypatch.setattr(notificationdatahandler, "beehive_notification_collection", db.notifications)
+    monkeypatch.setattr(notificationdatahandler, "beehive_notification_counter_collection", db.notification_counters)
+    return db
+
+
+def _notify(count, offset=0):
+    now = datetime.datetime.now()
+    for i in range(offset, offset + count):
+        userdatahandler.save_notification("user_1", "Test", f"page{i}.jpg", f"Drawing {i}", now, None)
+
+
+def test_unread_counter_follows_saves_and_claims(db):
+    """The badge is a counter read, kept current by saves and claims."""
+    _notify(3)
+    assert notificationdatahandler.get_unread_count() == 3
+
+    _notify(2, offset=3)
+    assert notificationdatahandler.get_unread_count() == 5
+
+    claimed = notificationdatahandler.claim_notifications("admin_1", limit=4)
+    assert [n["title"] for n in claimed] == ["Drawing 3", "Drawing 2", "Drawing 1", "Drawing 0"]
+    assert {n["claimed_by"] for n in claimed} == {"admin_1"}
+    assert notificationdatahandler.get_unread_count() == 1
+
+
+def test_two_admins_never_share_a_notification(db):
+    _notify(7)
+    first = notificationdatahandler.claim_notifications("admin_1", limit=5)
+    second = notificationdatahandler.claim_notifications("admin_2", limit=5)
+
+    assert len(first) == 5 and len(second) == 2
+    assert {n["_id"] for n in first}.isdisjoint(n["_id"] for n in second)
+    assert notificationdatahandler.claim_notifications("admin_1") == []
+    assert notificationdatahandler.get_unread_count() == 0
+
+
+def test_interleaved_claims_never_share_a_notification(db, monkeypatch):
+    """A claim that loses part of its batch to another admin takes the next ones instead."""
+    _notify(12)
+    other_admin = []
+    original_update_many = db.notifications.update_many
+
+    def racing_update_many(*args, **kwargs):
+        if not other_admin:
+            # Another admin claims between this admin's read and its claim
+            monkeypatch.setattr(db.notifications, "update_many", original_update_many)
+            other_admin.extend(notificationdatahandler.claim_notifications("admin_2", limit=3))
+        return original_update_many(*args, **kwargs)
+
+    monkeypatch.setattr(db.notifications, "update_many", racing_update_many)
+    this_admin = notificationdatahandler.claim_notifications("admin_1", limit=5)
+
+    assert len(this_admin) == 5 and len(other_admin) == 3
+    assert {n["_id"] for n in this_admin}.isdisjoint(n["_id"] for n in other_admin)
+    assert notificationdatahandler.get_unread_count() == 4
+
+
+def test_notification_committed_late_is_still_claimed(db):
+    """A notification whose id sorts before ones already claimed is not lost."""
+    late = userdatahandler.build_notification("user_1", "Test", "late.jpg", "Late", datetime.datetime.now(), None)
+    late["_id"] = ObjectId()
+    _notify(2)
+    notificationdatahandler.claim_notifications("admin_1")
+
+    db.notifications.insert_one(late)
+    notificationdatahandler.notifications_saved([late])
+    assert notificationdatahandler.get_unread_count() == 1
+    assert [n["title"] for n in notificationdatahandler.claim_notifications("admin_2")] == ["Late"]
+
+
+def test_history_pages_newest_first(db):
+    _notify(7)
+    first, cursor = notificationdatahandler.get_notification_history(limit=5)
+    second, last_cursor = notificationdatahandler.get_notification_history(limit=5, cursor=cursor)
+
+    assert len(first) == 5 and len(second) == 2
+    assert last_cursor is None
+    assert {n["_id"] for n in first}.isdisjoint(n["_id"] for n in second)
@@ -0,0 +1,49 @@
+import datetime
+
+import mongomock
+import pytest
+
+from database import userdatahandler
+from utils.pagination import CursorError, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def images(monkeypatch):
+    collection = mongomock.MongoClient().beehive.images
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", collection)
+    start = datetime.datetime(2025, 1, 1)
+    # Pairs of uploads share a timestamp, as a multi-file upload does
+    collection.insert_many([
+        userdatahandler.build_image("user_1", f"page{i}.jpg", f"Drawing {i}", "desc",
+                                    start + datetime.timedelta(minutes=i // 2), blob_hash="a" * 64)
+        for i in range(25)
+    ])
+    collection.insert_one(userdatahandler.build_image("user_2", "other.jpg", "Other", "desc", start))
+    return collection
+
+
+def test_pages_cover_every_image_once_newest_first(images):
+    """Following next_cursor walks the whole history without gaps or repeats."""
+    seen, cursor = [], None
+    while True:
+        page, cursor = userdatahandler.get_images_by_user("user_1", limit=10, cursor=cursor)
+        assert len(page) <= 10
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert len({image["id"] for image in seen}) == 25
+    assert [image["created_at"] for image in seen] == sorted((image["created_at"] for image in seen), reverse=True)
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2025, 1, 1, 12, 30, 5, 123000)
+    value, _id = decode_cursor(encode_cursor(created_at, "65a000000000000000000001"))
+    assert value == created_at
+    assert str(_id) == "65a000000000000000000001"
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(CursorError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import mongomock
+
+from config import Config
+from utils import pubsub
+
+
+def test_subscriber_only_receives_its_channels():
+    bus = pubsub.MemoryEventBus()
+    subscription = bus.subscribe(["chat:user_1"])
+
+    bus.publish("chat:user_2", "chat_message", {"content": "elsewhere"})
+    bus.publish("chat:user_1", "chat_message", {"content": "hello"})
+
+    events = subscription.next_events(timeout=0.1)
+    assert [e.data["content"] for e in events] == ["hello"]
+    assert subscription.next_events(timeout=0.05) == []
+
+
+def test_reconnect_resumes_after_last_event_id():
+    """Events published while a client was away are delivered on reconnect."""
+    bus = pubsub.MemoryEventBus()
+    first = bus.publish("admin", "notification", {"title": "a"})
+    bus.publish("admin", "notification", {"title": "b"})
+    bus.publish("admin", "notification", {"title": "c"})
+
+    subscription = bus.subscribe(["admin"], last_event_id=first.id)
+
+    assert [e.data["title"] for e in subscription.next_events(timeout=0.1)] == ["b", "c"]
+    assert not subscription.reset
+
+
+def test_unknown_last_event_id_asks_for_reset():
+    """A memory bus cannot replay events it no longer holds."""
+    bus = pubsub.MemoryEventBus(buffer_size=2)
+    first = bus.publish("admin", "notification", {})
+    bus.publish("admin", "notification", {})
+    bus.publish("admin", "notification", {})
+
+    assert bus.subscribe(["admin"], last_event_id=first.id).reset
+
+
+def test_mongo_bus_delivers_across_nodes(monkeypatch):
+    """Events published on one node reach subscribers of another, and replay after a reconnect."""
+    monkeypatch.setattr(Config, "EVENTS_SETTLE_SECONDS", 0)
+    # mongomock has no change streams, so the tailers poll
+    monkeypatch.setattr("database.databaseConfig.supports_transactions", lambda: False)
+    collection = mongomock.MongoClient().beehive.events
+    node_a = pubsub.MongoEventBus(collection, poll_interval=0.01)
+    node_b = pubsub.MongoEventBus(collection, poll_interval=0.01)
+    try:
+        subscription = node_b.subscribe(["chat:user_1"])
+        time.sleep(0.05)
+        first = node_a.publish("chat:user_1", "chat_message", {"content": "one"})
+        node_a.publish("chat:user_1", "chat_message", {"content": "two"})
+
+        received = []
+        deadline = time.monotonic() + 2
+        while len(received) < 2 and time.monotonic() < deadline:
+            received += subscription.next_events(timeout=0.1)
+        assert [e.data["content"] for e in received] == ["one", "two"]
+
+        node_c = pubsub.MongoEventBus(collection, poll_interval=0.01)
+        resumed = node_c.subscribe(["chat:user_1"], last_event_id=first.id)
+        assert [e.data["content"] for e in resumed.next_events(timeout=0.1)] == ["two"]
+        node_c.shutdown()
+    finally:
+        node_a.shutdown()
+        node_b.shutdown()
+
+
+def test_stream_resumes_from_last_event_id(client, auth_token, monkeypatch):
+    """The SSE endpoint replays buffered events after Last-Event-ID, then ends."""
+    bus = pubsub.MemoryEventBus()
+    monkeypatch.setattr("routes.eventroutes.event_bus", bus)
+    monkeypatch.setattr(Config, "EVENTS_STREAM_SECONDS", 0.2)
+    monkeypatch.setattr(Config, "EVENTS_HEARTBEAT_SECONDS", 0.05)
+    first = bus.publish("admin", "notification", {"title": "seen already"})
+    second = bus.publish("admin", "notification", {"title": "missed"})
+
+    response = client.get("/api/events/stream?channels=admin",
+                          headers={"Authorization": f"Bearer {auth_token('admin_1')}", "Last-Event-ID": first.id})
+
+    body = response.get_data(as_text=True)
+    assert response.mimetype == "text/event-stream"
+    assert f"id: {second.id}\nevent: notification\n" in body
+    assert "missed" in body
+    assert "seen already" not in body
+
+
+def test_stream_rejects_unknown_channels(client, auth_token):
+    response = client.get("/api/events/stream?channels=everything",
+                          headers={"Authorization": f"Bearer {auth_token('user_1')}"})
+    assert response.status_code == 400
+
+
+def test_streams_beyond_the_limit_are_refused(client, auth_token, monkeypatch):
+    """Open streams are capped so they cannot take every thread of a worker."""
+    monkeypatch.setattr("routes.eventroutes.event_bus", pubsub.MemoryEventBus())
+    monkeypatch.setattr("routes.eventroutes._stream_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(Config, "EVENTS_STREAM_SECONDS", 0.1)
+    monkeypatch.setattr(Config, "EVENTS_HEARTBEAT_SECONDS", 0.05)
+    headers = {"Authorization": f"Bearer {auth_token('admin_1')}"}
+
+    first = client.get("/api/events/stream?channels=admin", headers=headers, buffered=False)
+    refused = client.get("/api/events/stream?channels=admin", headers=headers)
+    assert first.status_code == 200
+    assert refused.status_code == 503 and refused.headers["Retry-After"] == "3"
+
+    first.close()
+    again = client.get("/api/events/stream?channels=admin", headers=headers)
+    assert again.status_code == 200
@@ -0,0 +1,66 @@
+import datetime
+
+import mongomock
+import pytest
+
+from config import Config
+from database import statsdatahandler, userdatahandler
+
+
+def _bulk_write(collection):
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    def bulk_write(operations, ordered=True):
+        for op in operations:
+            collection.update_one(op._filter, op._doc, upsert=op._upsert)
+    return bulk_write
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", db.images)
+    monkeypatch.setattr(statsdatahandler, "beehive_stats_collection", db.stats)
+    monkeypatch.setattr(db.stats, "bulk_write", _bulk_write(db.stats))
+    monkeypatch.setattr(Config, "STATS_CACHE_SECONDS", 0)
+    return db
+
+
+def _save(user_id, sentiment, hours_ago=0, audio=None):
+    created_at = datetime.datetime.now() - datetime.timedelta(hours=hours_ago)
+    return userdatahandler.save_image(user_id, "page.jpg", "Drawing", "desc", created_at,
+                                      audio_filename=audio, sentiment=sentiment)
+
+
+def test_counters_follow_saves_edits_and_deletes(db):
+    first = _save("user_1", "Happy", audio="ab/cd/note.m4a")
+    _save("user_1", "sad")
+    _save("user_2", "happy", hours_ago=30)
+
+    assert statsdatahandler.get_dashboard_stats() == {
+        "totalImages": 3, "totalVoiceNotes": 1, "totalMedia": 4, "uploadsLast24Hours": 2
+    }
+    assert statsdatahandler.get_sentiment_totals() == [
+        {"sentiment": "happy", "images": 2}, {"sentiment": "sad", "images": 1}
+    ]
+
+    userdatahandler.update_image(first, "Drawing", "desc", "calm")
+    userdatahandler.delete_image(first)
+
+    assert statsdatahandler.get_dashboard_stats()["totalImages"] == 2
+    assert statsdatahandler.get_dashboard_stats()["totalVoiceNotes"] == 0
+    assert {row["sentiment"] for row in statsdatahandler.get_sentiment_totals()} == {"happy", "sad"}
+    assert statsdatahandler.get_daily_stats(1, "user", "user_1")[-1]["images"] == 1
+
+
+def test_rebuild_matches_incremental_counters(db):
+    """Reconciling from scratch yields the same counters and repairs drift."""
+    for i in range(10):
+        _save(f"user_{i % 3}", ["happy", "sad", None][i % 3], hours_ago=i * 5, audio="x.m4a" if i % 2 else None)
+    incremental = {doc["_id"]: (doc["images"], doc.get("voice_notes", 0)) for doc in db.stats.find()}
+
+    db.stats.update_one({"_id": statsdatahandler.stat_id("total", "all")}, {"$inc": {"images": 7}})
+    db.stats.insert_one({"_id": "day:user:gone:2000-01-01T00:00:00", "images": 1, "voice_notes": 0})
+    statsdatahandler.rebuild_stats(db.images)
+
+    rebuilt = {doc["_id"]: (doc["images"], doc.get("voice_notes", 0)) for doc in db.stats.find()}
+    assert rebuilt == {key: value for key, value in incremental.items() if value != (0, 0)}
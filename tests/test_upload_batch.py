@@ -0,0 +1,89 @@
+import datetime
+
+import mongomock
+import pytest
+
+from database import databaseConfig, notificationdatahandler, statsdatahandler, userdatahandler
+from utils import blobstore, uploads
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", db.images)
+    monkeypatch.setattr(userdatahandler, "beehive_notification_collection", db.notifications)
+    monkeypatch.setattr(notificationdatahandler, "beehive_notification_counter_collection", db.notification_counters)
+    monkeypatch.setattr(statsdatahandler, "beehive_stats_collection", db.stats)
+    monkeypatch.setattr(databaseConfig, "supports_transactions", lambda: False)
+    return db
+
+
+def _documents(count):
+    now = datetime.datetime.now()
+    images = [userdatahandler.build_image("user_1", f"page{i}.jpg", "Drawing", "desc", now) for i in range(count)]
+    notifications = [userdatahandler.build_notification("user_1", "Test", f"page{i}.jpg", "Drawing", now, None)
+                     for i in range(count)]
+    return images, notifications
+
+
+def test_batch_inserts_all_documents(collections):
+    """A multi-file upload is written with one insert_many per collection."""
+    images, notifications = _documents(30)
+
+    image_ids = userdatahandler.save_upload_batch(images, notifications)
+
+    assert len(image_ids) == 30
+    assert collections.images.count_documents({}) == 30
+    assert collections.notifications.count_documents({}) == 30
+
+
+def test_failed_batch_leaves_no_images(collections, monkeypatch):
+    """Without transactions, images are removed again when notifications fail."""
+    images, notifications = _documents(3)
+
+    def broken_insert_many(documents, **kwargs):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(collections.notifications, "insert_many", broken_insert_many)
+
+    with pytest.raises(RuntimeError):
+        userdatahandler.save_upload_batch(images, notifications)
+    assert collections.images.count_documents({}) == 0
+
+
+def test_partly_inserted_notifications_are_removed(collections, monkeypatch):
+    """A notification insert that fails midway leaves neither images nor notifications."""
+    images, notifications = _documents(3)
+    insert_one = collections.notifications.insert_one
+
+    def partial_insert_many(documents, **kwargs):
+        insert_one(documents[0])
+        raise RuntimeError("write failed after the first document")
+
+    monkeypatch.setattr(collections.notifications, "insert_many", partial_insert_many)
+
+    with pytest.raises(RuntimeError):
+        userdatahandler.save_upload_batch(images, notifications)
+    assert collections.images.count_documents({}) == 0
+    assert collections.notifications.count_documents({}) == 0
+
+
+def test_failed_batch_releases_written_blobs(monkeypatch):
+    """finish_uploads releases every blob it was given when the commit fails."""
+    released = []
+
+    def failing_batch(images, notifications):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(uploads, "save_upload_batch", failing_batch)
+    monkeypatch.setattr(uploads, "get_blob", lambda digest: None)
+    monkeypatch.setattr(blobstore, "release", lambda digest, upload_folder=None: released.append(digest))
+    items = [
+        uploads.UploadItem(blobstore.StoredBlob("a" * 64, "aa/aa/a.jpg", 1, True), "a.jpg", None),
+        uploads.UploadItem(blobstore.StoredBlob("b" * 64, "bb/bb/b.jpg", 1, True), "b.jpg",
+                           blobstore.StoredBlob("c" * 64, "cc/cc/c.wav", 1, True)),
+    ]
+
+    with pytest.raises(RuntimeError):
+        uploads.finish_uploads("user_1", "Test", items, "Drawing", "desc", None)
+    assert released == ["a" * 64, "b" * 64, "c" * 64]
@@ -0,0 +1,123 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import time
+
+import mongomock
+import pytest
+
+from config import Config
+from database import userdatahandler, userindexdatahandler
+from utils import user_directory
+
+
+class FakeResponse:
+    def __init__(self, users, ok=True):
+        self.ok = ok
+        self.text = "error"
+        self._users = users
+
+    def json(self):
+        return self._users
+
+
+def _clerk_user(user_id, first_name):
+    return {
+        "id": user_id,
+        "first_name": first_name,
+        "last_name": "Tester",
+        "email_addresses": [{"email_address": f"{user_id}@example.com"}],
+        "unsafe_metadata": {"role": "user"},
+        "last_active_at": None,
+        "image_url": None,
+    }
+
+
+@pytest.fixture
+def clerk(monkeypatch):
+    """Record Clerk list requests; Clerk knows user_1 and user_2."""
+    known = {"user_1": _clerk_user("user_1", "Ada"), "user_2": _clerk_user("user_2", "Grace")}
+    calls = []
+
+    def get(url, headers=None, params=None, timeout=None):
+        calls.append((url, params))
+        return FakeResponse([known[i] for i in params.get("user_id", []) if i in known])
+
+    user_directory.clear_user_cache()
+    monkeypatch.setattr(user_directory.http_client, "get", get)
+    yield calls
+    user_directory.clear_user_cache()
+
+
+def test_get_users_batches_misses_and_caches(clerk):
+    users = user_directory.get_users(["user_1", "user_2", "deleted", "user_1"])
+    assert users["user_1"]["name"] == "Ada Tester"
+    assert users["deleted"] is None
+    assert len(clerk) == 1
+    assert clerk[0][0].endswith("/users")
+    assert clerk[0][1]["user_id"] == ["deleted", "user_1", "user_2"]
+
+    # Cached hits, including the unknown id, need no further requests
+    assert user_directory.get_user("user_2")["email"] == "user_2@example.com"
+    assert user_directory.get_users(["deleted"]) == {"deleted": None}
+    assert len(clerk) == 1
+
+
+def test_recent_uploads_resolve_names_without_loopback(clerk, monkeypatch):
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userdatahandler, "beehive_image_collection", db.images)
+    now = datetime.datetime.now()
+    db.images.insert_many([
+        {"user_id": user_id, "title": f"Drawing {i}", "created_at": now - datetime.timedelta(minutes=i)}
+        for i, user_id in enumerate(["user_1", "user_2", "user_1", "deleted"])
+    ])
+
+    uploads = userdatahandler.get_recent_uploads(limit=4)
+    assert [u["user"] for u in uploads] == ["Ada Tester", "Grace Tester", "Ada Tester", "Unknown User"]
+    assert len(clerk) == 1
+    assert "127.0.0.1" not in clerk[0][0]
+
+
+def _signed(body, secret_key=b"webhook-secret", timestamp=None):
+    timestamp = str(timestamp or int(time.time()))
+    digest = hmac.new(secret_key, f"msg_1.{timestamp}.".encode() + body, hashlib.sha256).digest()
+    return {
+        "svix-id": "msg_1",
+        "svix-timestamp": timestamp,
+        "svix-signature": f"v1,{base64.b64encode(digest).decode()}",
+        "Content-Type": "application/json",
+    }
+
+
+def test_webhook_updates_cached_users(client, clerk, monkeypatch):
+    monkeypatch.setattr(Config, "CLERK_WEBHOOK_SECRET", "whsec_" + base64.b64encode(b"webhook-secret").decode())
+    index = mongomock.MongoClient().beehive.clerk_users
+    monkeypatch.setattr(userindexdatahandler, "beehive_user_index_collection", index)
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    monkeypatch.setattr(index, "bulk_write", lambda ops, ordered=True: [
+        index.update_one(op._filter, op._doc, upsert=op._upsert) for op in ops])
+    assert user_directory.get_user("user_1")["name"] == "Ada Tester"
+
+    body = json.dumps({"type": "user.updated", "data": _clerk_user("user_1", "Augusta")}).encode()
+    response = client.post("/api/webhooks/clerk", data=body, headers=_signed(body))
+    assert response.status_code == 200
+    assert user_directory.get_user("user_1")["name"] == "Augusta Tester"
+    assert index.find_one({"_id": "user_1"})["name"] == "Augusta Tester"
+
+    body = json.dumps({"type": "user.deleted", "data": {"id": "user_1", "deleted": True}}).encode()
+    client.post("/api/webhooks/clerk", data=body, headers=_signed(body))
+    assert user_directory.get_user("user_1") is None
+    assert index.find_one({"_id": "user_1"}) is None
+    assert len(clerk) == 1
+
+
+def test_webhook_rejects_bad_signatures(client, monkeypatch):
+    monkeypatch.setattr(Config, "CLERK_WEBHOOK_SECRET", "whsec_" + base64.b64encode(b"webhook-secret").decode())
+    body = json.dumps({"type": "user.deleted", "data": {"id": "user_1"}}).encode()
+
+    forged = client.post("/api/webhooks/clerk", data=body, headers=_signed(body, b"other-secret"))
+    replayed = client.post("/api/webhooks/clerk", data=body, headers=_signed(body, timestamp=int(time.time()) - 3600))
+    assert forged.status_code == 401
+    assert replayed.status_code == 401
@@ -0,0 +1,138 @@
+import mongomock
+import pytest
+
+from database import jobdatahandler, userindexdatahandler
+from routes import adminroutes
+from utils import jobs
+from utils.pagination import CursorError
+
+
+def _clerk_user(i, role="user", updated_at=1000, last_active=None):
+    return {
+        "id": f"user_{i:03d}",
+        "first_name": f"Name{i:03d}",
+        "last_name": "Tester",
+        "email_addresses": [{"email_address": f"person{i}@example.com"}],
+        "unsafe_metadata": {"role": role},
+        "last_active_at": last_active,
+        "image_url": None,
+        "updated_at": updated_at,
+    }
+
+
+def _bulk_write(collection):
+    # mongomock's bulk_write does not accept UpdateOne from current pymongo releases
+    def bulk_write(operations, ordered=True):
+        for op in operations:
+            collection.update_one(op._filter, op._doc, upsert=op._upsert)
+    return bulk_write
+
+
+@pytest.fixture
+def clerk(monkeypatch):
+    """A fake Clerk user list, served newest update first like order_by=-updated_at."""
+    db = mongomock.MongoClient().beehive
+    monkeypatch.setattr(userindexdatahandler, "beehive_user_index_collection", db.clerk_users)
+    monkeypatch.setattr(db.clerk_users, "bulk_write", _bulk_write(db.clerk_users))
+    monkeypatch.setattr(userindexdatahandler, "beehive_user_index_state_collection", db.clerk_users_state)
+    monkeypatch.setattr(userindexdatahandler, "SYNC_PAGE_SIZE", 10)
+    users = {}
+    requests = []
+
+    def fetch(params):
+        requests.append(params)
+        ordered = sorted(users.values(), key=lambda u: -u["updated_at"])
+        return ordered[params["offset"]:params["offset"] + params["limit"]]
+
+    monkeypatch.setattr(userindexdatahandler, "fetch_clerk_users", fetch)
+    return users, requests
+
+
+def test_role_filter_returns_full_pages_and_totals(clerk):
+    users, _ = clerk
+    for i in range(30):
+        users[i] = _clerk_user(i, role="admin" if i % 3 == 0 else "user", last_active=i)
+    assert userindexdatahandler.sync_users() == 30
+
+    page, total, next_cursor = userindexdatahandler.search_users("user", limit=10)
+    assert total == 20
+    assert len(page) == 10
+    assert all(user["role"] == "user" for user in page)
+    # The cursor and the offset address the same next page
+    by_cursor, _, _ = userindexdatahandler.search_users("user", limit=10, cursor=next_cursor)
+    by_offset, _, last_cursor = userindexdatahandler.search_users("user", limit=10, offset=10)
+    assert by_cursor == by_offset
+    assert last_cursor is None
+    assert len({user["id"] for user in page + by_cursor}) == 20
+
+    recent, _, _ = userindexdatahandler.search_users("user", sort="lastActive", limit=2)
+    assert [user["id"] for user in recent] == ["user_029", "user_028"]
+    found, total, _ = userindexdatahandler.search_users("user", query="person7@", limit=10)
+    assert (total, [user["id"] for user in found]) == (1, ["user_007"])
+    found, total, _ = userindexdatahandler.search_users("user", query="name01", limit=10)
+    assert total == 7
+
+    with pytest.raises(CursorError):
+        userindexdatahandler.search_users("user", cursor="bogus")
+
+
+def test_incremental_sync_reads_only_changes_and_full_sync_drops_deleted(clerk):
+    users, requests = clerk
+    for i in range(25):
+        users[i] = _clerk_user(i, updated_at=1000 + i)
+    userindexdatahandler.sync_users()
+
+    users[3] = _clerk_user(3, role="admin", updated_at=2000)
+    requests.clear()
+    assert userindexdatahandler.sync_users() == 2
+    assert len(requests) == 1
+    assert userindexdatahandler.search_users("user", limit=50)[1] == 24
+
+    del users[4]
+    assert userindexdatahandler.sync_users(full=True) == 24
+    assert userindexdatahandler.search_users(limit=50)[1] == 24
+
+
+def _jobs(monkeypatch):
+    jobs_collection = mongomock.MongoClient().beehive.jobs
+    monkeypatch.setattr(jobdatahandler, "beehive_job_collection", jobs_collection)
+    monkeypatch.setattr(jobs.job_runner, "ensure_started", lambda: None)
+    return jobs_collection
+
+
+def test_unbuilt_index_queues_one_full_sync_and_answers_503(client, auth_token, monkeypatch):
+    """Concurrent first requests share a single background sync instead of each syncing inline."""
+    jobs_collection = _jobs(monkeypatch)
+    monkeypatch.setattr(adminroutes, "get_sync_state", lambda: {})
+    headers = {"Authorization": f"Bearer {auth_token('admin_1')}"}
+
+    responses = [client.get("/api/admin/users/only-users", headers=headers) for _ in range(3)]
+
+    assert {response.status_code for response in responses} == {503}
+    assert responses[0].headers["Retry-After"] == "5"
+    assert len({response.get_json()["job_id"] for response in responses}) == 1
+    assert jobs_collection.count_documents({"kind": "user_index_sync", "payload": {"full": True}}) == 1
+
+
+def test_a_failed_build_is_reported_and_an_empty_clerk_still_builds(clerk, client, auth_token, monkeypatch):
+    """Neither a sync that keeps failing nor a Clerk without users leaves the listing on 503."""
+    _jobs(monkeypatch)
+    headers = {"Authorization": f"Bearer {auth_token('admin_1')}"}
+
+    def unavailable(params):
+        raise RuntimeError("Clerk is down")
+
+    monkeypatch.setattr(userindexdatahandler, "fetch_clerk_users", unavailable)
+    with pytest.raises(RuntimeError):
+        userindexdatahandler.sync_users(full=True)
+    response = client.get("/api/admin/users/only-users", headers=headers)
+    assert response.status_code == 502
+    assert response.get_json()["detail"] == "Clerk is down"
+
+    monkeypatch.setattr(userindexdatahandler, "fetch_clerk_users", lambda params: [])
+    assert userindexdatahandler.sync_users(full=True) == 0
+    state = userindexdatahandler.get_sync_state()
+    assert state["built_at"] and "last_error" not in state
+    response = client.get("/api/admin/users/only-users", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["totalCount"] == 0
@@ -0,0 +1,95 @@
+"""Voice note processing: transcoding and waveform peaks.
+
+Transcoding and decoding go through ffmpeg when it is installed. Without
+it, uncompressed WAV files can still be measured with the standard library,
+and anything else is left as uploaded.
+"""
+import array
+import os
+import shutil
+import subprocess
+import sys
+import wave
+
+from config import Config
+
+# Sample rate the waveform is computed at; plenty for a peaks overview
+WAVEFORM_SAMPLE_RATE = 8000
+
+
+def ffmpeg_available():
+    return shutil.which(Config.FFMPEG_BINARY) is not None
+
+def transcode(source_path, destination):
+    """Transcode to mono AAC in an .m4a container."""
+    subprocess.run(
+        [Config.FFMPEG_BINARY, '-v', 'error', '-y', '-i', source_path,
+         '-vn', '-ac', '1', '-c:a', 'aac', '-b:a', Config.AUDIO_TRANSCODE_BITRATE,
+         '-movflags', '+faststart', destination],
+        check=True,
+        capture_output=True,
+        timeout=300
+    )
+
+def _decode_pcm(source_path):
+    """Decode to mono signed 16-bit samples at WAVEFORM_SAMPLE_RATE."""
+    if ffmpeg_available():
+        output = subprocess.run(
+            [Config.FFMPEG_BINARY, '-v', 'error', '-i', source_path,
+             '-ac', '1', '-ar', str(WAVEFORM_SAMPLE_RATE), '-f', 's16le', '-'],
+            check=True,
+            capture_output=True,
+            timeout=300
+        ).stdout
+        samples = array.array('h')
+        samples.frombytes(output[:len(output) - len(output) % 2])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        return samples, WAVEFORM_SAMPLE_RATE
+
+    with wave.open(source_path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError('Only 16-bit WAV can be read without ffmpeg')
+        channels = wav.getnchannels()
+        samples = array.array('h')
+        samples.frombytes(wav.readframes(wav.getnframes()))
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if channels > 1:
+            samples = samples[::channels]
+        return samples, wav.getframerate()
+
+def waveform(source_path, peaks=None):
+    """Return (duration in seconds, list of `peaks` amplitudes between 0 and 1)."""
+    peaks = peaks or Config.AUDIO_WAVEFORM_PEAKS
+    samples, sample_rate = _decode_pcm(source_path)
+    if not samples:
+        return 0.0, []
+
+    bucket = max(1, -(-len(samples) // peaks))
+    values = []
+    for start in range(0, len(samples), bucket):
+        window = samples[start:start + bucket]
+        values.append(round(max(max(window), -min(window)) / 32768, 3))
+    return round(len(samples) / sample_rate, 2), values
+
+def process_voice_note(source_path, destination):
+    """Transcode `source_path` to `destination` and measure it.
+
+    Returns the metadata saved on image documents. `transcoded` is False when
+    ffmpeg is missing or the source already is the target format.
+    """
+    result = {'transcoded': False, 'duration': None, 'peaks': []}
+    if ffmpeg_available() and not source_path.endswith('.' + Config.AUDIO_TRANSCODE_EXTENSION):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = destination + '.tmp.' + Config.AUDIO_TRANSCODE_EXTENSION
+        transcode(source_path, temp_path)
+        os.replace(temp_path, destination)
+        result['transcoded'] = True
+
+    try:
+        result['duration'], result['peaks'] = waveform(destination if result['transcoded'] else source_path)
+    except (ValueError, EOFError, wave.Error, subprocess.CalledProcessError):
+        # Not decodable here (e.g. a browser recording without ffmpeg), keep it playable as uploaded
+        pass
+    return result
@@ -0,0 +1,40 @@
+"""Role lookup behind `is_admin`.
+
+A principal is a (kind, id) pair:
+
+- ('google', google_id): an admin signed in with Google, from `admins`.
+- ('email', email): an address listed in ALLOWED_EMAILS.
+
+Roles are cached per process for `ROLE_CACHE_SECONDS`. Writers of admin
+records call `invalidate_role` so changes apply immediately on this process;
+other processes pick them up when their entry expires.
+"""
+from config import Config
+from utils.cache import TTLCache
+
+role_cache = TTLCache('roles', Config.ROLE_CACHE_SIZE, Config.ROLE_CACHE_SECONDS)
+
+
+def _google_role(google_id):
+    from database.admindatahandler import get_admin_by_google_id
+    admin = get_admin_by_google_id(google_id)
+    return 'admin' if admin and admin.get('role') == 'admin' else None
+
+def _email_role(email):
+    from oauth.config import ALLOWED_EMAILS
+    return 'admin' if email in ALLOWED_EMAILS else None
+
+_LOADERS = {
+    'google': _google_role,
+    'email': _email_role,
+}
+
+
+def resolve_role(kind, identifier):
+    """Role of a principal, or None if it has none."""
+    if not identifier:
+        return None
+    return role_cache.get((kind, identifier), lambda: _LOADERS[kind](identifier))
+
+def invalidate_role(kind, identifier):
+    role_cache.invalidate((kind, identifier))
@@ -0,0 +1,148 @@
+"""Content-addressed upload store.
+
+Every stored file is named after the SHA-256 of its content and sharded
+into `ab/cd/<sha256>.<ext>` under the upload folder, so identical uploads
+share one file and directories stay small. The relative path is what goes
+into an image document's `filename`, which keeps `/static/uploads/<filename>`
+URLs working. The `blobs` collection reference-counts each file, and a file
+is reclaimed together with its derived files once its last reference is
+released.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from collections import namedtuple
+
+from config import Config
+from database.blobdatahandler import (
+    add_blob_reference,
+    delete_unreferenced_blob,
+    get_blob,
+    release_blob_reference
+)
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# filename is the path relative to the upload folder; created is False for a dedup hit
+StoredBlob = namedtuple('StoredBlob', ['digest', 'filename', 'size', 'created'])
+
+
+def shard_path(digest, ext):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}" if ext else f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+def absolute_path(filename, upload_folder=None):
+    return os.path.join(upload_folder or Config.UPLOAD_FOLDER, filename)
+
+def thumbnail_path(filename, upload_folder=None):
+    return os.path.join(upload_folder or Config.UPLOAD_FOLDER, 'thumbnails', filename.rsplit('.', 1)[0] + '.jpg')
+
+def audio_path(filename, upload_folder=None):
+    """Where the transcoded copy of a voice note blob lives."""
+    return os.path.join(upload_folder or Config.UPLOAD_FOLDER,
+                        filename.rsplit('.', 1)[0] + '.' + Config.AUDIO_TRANSCODE_EXTENSION)
+
+def _derived_paths(filename, upload_folder):
+    paths = [thumbnail_path(filename, upload_folder)]
+    if not filename.endswith('.' + Config.AUDIO_TRANSCODE_EXTENSION):
+        paths.append(audio_path(filename, upload_folder))
+    return paths
+
+def _temp_path(upload_folder):
+    temp_dir = os.path.join(upload_folder, '.tmp')
+    os.makedirs(temp_dir, exist_ok=True)
+    return os.path.join(temp_dir, uuid.uuid4().hex)
+
+def store_stream(stream, ext, upload_folder=None):
+    """Hash `stream` while spooling it to disk, then add it to the store."""
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    temp_path = _temp_path(upload_folder)
+    digest = hashlib.sha256()
+    with open(temp_path, 'wb') as f:
+        for block in iter(lambda: stream.read(STREAM_BLOCK_SIZE), b''):
+            digest.update(block)
+            f.write(block)
+    return store_file(temp_path, ext, digest.hexdigest(), upload_folder)
+
+def store_bytes(data, ext, upload_folder=None):
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    temp_path = _temp_path(upload_folder)
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    return store_file(temp_path, ext, hashlib.sha256(data).hexdigest(), upload_folder)
+
+def store_file(source_path, ext, digest, upload_folder=None, keep_source=False):
+    """Move `source_path` into the store under `digest` and take a reference.
+
+    Unless `keep_source` is set the source file is consumed either way: it
+    becomes the blob, or it is removed because an identical blob already
+    exists.
+    """
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    size = os.path.getsize(source_path)
+    filename = shard_path(digest, ext)
+    try:
+        previous = add_blob_reference(digest, filename, size)
+    except Exception:
+        if not keep_source:
+            os.remove(source_path)
+        raise
+
+    # A dedup hit keeps the path the blob was first stored under
+    if previous is not None:
+        filename = previous['path']
+    path = absolute_path(filename, upload_folder)
+    if previous is None or not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if keep_source:
+            _copy_into_place(source_path, path)
+        else:
+            os.replace(source_path, path)
+    elif not keep_source:
+        os.remove(source_path)
+    return StoredBlob(digest, filename, size, previous is None)
+
+def _copy_into_place(source_path, path):
+    # A hard link is free on the same filesystem; fall back to a real copy
+    temp_path = path + '.' + uuid.uuid4().hex
+    try:
+        os.link(source_path, temp_path)
+    except OSError:
+        shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, path)
+
+def retain(stored, count=1):
+    """Take `count` more references on an already stored blob."""
+    if count > 0:
+        add_blob_reference(stored.digest, stored.filename, stored.size, count)
+
+def release(digest, upload_folder=None):
+    """Drop one reference. Returns True if the blob was reclaimed.
+
+    Once the record is gone an identical upload may store the same file again
+    at any moment, so the file is first moved aside and only deleted if no new
+    record appeared meanwhile; otherwise it is put back.
+    """
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    blob = release_blob_reference(digest)
+    if blob is None or blob['refs'] > 0:
+        return False
+    if not delete_unreferenced_blob(digest):
+        return False
+    path = absolute_path(blob['path'], upload_folder)
+    aside = _temp_path(upload_folder)
+    try:
+        os.replace(path, aside)
+    except FileNotFoundError:
+        aside = None
+    if get_blob(digest) is not None:
+        # Same digest, same bytes: whichever copy lands last is correct
+        if aside:
+            os.replace(aside, path)
+        return False
+    if aside:
+        os.remove(aside)
+    for derived in _derived_paths(blob['path'], upload_folder):
+        if os.path.exists(derived):
+            os.remove(derived)
+    return True
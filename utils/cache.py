@@ -0,0 +1,173 @@
+"""Bounded in-process caches with stale-while-revalidate.
+
+Each entry is fresh for `ttl` seconds and may then be served stale for
+another `stale_ttl` seconds while one background thread reloads it, so a
+slow upstream only slows down the refresh, not the request. Misses are
+single-flight: concurrent callers asking for the same key wait for the
+caller that is already loading it instead of loading it again. A failed
+refresh keeps serving the stale value until it expires.
+
+The least recently used entries are evicted beyond `maxsize`. Every cache
+registers itself so `cache_stats()` can report hits and misses.
+"""
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_caches = {}
+
+# How long a caller waits for another caller's load of the same key
+LOAD_WAIT_SECONDS = 30
+
+
+class TTLCache:
+    def __init__(self, name, maxsize, ttl, stale_ttl=0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.metrics = Counter()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def _lookup(self, key, now):
+        """'fresh', 'stale' or None, and the value; call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        value, fresh_until, stale_until = entry
+        if now < fresh_until:
+            self._entries.move_to_end(key)
+            return 'fresh', value
+        if now < stale_until:
+            self._entries.move_to_end(key)
+            return 'stale', value
+        del self._entries[key]
+        return None, None
+
+    def _store(self, values):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, now + self.ttl, now + self.ttl + self.stale_ttl)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.metrics['evictions'] += 1
+
+    def _claim(self, keys):
+        """Mark keys as loading; return (claimed keys, events of keys others are loading)."""
+        claimed, waiting = [], {}
+        with self._lock:
+            for key in keys:
+                if key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    self._inflight[key] = threading.Event()
+                    claimed.append(key)
+        return claimed, waiting
+
+    def _release(self, keys):
+        with self._lock:
+            for key in keys:
+                event = self._inflight.pop(key, None)
+                if event:
+                    event.set()
+
+    def _load(self, keys, load_many):
+        try:
+            values = load_many(keys)
+            self.metrics['loads'] += 1
+            self._store(values)
+            return values
+        except Exception:
+            self.metrics['load_errors'] += 1
+            raise
+        finally:
+            self._release(keys)
+
+    def _refresh(self, keys, load_many):
+        def run():
+            try:
+                self._load(keys, load_many)
+            except Exception as e:
+                logger.warning(f"Cache {self.name} refresh error: {str(e)}")
+        threading.Thread(target=run, name=f"cache-refresh-{self.name}", daemon=True).start()
+
+    def get_many(self, keys, load_many):
+        """Return {key: value} for `keys`, loading misses with `load_many(missing_keys)`.
+
+        `load_many` must return a value for every key it is given.
+        """
+        now = time.monotonic()
+        found, stale, missing = {}, [], []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                state, value = self._lookup(key, now)
+                if state is None:
+                    missing.append(key)
+                    continue
+                found[key] = value
+                if state == 'stale':
+                    stale.append(key)
+            self.metrics['hits'] += len(found) - len(stale)
+            self.metrics['stale_hits'] += len(stale)
+            self.metrics['misses'] += len(missing)
+
+        refreshing, _ = self._claim(stale)
+        if refreshing:
+            self._refresh(refreshing, load_many)
+
+        claimed, waiting = self._claim(missing)
+        if claimed:
+            found.update({key: value for key, value in self._load(claimed, load_many).items() if key in claimed})
+        if waiting:
+            for event in waiting.values():
+                event.wait(LOAD_WAIT_SECONDS)
+            with self._lock:
+                now = time.monotonic()
+                for key in waiting:
+                    state, value = self._lookup(key, now)
+                    if state is not None:
+                        found[key] = value
+            # The other caller's load failed; try once ourselves
+            retry = [key for key in waiting if key not in found]
+            if retry:
+                found.update(load_many(retry))
+        return found
+
+    def get(self, key, load):
+        """Return the value for `key`, loading it with `load()` on a miss."""
+        return self.get_many([key], lambda keys: {key: load()})[key]
+
+    def set(self, key, value):
+        self._store({key: value})
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.metrics['hits'] + self.metrics['stale_hits'] + self.metrics['misses']
+        return {
+            **{field: self.metrics[field] for field in ('hits', 'stale_hits', 'misses', 'loads', 'load_errors', 'evictions')},
+            'size': size,
+            'maxsize': self.maxsize,
+            'hit_rate': round((lookups - self.metrics['misses']) / lookups, 4) if lookups else None
+        }
+
+
+# Metrics of every cache in this process, by name
+def cache_stats():
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,110 @@
+"""Disk side of resumable uploads.
+
+Each upload session owns one preallocated part file. Chunks are streamed
+from the request body straight into their offset in that file, so a worker
+never holds more than one small block in memory. The SHA-256 of the whole
+file is built up incrementally while chunks arrive in order; if they arrive
+out of order the digest is computed from the part file at finalize.
+"""
+import hashlib
+import os
+import threading
+
+from config import Config
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# upload_id -> (next expected chunk index, running sha256 of chunks before it)
+_running_digests = {}
+_running_lock = threading.Lock()
+
+
+class ChunkError(Exception):
+    """Raised when a chunk body does not match what the session expects."""
+
+
+def part_path(upload_id):
+    return os.path.join(Config.UPLOAD_SESSION_FOLDER, f"{upload_id}.part")
+
+def chunk_length(index, size, chunk_size):
+    """Expected byte length of chunk `index` for a file of `size` bytes."""
+    return min(chunk_size, size - index * chunk_size)
+
+def allocate_part_file(upload_id, size):
+    path = part_path(upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.truncate(size)
+    return path
+
+def write_chunk(upload_id, index, chunk_size, expected_length, stream, expected_sha256=None):
+    """Stream one chunk from `stream` into the part file.
+
+    Returns the hex SHA-256 of the chunk. Nothing is recorded in the running
+    file digest unless the whole chunk was written and verified.
+    """
+    with _running_lock:
+        next_index, running = _running_digests.get(upload_id, (0, None))
+    in_order = index == next_index
+    if in_order:
+        running = running.copy() if running else hashlib.sha256()
+
+    chunk_digest = hashlib.sha256()
+    written = 0
+    with open(part_path(upload_id), 'r+b') as f:
+        f.seek(index * chunk_size)
+        while True:
+            block = stream.read(min(STREAM_BLOCK_SIZE, expected_length - written + 1))
+            if not block:
+                break
+            written += len(block)
+            if written > expected_length:
+                raise ChunkError(f'Chunk {index} is larger than {expected_length} bytes')
+            f.write(block)
+            chunk_digest.update(block)
+            if in_order:
+                running.update(block)
+
+    if written != expected_length:
+        raise ChunkError(f'Chunk {index} is {written} bytes, expected {expected_length}')
+    digest = chunk_digest.hexdigest()
+    if expected_sha256 and expected_sha256.lower() != digest:
+        raise ChunkError(f'Chunk {index} checksum mismatch')
+
+    if in_order:
+        with _running_lock:
+            if _running_digests.get(upload_id, (0, None))[0] == index:
+                _running_digests[upload_id] = (index + 1, running)
+    return digest
+
+def file_digest(upload_id, total_chunks):
+    """Return the hex SHA-256 of the assembled file."""
+    with _running_lock:
+        next_index, running = _running_digests.get(upload_id, (0, None))
+    if running is not None and next_index == total_chunks:
+        return running.hexdigest()
+
+    # Chunks arrived out of order or on another worker, hash the part file
+    digest = hashlib.sha256()
+    with open(part_path(upload_id), 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def reset(upload_id, size):
+    """Zero the part file so every chunk can be written again."""
+    with open(part_path(upload_id), 'r+b') as f:
+        f.truncate(0)
+        f.truncate(size)
+    _forget(upload_id)
+
+def discard(upload_id):
+    path = part_path(upload_id)
+    if os.path.exists(path):
+        os.remove(path)
+    _forget(upload_id)
+
+def _forget(upload_id):
+    with _running_lock:
+        _running_digests.pop(upload_id, None)
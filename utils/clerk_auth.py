@@ -1,68 +1,152 @@
-import os
-import requests
+"""Clerk session token verification.
+
+`require_auth` checks the token's RS256 signature against Clerk's JWKS and
+its expiry (and issuer/authorized party when configured). The JWKS is
+fetched once and refetched when a token names a key id it does not
+contain, which is how Clerk key rotation shows up. Verified tokens are kept
+in a bounded LRU keyed by their SHA-256, so repeat requests with the same
+token skip the signature check until it expires.
+
+Auth outcomes are logged for a sample (`AUTH_LOG_SAMPLE_RATE`) of requests
+at `AUTH_LOG_LEVEL`; tokens themselves are never logged.
+"""
 import base64
-import json
+import hashlib
+import hmac
+import logging
+import random
+import time
 from functools import wraps
+
+from authlib.jose import JsonWebKey, JsonWebToken
+from authlib.jose.errors import JoseError
 from flask import request, jsonify
 
+from config import Config
+from utils import http_client
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+jwt = JsonWebToken(['RS256'])
+
+_jwks_cache = TTLCache('jwks', 1, Config.CLERK_JWKS_CACHE_SECONDS, Config.CLERK_JWKS_CACHE_SECONDS)
+verified_tokens = TTLCache('verified_tokens', Config.AUTH_TOKEN_CACHE_SIZE, Config.AUTH_TOKEN_CACHE_SECONDS)
+_last_jwks_fetch = 0.0
+
+
+class AuthError(Exception):
+    pass
+
+
+def _log_sampled(level, message):
+    if random.random() < Config.AUTH_LOG_SAMPLE_RATE:
+        logger.log(level, message)
+
+def fetch_jwks():
+    """Download Clerk's public keys as an authlib KeySet."""
+    global _last_jwks_fetch
+    _last_jwks_fetch = time.monotonic()
+    headers = {}
+    # The Backend API endpoint needs the secret key; never send it anywhere else
+    if Config.CLERK_JWKS_URL.startswith(Config.CLERK_API_URL):
+        headers['Authorization'] = f'Bearer {Config.CLERK_SECRET_KEY}'
+    response = http_client.get(Config.CLERK_JWKS_URL, headers=headers)
+    if not response.ok:
+        raise AuthError(f"JWKS fetch failed: {response.status_code}")
+    return JsonWebKey.import_key_set(response.json())
+
+def _signing_key(header, payload):
+    kid = header.get('kid')
+    keys = _jwks_cache.get('jwks', fetch_jwks)
+    if not any(key.kid == kid for key in keys.keys) and \
+            time.monotonic() - _last_jwks_fetch > Config.CLERK_JWKS_MIN_REFRESH_SECONDS:
+        # An unknown key id usually means Clerk rotated its keys
+        _jwks_cache.invalidate('jwks')
+        keys = _jwks_cache.get('jwks', fetch_jwks)
+    try:
+        return keys.find_by_kid(kid)
+    except ValueError:
+        raise AuthError('Unknown signing key')
+
+def _claims_options():
+    options = {'exp': {'essential': True}, 'sub': {'essential': True}}
+    if Config.CLERK_ISSUER:
+        options['iss'] = {'essential': True, 'value': Config.CLERK_ISSUER}
+    if Config.CLERK_AUTHORIZED_PARTIES:
+        options['azp'] = {'essential': True, 'values': Config.CLERK_AUTHORIZED_PARTIES}
+    return options
+
+def verify_token(token):
+    """Return the claims of a valid token; raise AuthError otherwise."""
+    try:
+        claims = jwt.decode(token, _signing_key, claims_options=_claims_options())
+        claims.validate(leeway=Config.AUTH_CLOCK_SKEW_SECONDS)
+    except (JoseError, ValueError) as e:
+        raise AuthError(f"Invalid token: {e.__class__.__name__}")
+    return dict(claims)
+
+def authenticate(token):
+    """Claims for `token`, verified at most once while it stays cached and unexpired."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = verified_tokens.get(key, lambda: verify_token(token))
+    if claims['exp'] + Config.AUTH_CLOCK_SKEW_SECONDS < time.time():
+        verified_tokens.invalidate(key)
+        raise AuthError('Token expired')
+    return claims
+
 def require_auth(f):
-    """Simple decorator to check if user is authenticated"""
+    """Require a valid Clerk session token; sets request.current_user."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
-
-        
         if not auth_header:
             return jsonify({'error': 'Authorization header required'}), 401
-        
+
         # Remove 'Bearer ' prefix if present
-        if auth_header.startswith('Bearer '):
-            token = auth_header[7:]
-        else:
-            token = auth_header
-            
+        token = auth_header[7:] if auth_header.startswith('Bearer ') else auth_header
         try:
-            print("Token to decode:", token[:50] + "..." if len(token) > 50 else token)
-            
-            # Simple JWT decode without external library
-            parts = token.split('.')
-            if len(parts) != 3:
-                return jsonify({'error': 'Invalid token format'}), 401
-            
-            # Decode the payload (second part)
-            payload = parts[1]
-            # Add padding if needed
-            payload += '=' * (4 - len(payload) % 4)
-            
-            try:
-                decoded_bytes = base64.urlsafe_b64decode(payload)
-                decoded = json.loads(decoded_bytes.decode('utf-8'))
-                print("Decoded token:", decoded)
-                
-                # Extract user ID from the token
-                user_id = decoded.get('sub') or decoded.get('userid')
-                print("Extracted user_id:", user_id)
-                
-                if not user_id:
-                    print("No user ID found in token")
-                    return jsonify({'error': 'No user ID in token'}), 401
-                
-                # Token is valid, user is authenticated
-                request.current_user = {
-                    'id': user_id,
-                    'userid': user_id  # Your session claim
-                }
-                print("Authentication successful for user:", user_id)
-                
-                return f(*args, **kwargs)
-                
-            except Exception as decode_error:
-                print("Token decode error:", str(decode_error))
-                return jsonify({'error': 'Invalid token format'}), 401
-            
+            claims = authenticate(token)
+        except AuthError as e:
+            _log_sampled(logging.WARNING, f"Authentication failed: {str(e)}")
+            return jsonify({'error': 'Invalid or expired token'}), 401
         except Exception as e:
-            print("General Exception:", str(e))
-            print("Exception type:", type(e).__name__)
+            logger.error(f"Authentication error: {str(e)}")
             return jsonify({'error': 'Authentication failed'}), 401
-    
-    return decorated_function
\ No newline at end of file
+
+        user_id = claims.get('sub') or claims.get('userid')
+        request.current_user = {
+            'id': user_id,
+            'userid': user_id,
+            'claims': claims
+        }
+        _log_sampled(logging.getLevelName(Config.AUTH_LOG_LEVEL), f"Authenticated user {user_id}")
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+# Webhook deliveries older or newer than this are rejected as replays
+WEBHOOK_TOLERANCE_SECONDS = 5 * 60
+
+def verify_webhook(secret, headers, body):
+    """Check the Svix signature Clerk puts on webhook deliveries; raise ValueError if invalid."""
+    message_id = headers.get('svix-id')
+    timestamp = headers.get('svix-timestamp')
+    signatures = headers.get('svix-signature')
+    if not (secret and message_id and timestamp and signatures):
+        raise ValueError('Missing webhook signature')
+    try:
+        sent_at = int(timestamp)
+    except ValueError:
+        raise ValueError('Invalid webhook timestamp')
+    if abs(time.time() - sent_at) > WEBHOOK_TOLERANCE_SECONDS:
+        raise ValueError('Webhook timestamp out of range')
+    key = base64.b64decode(secret.split('_', 1)[1] if secret.startswith('whsec_') else secret)
+    signed = f"{message_id}.{timestamp}.".encode() + body
+    expected = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode()
+    # The header lists space-separated `v1,<signature>` pairs, one per active secret
+    for candidate in signatures.split():
+        version, _, signature = candidate.partition(',')
+        if version == 'v1' and hmac.compare_digest(signature, expected):
+            return
+    raise ValueError('Invalid webhook signature')
@@ -0,0 +1,51 @@
+"""gzip/brotli compression of responses.
+
+An `after_request` hook compresses text-like bodies (`COMPRESS_MIMETYPES`)
+of at least `COMPRESS_MIN_BYTES` with the best encoding the client accepts:
+brotli when the `brotli` package is installed, otherwise gzip. Streamed
+responses, ranges and bodies that already carry a `Content-Encoding` are
+left alone. ETags set by `utils/conditional.py` are weak, so they stay valid
+whichever encoding the body goes out in.
+"""
+import gzip
+
+from flask import request
+
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+def _encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+def compress_response(response):
+    if response.mimetype not in Config.COMPRESS_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+        return response
+    if response.content_length is not None and response.content_length < Config.COMPRESS_MIN_BYTES:
+        return response
+
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -0,0 +1,74 @@
+"""ETags and `304 Not Modified` for GET JSON responses.
+
+Every GET JSON response gets a weak ETag computed from its body, and a
+request whose `If-None-Match` matches it is answered `304` with no body.
+That saves the transfer but not the work of building the response.
+
+Routes that can tell cheaply whether their data changed use `@etag_from`
+with a version key function (for example a counter from
+`database.versiondatahandler`). The ETag is then built from the URL and
+the key, and a matching request is answered before the view runs.
+"""
+import hashlib
+import logging
+from functools import wraps
+
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+def _not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+def etag_from(version_key):
+    """Answer conditional GETs from `version_key(**view_args)` before running the view.
+
+    The key must change whenever the response would, given the same URL.
+    Place below `require_auth`, so the caller is authenticated first.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            try:
+                etag = _digest(f"{request.full_path}|{version_key(**kwargs)}".encode())
+            except Exception as e:
+                # Without a version the body-hash ETag still applies
+                logger.warning(f"Version key error: {str(e)}")
+                return view(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                return _not_modified(etag)
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
+
+def add_etag(response):
+    """Weak ETag from the body of a GET JSON response, and `304` when the client has it."""
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.mimetype != 'application/json':
+        return response
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    if 'ETag' not in response.headers:
+        response.set_etag(_digest(response.get_data()), weak=True)
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    etag, _ = response.get_etag()
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    return response
+
+def init_conditional(app):
+    app.after_request(add_etag)
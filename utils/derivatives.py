@@ -0,0 +1,204 @@
+"""Resized image derivatives with a bounded on-disk cache.
+
+Derivatives are rendered from the stored original the first time they are
+requested and cached under `Config.DERIVATIVE_CACHE_FOLDER`. Cache keys are
+built from the blob's content hash, so an entry never goes stale and only
+has to be evicted for space: the cache keeps a size-ordered LRU index and
+drops the least recently used files once it grows past
+`Config.DERIVATIVE_CACHE_MAX_BYTES`.
+
+The bound is kept per process. Each worker counts the files that were on
+disk when it first used the cache, plus the ones it renders or serves after
+that. Files rendered later by other workers are only counted once this
+worker serves them. Under N workers the folder can therefore grow to about
+N times the limit; size it accordingly.
+
+Concurrent requests for the same missing derivative are collapsed so only
+one of them renders it; the rest wait for that render and then read the
+cached file. Within a process this uses a per-key lock, across preforked
+workers an advisory file lock where the platform has one.
+"""
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+# fmt query value -> (PIL format, mimetype, file extension)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+    'jpg': ('JPEG', 'image/jpeg', 'jpg')
+}
+
+
+def bucket_width(width):
+    """Round a requested width up to a configured size so the cache stays bounded."""
+    for allowed in Config.DERIVATIVE_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return Config.DERIVATIVE_WIDTHS[-1]
+
+def derivative_key(digest, width, fmt):
+    return f"{digest}-w{width}.{FORMATS[fmt][2]}"
+
+def render(source_path, destination, width, fmt):
+    """Resize `source_path` to `width` pixels wide (never upscaling) and encode it as `fmt`.
+
+    Raises OSError for anything Pillow cannot decode, including images over
+    its decompression bomb limit.
+    """
+    from PIL import Image, ImageOps  # only needed on a cache miss
+
+    pil_format = FORMATS[fmt][0]
+    try:
+        with Image.open(source_path) as image:
+            image.seek(0)  # first frame of animated images
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            if pil_format == 'WEBP' and has_alpha:
+                image = image.convert('RGBA')
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            options = {'quality': Config.DERIVATIVE_QUALITY}
+            if pil_format == 'JPEG':
+                options.update(optimize=True, progressive=True)
+            else:
+                options['method'] = 4
+            image.save(destination, pil_format, **options)
+    except Image.DecompressionBombError as e:
+        # Not an OSError, but just as undecodable for our purposes
+        raise OSError(str(e)) from e
+
+
+class DerivativeCache:
+    """Size-bounded LRU cache of rendered files on disk."""
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or Config.DERIVATIVE_CACHE_FOLDER
+        self.max_bytes = max_bytes if max_bytes is not None else Config.DERIVATIVE_CACHE_MAX_BYTES
+        self._index = None  # key -> size, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> [lock, waiters]
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get_or_create(self, key, create):
+        """Return the cached path for `key`, calling `create(destination)` on a miss."""
+        path = self.path(key)
+        if self._hit(key, path):
+            return path
+
+        with self._single_flight(key):
+            # Another request may have rendered it while we waited
+            if self._hit(key, path):
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                create(temp_path)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._add(key, os.path.getsize(path))
+        return path
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {'entries': len(self._index), 'bytes': self._total, 'max_bytes': self.max_bytes}
+
+    def _hit(self, key, path):
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                # Rendered by another worker process
+                size = os.path.getsize(path)
+                self._index[key] = size
+                self._total += size
+            self._index.move_to_end(key)
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            pass
+        return True
+
+    def _add(self, key, size):
+        with self._lock:
+            self._load_index()
+            self._total += size - self._index.get(key, 0)
+            self._index[key] = size
+            self._index.move_to_end(key)
+            while self._total > self.max_bytes and len(self._index) > 1:
+                victim, victim_size = self._index.popitem(last=False)
+                self._total -= victim_size
+                for victim_path in (self.path(victim), self.path(victim) + '.lock'):
+                    try:
+                        os.remove(victim_path)
+                    except OSError:
+                        pass
+
+    def _load_index(self):
+        # Must hold self._lock; rebuilds LRU order from modification times
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.endswith(('.tmp', '.lock')):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._total = sum(size for _, _, size in entries)
+
+    @contextmanager
+    def _single_flight(self, key):
+        with self._lock:
+            flight = self._inflight.setdefault(key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            with flight[0], self._file_lock(key):
+                yield
+        finally:
+            with self._lock:
+                flight[1] -= 1
+                if flight[1] == 0:
+                    del self._inflight[key]
+
+    @contextmanager
+    def _file_lock(self, key):
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.path(key) + '.lock'
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+derivative_cache = DerivativeCache()
@@ -0,0 +1,221 @@
+"""Shared client for outbound HTTP calls (Clerk, Google).
+
+- One pooled `requests.Session` per process, so calls reuse keep-alive
+  connections instead of opening a new TCP+TLS connection each time.
+- Connect/read timeouts per host (`Config.HTTP_TIMEOUTS`), so a hung
+  upstream cannot hold a worker.
+- Idempotent requests are retried on connection errors, timeouts and
+  429/502/503/504; any other exception counts as a failure but is raised
+  at once, with exponential backoff and full jitter.
+- A circuit breaker per host opens after `HTTP_BREAKER_FAILURES` failed
+  calls in a row and then fails fast with `CircuitOpenError` for
+  `HTTP_BREAKER_RESET_SECONDS`, after which one trial call is let through.
+- Every call's latency and outcome is recorded per host; see `http_stats()`.
+
+`CircuitOpenError` is a `requests.ConnectionError`, so callers that handle
+`requests.RequestException` need nothing extra.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Latency samples kept per host for percentiles
+LATENCY_SAMPLES = 500
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half_open' if time.monotonic() - self.opened_at >= self.reset_seconds else 'open'
+
+    def allow(self):
+        """Whether a call may go out; in half-open state only one trial call at a time."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                # A failed trial call re-opens the circuit for another full period
+                self.opened_at = time.monotonic()
+
+
+class HostStats:
+    def __init__(self):
+        self.counts = Counter()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record(self, outcome, seconds=None):
+        with self._lock:
+            self.counts[outcome] += 1
+            if seconds is not None:
+                self.latencies.append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            counts = dict(self.counts)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else None
+
+        return {**counts, 'p50_ms': percentile(0.5), 'p95_ms': percentile(0.95), 'max_ms': percentile(1)}
+
+
+class HTTPClient:
+    def __init__(self, pool_size=None, retries=None, backoff=None):
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.retries = Config.HTTP_RETRIES if retries is None else retries
+        self.backoff = Config.HTTP_BACKOFF_SECONDS if backoff is None else backoff
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._stats = {}
+
+    @property
+    def session(self):
+        # Pooled connections must not be shared with a forked child
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(Config.HTTP_BREAKER_FAILURES, Config.HTTP_BREAKER_RESET_SECONDS)
+                self._stats[host] = HostStats()
+            return self._breakers[host], self._stats[host]
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), Config.HTTP_MAX_BACKOFF_SECONDS)
+        # Full jitter keeps retrying workers from hitting the host in lockstep
+        return random.uniform(0, min(Config.HTTP_MAX_BACKOFF_SECONDS, self.backoff * 2 ** attempt))
+
+    def request(self, method, url, timeout=None, retry=None, **kwargs):
+        """Send a request and return the `requests.Response`.
+
+        Raises `requests.RequestException` (including `CircuitOpenError`) if
+        no response could be had. Error status codes are returned, not raised.
+        """
+        method = method.upper()
+        host = urlsplit(url).hostname or ''
+        breaker, stats = self._host_state(host)
+        timeout = timeout or Config.HTTP_TIMEOUTS.get(host, Config.HTTP_DEFAULT_TIMEOUT)
+        retries = self.retries if (method in IDEMPOTENT_METHODS if retry is None else retry) else 0
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                stats.record('rejected')
+                raise CircuitOpenError(f"Circuit open for {host}")
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except Exception as e:
+                # Every failure is recorded, so a failed half-open trial re-opens the circuit
+                stats.record('error', time.perf_counter() - started)
+                breaker.record_failure()
+                logger.warning(f"{method} {host} failed (attempt {attempt + 1}): {str(e)}")
+                if attempt == retries or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+
+            elapsed = time.perf_counter() - started
+            logger.debug(f"{method} {host} -> {response.status_code} in {elapsed * 1000:.0f} ms")
+            if response.status_code >= 500 or response.status_code == 429:
+                stats.record('error', elapsed)
+                breaker.record_failure()
+                if response.status_code in RETRY_STATUSES and attempt < retries:
+                    time.sleep(self._delay(attempt, response))
+                    continue
+            else:
+                stats.record('ok', elapsed)
+                breaker.record_success()
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def reset(self):
+        """Drop the pooled session and per-host state, e.g. in a freshly forked worker."""
+        self._lock = threading.Lock()
+        self._session, self._pid = None, None
+        self._breakers, self._stats = {}, {}
+
+    def stats(self):
+        with self._lock:
+            hosts = list(self._stats)
+        return {
+            host: {**self._stats[host].snapshot(), 'circuit': self._breakers[host].state}
+            for host in hosts
+        }
+
+
+client = HTTPClient()
+
+def request(method, url, **kwargs):
+    return client.request(method, url, **kwargs)
+
+def get(url, **kwargs):
+    return client.get(url, **kwargs)
+
+def post(url, **kwargs):
+    return client.post(url, **kwargs)
+
+# Call counts, latency percentiles and circuit state per host
+def http_stats():
+    return client.stats()
@@ -0,0 +1,227 @@
+"""Background jobs for post-upload work.
+
+Jobs are persisted in the `jobs` collection, so anything queued survives a
+restart. Each web process runs one dispatcher thread that claims runnable
+jobs atomically and hands them to a local process pool, which keeps
+CPU-bound work such as PDF rendering off the request workers. A job whose
+worker dies is picked up again once its lease expires; a live worker renews
+the leases of the jobs it is running, so long jobs are never run twice.
+Failures are retried with exponential backoff up to `Config.JOB_MAX_ATTEMPTS`.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from database.jobdatahandler import (
+    claim_next_job,
+    complete_job,
+    enqueue_job,
+    enqueue_job_once,
+    fail_job,
+    renew_job_leases
+)
+from database.blobdatahandler import set_blob_metadata
+from database.statsdatahandler import rebuild_stats
+from database.userdatahandler import set_image_status, set_voice_note_metadata
+from database.userindexdatahandler import sync_users
+from utils.audio import process_voice_note
+from utils.thumbnails import generate_pdf_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+def run_pdf_thumbnail(payload):
+    thumbnail_path = generate_pdf_thumbnail(payload['pdf_path'], payload['filename'], payload['upload_folder'])
+    return {'thumbnail': os.path.relpath(thumbnail_path, payload['upload_folder'])}
+
+def run_audio_transcode(payload):
+    result = process_voice_note(payload['audio_path'], payload['destination'])
+    return {
+        'audio_filename': payload['transcoded_filename'] if result['transcoded'] else payload['filename'],
+        'audio_duration': result['duration'],
+        'audio_peaks': result['peaks']
+    }
+
+def run_stats_reconcile(payload):
+    return {'counters': rebuild_stats()}
+
+def run_user_index_sync(payload):
+    return {'users': sync_users(full=payload.get('full', False))}
+
+# A voice note is shared by every image of its upload and by later identical uploads
+def voice_note_ready(job, result):
+    set_blob_metadata(job['payload']['blob_hash'], 'audio', result)
+    set_voice_note_metadata(job['payload']['blob_hash'], {'audio_status': 'ready', **result})
+
+def voice_note_failed(job):
+    set_voice_note_metadata(job['payload']['blob_hash'], {'audio_status': 'failed'})
+
+# Job kind -> top-level function executed in the process pool with the job payload
+JOB_HANDLERS = {
+    'pdf_thumbnail': run_pdf_thumbnail,
+    'audio_transcode': run_audio_transcode,
+    'stats_reconcile': run_stats_reconcile,
+    'user_index_sync': run_user_index_sync
+}
+
+# Job kind -> (on success, on final failure), run in the web process.
+# Kinds without an entry update the status of the job's image.
+JOB_CALLBACKS = {
+    'audio_transcode': (voice_note_ready, voice_note_failed)
+}
+
+
+class JobRunner:
+    """Claims jobs from MongoDB and runs them in a process pool."""
+
+    def __init__(self, max_workers=None, poll_interval=None):
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+        self.worker_id = None
+        self._pool = None
+        self._thread = None
+        self._heartbeat = None
+        self._running = {}  # job id -> job, while its lease must be kept alive
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stopped = threading.Event()
+        self._slots = threading.Semaphore(self.max_workers)
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+            # spawn keeps the children free of the parent's threads and Mongo sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            self._stopping.clear()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='beehive-job-dispatcher', daemon=True)
+            self._thread.start()
+            self._heartbeat = threading.Thread(target=self._renew_leases, name='beehive-job-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def shutdown(self, wait=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 2)
+        if self._pool:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        # Leases are renewed until the jobs still running have finished
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._slots.acquire()
+            self._wakeup.clear()
+            try:
+                job = claim_next_job(self.worker_id)
+            except Exception as e:
+                self._slots.release()
+                logger.error(f"Job claim error: {str(e)}")
+                self._stopping.wait(self.poll_interval)
+                continue
+
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                continue
+
+            self._dispatch(job)
+
+    def _renew_leases(self):
+        # Well inside the lease, so one missed renewal does not let another worker take the job
+        while not self._stopped.wait(Config.JOB_LEASE_SECONDS / 3):
+            with self._lock:
+                job_ids = list(self._running)
+            try:
+                renew_job_leases(self.worker_id, job_ids)
+            except Exception as e:
+                logger.error(f"Job lease renewal error: {str(e)}")
+
+    def _dispatch(self, job):
+        with self._lock:
+            self._running[job['_id']] = job
+        handler = JOB_HANDLERS.get(job['kind'])
+        if handler is None:
+            self._finish(job, error=f"Unknown job kind: {job['kind']}")
+            return
+        try:
+            future = self._pool.submit(handler, job['payload'])
+        except Exception as e:
+            self._finish(job, error=str(e))
+            return
+        future.add_done_callback(lambda f: self._on_done(job, f))
+
+    def _on_done(self, job, future):
+        try:
+            result = future.result()
+        except Exception:
+            self._finish(job, error=traceback.format_exc(limit=3))
+        else:
+            self._finish(job, result=result)
+
+    def _finish(self, job, result=None, error=None):
+        with self._lock:
+            self._running.pop(job['_id'], None)
+        try:
+            on_success, on_failure = JOB_CALLBACKS.get(job['kind'], (None, None))
+            if error is None:
+                if not complete_job(job, result):
+                    logger.warning(f"Job {job['_id']} ({job['kind']}) finished after losing its lease; result dropped")
+                elif on_success:
+                    on_success(job, result or {})
+                elif job.get('image_id'):
+                    set_image_status(job['image_id'], 'ready', **(result or {}))
+            else:
+                logger.error(f"Job {job['_id']} ({job['kind']}) failed: {error}")
+                retry = fail_job(job, error)
+                if retry is None:
+                    logger.warning(f"Job {job['_id']} ({job['kind']}) failed after losing its lease")
+                elif not retry:
+                    if on_failure:
+                        on_failure(job)
+                    elif job.get('image_id'):
+                        set_image_status(job['image_id'], 'failed')
+        except Exception as e:
+            logger.error(f"Job bookkeeping error: {str(e)}")
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+
+job_runner = JobRunner()
+atexit.register(job_runner.shutdown, False)
+
+_enqueue_once_lock = threading.Lock()
+
+
+def enqueue(kind, payload, image_id=None):
+    """Persist a job and wake the local dispatcher. Returns the job id."""
+    job_id = enqueue_job(kind, payload, image_id=image_id)
+    job_runner.ensure_started()
+    job_runner.notify()
+    return job_id
+
+def enqueue_once(kind, payload):
+    """Like `enqueue`, but reuses a queued or running job with the same kind and payload."""
+    # Serializes the check within this process; other processes may rarely add a duplicate
+    with _enqueue_once_lock:
+        job_id = enqueue_job_once(kind, payload)
+    job_runner.ensure_started()
+    job_runner.notify()
+    return job_id
@@ -0,0 +1,106 @@
+"""JSON encoding for responses and events.
+
+`dumps` writes `ObjectId` as its hex string and `datetime` as ISO 8601, so
+Mongo documents can be returned as they are instead of being copied into
+string-only dicts first. It uses orjson, which encodes straight to bytes,
+and falls back to the standard library where orjson is not installed.
+
+`BeehiveJSONProvider` makes `jsonify` and `request.json` use it, and
+`stream_response` writes a large result as a JSON array or NDJSON while
+the Mongo cursor is read, instead of building the whole list first.
+"""
+import json
+import logging
+from datetime import date, datetime
+
+from bson import Decimal128, ObjectId
+from flask import Response, stream_with_context
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Slower, same output
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Streamed output is flushed in pieces of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if orjson is None and isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """Encode `obj` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode()
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class BeehiveJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # Encoded once, straight to the response body
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
+
+
+def _chunked(pieces):
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+def _array_pieces(items):
+    yield b'['
+    for i, item in enumerate(items):
+        yield b',' + dumps(item) if i else dumps(item)
+    yield b']'
+
+def _ndjson_pieces(items):
+    for item in items:
+        yield dumps(item) + b'\n'
+
+def stream_json(items, fmt='json'):
+    """Yield `items` encoded as one JSON array, or as NDJSON (one document per line)."""
+    pieces = _ndjson_pieces(items) if fmt == 'ndjson' else _array_pieces(items)
+    try:
+        yield from _chunked(pieces)
+    except Exception as e:
+        # The status line is already sent; a truncated body is how the client finds out
+        logger.error(f"Streamed response failed: {str(e)}")
+
+def stream_format(value):
+    """The requested stream format, None when not streaming; ValueError if unknown."""
+    if not value:
+        return None
+    if value not in STREAM_FORMATS:
+        raise ValueError(f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+    return value
+
+def stream_response(items, fmt='json'):
+    return Response(stream_with_context(stream_json(items, fmt)), mimetype=STREAM_FORMATS[fmt])
@@ -0,0 +1,36 @@
+"""Per-worker resource lifecycle under the production server.
+
+gunicorn loads the app once in the master and forks workers from it
+(`gunicorn.conf.py`). Each worker then starts with its own MongoDB client
+and HTTP connection pool instead of sockets inherited from the master, and
+on exit stops its job runner and closes its connections.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+_worker = None
+
+
+def worker_started(worker=None):
+    """Rebuild connection pools in a newly forked worker."""
+    global _worker
+    from database import databaseConfig
+    from utils import http_client
+
+    _worker = worker
+    databaseConfig.close_client()
+    http_client.client.reset()
+    logger.info(f"Worker {worker.pid if worker else '-'} started")
+
+def worker_stopping():
+    """Stop background work and close connections; in-flight requests have already finished."""
+    from database import databaseConfig
+    from utils.jobs import job_runner
+
+    job_runner.shutdown(wait=True)
+    databaseConfig.close_client()
+
+def is_draining():
+    """Whether this worker has been told to shut down and should get no new traffic."""
+    return _worker is not None and not _worker.alive
@@ -0,0 +1,70 @@
+"""Sending uploaded media with validators and cache headers.
+
+Every response carries a strong ETag and supports `Range` requests, so
+repeat visits revalidate with a `304` and audio seeking fetches only the
+bytes it needs. Content-addressed files never change under their URL, so
+they are marked `immutable` with a one year lifetime. Other files must be
+revalidated on every use.
+
+When `Config.MEDIA_ACCEL_REDIRECT_PREFIX` is set the file body is left to
+the reverse proxy through `X-Accel-Redirect` (nginx handles ranges there);
+with `USE_X_SENDFILE` Werkzeug emits `X-Sendfile` instead.
+"""
+import mimetypes
+import os
+import re
+
+from flask import Response, current_app, request, send_file
+
+from config import Config
+
+# ab/cd/<sha256>[.ext], optionally below a derived folder such as thumbnails/
+CONTENT_ADDRESSED_PATH = re.compile(r'^(?:[a-z]+/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(?:\.[a-z0-9]+)?$')
+
+
+def content_etag(filename):
+    """ETag for a content-addressed upload path, or None for anything else.
+
+    The path embeds the SHA-256 of the blob it was stored or derived from, so
+    it identifies the bytes as well as a hash of them would.
+    """
+    filename = filename.replace(os.sep, '/')
+    return filename if CONTENT_ADDRESSED_PATH.match(filename) else None
+
+def send_media(path, etag=None, mimetype=None, immutable=False):
+    """Send `path` as a conditional, range-capable response.
+
+    `etag` should be derived from the content (e.g. its SHA-256); without it
+    Werkzeug falls back to one built from mtime and size. Set `immutable`
+    only when the URL can never point at different bytes.
+    """
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if Config.MEDIA_ACCEL_REDIRECT_PREFIX:
+        response = _accel_redirect(path, mimetype, etag)
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag or True,
+                             max_age=Config.MEDIA_IMMUTABLE_MAX_AGE if immutable else 0)
+
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.MEDIA_IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    response.accept_ranges = 'bytes'
+    return response
+
+def _accel_redirect(path, mimetype, etag):
+    if etag is None:
+        stat = os.stat(path)
+        etag = f"{int(stat.st_mtime)}-{stat.st_size}"
+    response = Response(mimetype=mimetype)
+    response.set_etag(etag)
+    if request.if_none_match.contains(etag):
+        response.status_code = 304
+        return response
+
+    relative_path = os.path.relpath(os.path.abspath(path), current_app.root_path).replace(os.sep, '/')
+    response.headers['X-Accel-Redirect'] = Config.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + relative_path
+    return response
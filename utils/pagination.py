@@ -0,0 +1,63 @@
+"""Keyset pagination over `(<sort field>, _id)`.
+
+A cursor is the sort value and `_id` of the last item of a page, encoded as
+an opaque URL-safe string. The next page starts strictly after it, so each
+page costs one index range scan regardless of how deep the client reads.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(value, _id):
+    if isinstance(value, datetime):
+        value = {'t': value.isoformat()}
+    payload = {'v': value, 'id': str(_id)}
+    # String ids (e.g. Clerk user ids) are kept as strings
+    if not isinstance(_id, ObjectId):
+        payload['s'] = 1
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return (value, _id) for a cursor made by `encode_cursor`."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value = payload['v']
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['t'])
+        _id = payload['id']
+        return value, (str(_id) if payload.get('s') else ObjectId(_id))
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise CursorError(f'Invalid cursor: {str(e)}')
+
+def after_cursor(field, cursor, descending=True):
+    """Query clause selecting the documents that sort after `cursor`."""
+    value, _id = decode_cursor(cursor)
+    op = '$lt' if descending else '$gt'
+    return {'$or': [
+        {field: {op: value}},
+        {field: value, '_id': {op: _id}}
+    ]}
+
+def page_size(requested, default, maximum):
+    """Clamp a client-supplied `limit` to 1..maximum."""
+    if requested is None:
+        return default
+    return max(1, min(requested, maximum))
+
+def paginate(cursor_results, field, limit):
+    """Split `limit + 1` fetched documents into the page and the next cursor."""
+    documents = list(cursor_results)
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    last = documents[-1]
+    return documents, encode_cursor(last.get(field), last['_id'])
@@ -0,0 +1,249 @@
+"""In-process publish/subscribe for pushing events to connected clients.
+
+Publishers call `publish(channel, type, data)`; the SSE endpoint holds a
+`Subscription` per connection and waits on the local event buffer, so an
+idle connection costs no database reads.
+
+Backends (`Config.EVENTS_BACKEND`):
+
+- `memory`: events only reach clients connected to this process. A client
+  that reconnects with an id that is no longer buffered gets a `reset`
+  event and should reload its state.
+- `mongo`: events are written to the `events` collection and a single
+  tailer thread per process feeds them into the local buffer, through a
+  change stream when the deployment has one and by polling otherwise.
+  Every node sees every event, and a reconnect to a different node is
+  replayed from the collection.
+
+Event ids sort by publish time (`<ms><counter>-<node>`), which is what
+clients send back as `Last-Event-ID`.
+"""
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ['id', 'channel', 'type', 'data'])
+
+_node = f"{socket.gethostname()}.{os.getpid()}"
+_counter = itertools.count()
+
+
+def new_event_id():
+    return f"{int(time.time() * 1000):013d}{next(_counter) % 1000000:06d}-{_node}"
+
+
+class EventBuffer:
+    """The most recent events in arrival order, with a wakeup for waiting subscribers."""
+
+    def __init__(self, size):
+        self._events = deque(maxlen=size)
+        self._positions = {}
+        self._next_position = 0
+        self._condition = threading.Condition()
+
+    def append(self, event):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                del self._positions[self._events[0][1].id]
+            self._events.append((self._next_position, event))
+            self._positions[event.id] = self._next_position
+            self._next_position += 1
+            self._condition.notify_all()
+
+    @property
+    def position(self):
+        with self._condition:
+            return self._next_position
+
+    def position_after(self, event_id):
+        """Position just past `event_id`, or None if it is not buffered."""
+        with self._condition:
+            position = self._positions.get(event_id)
+            return None if position is None else position + 1
+
+    def latest_id(self):
+        with self._condition:
+            return self._events[-1][1].id if self._events else None
+
+    def wait(self, position, timeout):
+        """Return (events from `position` on, next position), waiting up to `timeout`."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._next_position > position, timeout)
+            oldest = self._events[0][0] if self._events else self._next_position
+            # A subscriber that fell further behind than the buffer skips ahead
+            events = [event for index, event in self._events if index >= max(position, oldest)]
+            return events, self._next_position
+
+
+class Subscription:
+    def __init__(self, bus, channels, last_event_id=None):
+        self.bus = bus
+        self.channels = set(channels)
+        self.reset = False
+        self._pending = []
+        self._replayed = set()
+
+        self.position = bus.buffer.position
+        if last_event_id:
+            position = bus.buffer.position_after(last_event_id)
+            if position is not None:
+                self.position = position
+            else:
+                replayed = bus.replay(self.channels, last_event_id)
+                if replayed is None:
+                    self.reset = True
+                else:
+                    self._pending = replayed
+                    self._replayed = {event.id for event in replayed}
+
+    def next_events(self, timeout):
+        """Events for this subscription's channels, waiting up to `timeout` seconds."""
+        if self._pending:
+            events, self._pending = self._pending, []
+            return events
+        deadline = time.monotonic() + timeout
+        while True:
+            events, self.position = self.bus.buffer.wait(self.position, max(0, deadline - time.monotonic()))
+            events = [e for e in events if e.channel in self.channels and e.id not in self._replayed]
+            if events or time.monotonic() >= deadline:
+                return events
+
+
+class MemoryEventBus:
+    def __init__(self, buffer_size=None):
+        self.buffer = EventBuffer(buffer_size or Config.EVENTS_BUFFER_SIZE)
+
+    def publish(self, channel, type, data):
+        event = Event(new_event_id(), channel, type, data)
+        self.buffer.append(event)
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        return Subscription(self, channels, last_event_id)
+
+    def replay(self, channels, last_event_id):
+        # Nothing outside the buffer survives in memory
+        return None
+
+
+class MongoEventBus(MemoryEventBus):
+    def __init__(self, collection=None, buffer_size=None, poll_interval=None):
+        super().__init__(buffer_size)
+        self._collection = collection
+        self.poll_interval = poll_interval or Config.EVENTS_POLL_INTERVAL
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Tail positions, kept across reconnects so an error does not drop events
+        self._resume_token = None
+        self._last_id = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from database.databaseConfig import get_beehive_event_collection
+            self._collection = get_beehive_event_collection()
+        return self._collection
+
+    def publish(self, channel, type, data):
+        event = Event(new_event_id(), channel, type, data)
+        self.collection.insert_one({
+            '_id': event.id,
+            'channel': channel,
+            'type': type,
+            'data': data,
+            'created_at': datetime.now()
+        })
+        # Delivered to local subscribers by the tailer, like events from other nodes
+        self.ensure_started()
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        self.ensure_started()
+        return super().subscribe(channels, last_event_id)
+
+    def replay(self, channels, last_event_id):
+        documents = self.collection.find({'_id': {'$gt': last_event_id}, 'channel': {'$in': list(channels)}}) \
+            .sort('_id', 1).limit(Config.EVENTS_BUFFER_SIZE)
+        return [Event(d['_id'], d['channel'], d['type'], d['data']) for d in documents]
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._tail, name='event-tailer', daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        self._stopping.set()
+
+    def _tail(self):
+        from database.databaseConfig import supports_transactions
+        try:
+            use_change_stream = supports_transactions()
+        except Exception:
+            use_change_stream = False
+        while not self._stopping.is_set():
+            try:
+                if use_change_stream:
+                    self._watch()
+                else:
+                    self._poll()
+            except Exception as e:
+                logger.error(f"Event tailer error: {str(e)}")
+                self._stopping.wait(self.poll_interval)
+
+    def _watch(self):
+        pipeline = [{'$match': {'operationType': 'insert'}}]
+        with self.collection.watch(pipeline, resume_after=self._resume_token, max_await_time_ms=1000) as stream:
+            while not self._stopping.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                self._resume_token = stream.resume_token
+                d = change['fullDocument']
+                self.buffer.append(Event(d['_id'], d['channel'], d['type'], d['data']))
+
+    def _poll(self):
+        # Only read events older than the settle delay, so an insert that is still
+        # in flight on another node cannot land behind the last id we have seen
+        if self._last_id is None:
+            self._last_id = f"{int((time.time() - Config.EVENTS_SETTLE_SECONDS) * 1000):013d}"
+        while not self._stopping.is_set():
+            cutoff = datetime.now() - timedelta(seconds=Config.EVENTS_SETTLE_SECONDS)
+            query = {'_id': {'$gt': self._last_id}, 'created_at': {'$lte': cutoff}}
+            for d in self.collection.find(query).sort('_id', 1):
+                self.buffer.append(Event(d['_id'], d['channel'], d['type'], d['data']))
+                self._last_id = d['_id']
+            self._stopping.wait(self.poll_interval)
+
+
+def create_event_bus():
+    if Config.EVENTS_BACKEND == 'mongo':
+        return MongoEventBus()
+    return MemoryEventBus()
+
+event_bus = create_event_bus()
+
+# Publishing must never fail the write that triggered it
+def publish(channel, type, data):
+    try:
+        return event_bus.publish(channel, type, data)
+    except Exception as e:
+        logger.error(f"Event publish error: {str(e)}")
+        return None
+
+def chat_channel(user_id):
+    return f"chat:{user_id}"
+
+ADMIN_CHANNEL = 'admin'
@@ -0,0 +1,100 @@
+import datetime
+import os
+from collections import namedtuple
+
+from config import Config
+from database.blobdatahandler import get_blob
+from database.userdatahandler import build_image, build_notification, save_upload_batch
+from utils import blobstore
+from utils.jobs import enqueue
+
+# One file of an upload: the stored blob, the name the user gave it and its voice note blob
+UploadItem = namedtuple('UploadItem', ['stored', 'original_filename', 'audio'])
+
+
+def finish_uploads(user_id, username, items, title, description, sentiment, upload_folder=None):
+    """Record stored blobs as images, notify admins and queue their post-upload jobs.
+
+    All image and notification documents are written as one batch. If that
+    fails, the blob references taken for `items` are released so files written
+    for this upload are removed again, and the error is re-raised. Returns the
+    per-file summaries that upload endpoints send back to the client.
+    """
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    time_created = datetime.datetime.now()
+
+    images = []
+    notifications = []
+    thumbnails = []
+    voice_notes = {}  # audio digest -> saved metadata, or None if it still has to be processed
+    for item in items:
+        stored, audio = item.stored, item.audio
+
+        # Identical PDFs share a blob, so their thumbnail only has to be rendered once
+        render_thumbnail = stored.filename.lower().endswith('.pdf') and not os.path.exists(
+            blobstore.thumbnail_path(stored.filename, upload_folder))
+        thumbnails.append(render_thumbnail)
+
+        images.append(build_image(
+            user_id, stored.filename, title, description, time_created,
+            audio.filename if audio else None, sentiment,
+            status='processing' if render_thumbnail else 'ready',
+            blob_hash=stored.digest,
+            original_filename=item.original_filename,
+            audio_blob_hash=audio.digest if audio else None
+        ))
+        if audio:
+            if audio.digest not in voice_notes:
+                blob = get_blob(audio.digest)
+                voice_notes[audio.digest] = blob.get('audio') if blob else None
+            metadata = voice_notes[audio.digest]
+            images[-1].update(metadata or {})
+            images[-1]['audio_status'] = 'ready' if metadata else 'processing'
+        notifications.append(build_notification(user_id, username, stored.filename, title, time_created, sentiment))
+
+    try:
+        image_ids = save_upload_batch(images, notifications)
+    except Exception:
+        release_items(items, upload_folder)
+        raise
+
+    # Transcode each new voice note once, however many images share it
+    pending_voice_notes = {item.audio.digest: item.audio for item in items
+                           if item.audio and voice_notes[item.audio.digest] is None}
+    for audio in pending_voice_notes.values():
+        transcoded_path = blobstore.audio_path(audio.filename, upload_folder)
+        enqueue('audio_transcode', {
+            'blob_hash': audio.digest,
+            'audio_path': blobstore.absolute_path(audio.filename, upload_folder),
+            'filename': audio.filename,
+            'destination': transcoded_path,
+            'transcoded_filename': os.path.relpath(transcoded_path, upload_folder)
+        })
+
+    uploaded = []
+    for item, image, image_id, render_thumbnail in zip(items, images, image_ids, thumbnails):
+        # Render the PDF thumbnail in the background instead of blocking the response
+        job_id = None
+        if render_thumbnail:
+            job_id = enqueue('pdf_thumbnail', {
+                'pdf_path': blobstore.absolute_path(item.stored.filename, upload_folder),
+                'filename': item.stored.filename,
+                'upload_folder': upload_folder
+            }, image_id=image_id)
+
+        uploaded.append({
+            'id': str(image_id),
+            'filename': item.stored.filename,
+            'original_filename': item.original_filename,
+            'sha256': item.stored.digest,
+            'status': image['status'],
+            'job_id': str(job_id) if job_id else None
+        })
+    return uploaded
+
+def release_items(items, upload_folder=None):
+    """Drop the blob references taken for `items`, e.g. after a failed upload."""
+    for item in items:
+        blobstore.release(item.stored.digest, upload_folder)
+        if item.audio:
+            blobstore.release(item.audio.digest, upload_folder)
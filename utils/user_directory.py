@@ -0,0 +1,108 @@
+"""Look up Clerk users from inside the backend.
+
+Routes and data handlers call these functions directly instead of going
+through `/api/admin/users`, so a request never waits on another request
+to this server.
+
+Two caches sit in front of Clerk (see `utils/cache.py`):
+
+- `user_cache`, users by id. Ids Clerk does not know (deleted users) are
+  cached too, as None.
+- `query_cache`, pages of the admin user listing by (query, limit, offset).
+
+Both serve stale entries while refreshing them in the background, and the
+Clerk webhook (`routes/webhookroutes.py`) updates or drops entries as
+users change.
+"""
+import logging
+
+import requests
+
+from config import Config
+from utils import http_client
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Clerk accepts up to 500 user_id filters per list request
+CLERK_BATCH_SIZE = 100
+
+user_cache = TTLCache('users', Config.USER_CACHE_SIZE, Config.USER_DIRECTORY_CACHE_SECONDS,
+                      Config.USER_DIRECTORY_STALE_SECONDS)
+query_cache = TTLCache('user_queries', Config.USER_QUERY_CACHE_SIZE, Config.USER_QUERY_CACHE_SECONDS,
+                       Config.USER_DIRECTORY_STALE_SECONDS)
+
+
+class UserDirectoryError(Exception):
+    pass
+
+
+def serialize_user(user):
+    """The user shape returned by the admin user endpoints."""
+    email = user['email_addresses'][0]['email_address'] if user.get('email_addresses') else None
+    return {
+        'id': user['id'],
+        'name': f"{user.get('first_name') or ''} {user.get('last_name') or ''}".strip(),
+        'email': email,
+        'role': (user.get('unsafe_metadata') or {}).get('role', 'user'),
+        'lastActive': user.get('last_active_at'),
+        'image': user.get('image_url'),
+        'clerkId': user['id']
+    }
+
+def fetch_clerk_users(params):
+    """One page of raw Clerk user objects for the list-users `params`."""
+    try:
+        response = http_client.get(
+            f"{Config.CLERK_API_URL}/users",
+            headers={'Authorization': f'Bearer {Config.CLERK_SECRET_KEY}'},
+            params=params
+        )
+    except requests.RequestException as e:
+        raise UserDirectoryError(f"Clerk API unreachable: {str(e)}")
+    if not response.ok:
+        raise UserDirectoryError(f"Clerk API error: {response.text}")
+    return response.json()
+
+def _clerk_users(params):
+    return [serialize_user(user) for user in fetch_clerk_users(params)]
+
+# Search users in Clerk, one page at a time
+def list_users(query=None, limit=10, offset=0):
+    def load():
+        users = _clerk_users({'query': query or None, 'limit': limit, 'offset': offset})
+        for user in users:
+            user_cache.set(user['id'], user)
+        return users
+
+    return query_cache.get((query or '', limit, offset), load)
+
+def _load_users(ids):
+    found = {}
+    for start in range(0, len(ids), CLERK_BATCH_SIZE):
+        batch = ids[start:start + CLERK_BATCH_SIZE]
+        users = {user['id']: user for user in _clerk_users({'user_id': batch, 'limit': len(batch)})}
+        found.update({user_id: users.get(user_id) for user_id in batch})
+    return found
+
+# Users by id; everything not cached is fetched from Clerk in batched requests
+def get_users(ids):
+    """Return {id: user or None} for `ids`.
+
+    Raises UserDirectoryError if Clerk cannot be reached for a user that is
+    not cached; callers that can render without names should catch it.
+    """
+    return user_cache.get_many(sorted({str(user_id) for user_id in ids if user_id}), _load_users)
+
+def get_user(user_id):
+    return get_users([user_id]).get(str(user_id))
+
+# Apply a Clerk user.created/updated/deleted event
+def user_changed(user_id, user=None):
+    """Cache the new profile (None for a deleted user) and drop cached listings."""
+    user_cache.set(user_id, user)
+    query_cache.clear()
+
+def clear_user_cache():
+    user_cache.clear()
+    query_cache.clear()
@@ -0,0 +1,9 @@
+"""WSGI entry point for production: `gunicorn wsgi:app`.
+
+Server settings and worker hooks are in `gunicorn.conf.py`, which gunicorn
+reads from the working directory. `python app.py` remains the development
+server.
+"""
+from app import create_app
+
+app = create_app()